@@ -6,6 +6,11 @@ class Settings(BaseSettings):
     # MongoDB
     MONGO_URL: str = "mongodb://localhost:27017/"
     MONGO_DB_NAME: str = "evoplate_db"
+    PLATE_WRITER_BATCH_SIZE: int = 100  # Plates per insert_many
+    PLATE_WRITER_FLUSH_MS: int = 200  # Longest a queued plate waits for its batch to fill
+    PLATE_WRITER_QUEUE_SIZE: int = 10000  # Plates waiting for the database
+    PLATE_WRITER_PUT_TIMEOUT: float = 0.5  # Seconds an OCR thread blocks on a full queue before dropping
+    PLATE_WRITER_RETRIES: int = 3  # Retries of a failed batch insert
     
     # Server
     BACKEND_HOST: str = "0.0.0.0"
@@ -19,11 +24,59 @@ class Settings(BaseSettings):
     # OCR
     DEFAULT_OCR_ENGINE: str = "hybrid"
     OCR_CONFIDENCE_THRESHOLD: float = 0.6
+    OCR_BATCH_MAX_SIZE: int = 8  # Max plate images per cross-camera batch
+    OCR_BATCH_MAX_WAIT_MS: int = 20  # Max time the oldest request waits for a batch to fill
+    OCR_RESULT_TIMEOUT: float = 30.0
+    HYBRID_EARLY_EXIT_CONFIDENCE: float = 0.85  # Stop waiting for slower engines once a valid plate reaches this
+    HYBRID_MAX_WORKERS: int = 6
+    HYBRID_PARALLEL_ENGINES: int = 2  # Engines one hybrid call runs at once (the rest wait for the early exit check)
+    CASCADE_CONFIDENCE: float = 0.8  # Cascade escalates to the next engine below this confidence
+    PLATE_DETECTOR_ENABLED: bool = True  # Locate plates with YOLO before OCR (needed for tracking)
+    PLATE_DETECTION_CONFIDENCE: float = 0.25
+    MAX_PLATES_PER_FRAME: int = 4  # Plates recognized per frame (multi-lane gates), best detections first
+    PLATE_DETECTOR_MODEL: Optional[str] = None  # Plate detector (.pt, or exported .onnx / OpenVINO .xml); None = yolov8n.pt, which has no plate class
+    PLATE_DETECTOR_CLASSES: Optional[str] = None  # Comma-separated plate class names/ids of an ultralytics model (None = classes named "plate")
+    PLATE_DETECTOR_BACKEND: str = "auto"  # auto, onnxruntime or openvino
+    PLATE_DETECTOR_INPUT_SIZE: int = 640  # Used when the model input size is dynamic
+    PLATE_DETECTOR_IOU: float = 0.45  # NMS overlap threshold
+    PLATE_DETECTOR_THREADS: int = 0  # CPU inference threads (0 = runtime default)
+    PLATE_RECOGNIZER_MODEL: Optional[str] = None  # CRNN-CTC plate text model (.onnx) for the "crnn" engine
+    PLATE_RECOGNIZER_ALPHABET: Optional[str] = None  # Model output characters after the blank (None = plate alphabet)
+    PLATE_RECOGNIZER_THREADS: int = 0
+    OCR_INT8: bool = False  # Load <model>.int8.onnx (see ocr_engines/quantization.py) when present
+    TRACK_MAX_AGE: float = 1.5  # Seconds without a detection before a plate track ends
+    TRACK_STABILITY_READINGS: int = 3  # Identical voted readings needed to finalize a track early
+    OCR_DENOISE_METHOD: str = "nlmeans"  # nlmeans, bilateral, median or none (per-camera override)
+    RECOGNITION_CACHE_TARGET_CONFIDENCE: float = 0.8  # Tracks below this keep getting OCR even if unchanged
+    RECOGNITION_CACHE_MAX_AGE: float = 10.0  # Seconds before an unchanged crop is read again
+    OCR_WORKER_PROCESSES: int = 0  # >0 runs OCR in that many worker processes (frames via shared memory)
+    ENGINE_RETRY_INTERVAL: float = 60.0  # Seconds before an engine that failed to load is tried again
     
     # Camera
     DEFAULT_STREAM_FPS: int = 25
     OCR_PROCESS_FPS: int = 5
     MOTION_THRESHOLD: int = 30
+    LIVE_VIEWER_QUEUE_SIZE: int = 2  # Pending frames per live viewer; older ones are dropped for slow clients
+    FFMPEG_BINARY: str = "ffmpeg"
+    PASSTHROUGH_FRAGMENT_MS: int = 0  # fMP4 fragment length; 0 = one fragment per GOP (each starts on a keyframe)
+    PASSTHROUGH_VIEWER_QUEUE_SIZE: int = 8  # Pending fragments per passthrough viewer
+    PASSTHROUGH_START_TIMEOUT: float = 15.0  # Seconds to wait for the camera's first init segment
+    PASSTHROUGH_IO_TIMEOUT: float = 10.0  # Seconds ffmpeg waits on a silent camera before the remuxer restarts
+    MOSAIC_MAX_FPS: float = 10.0  # Upper bound for the mosaic refresh rate a client may request
+    MOSAIC_MAX_TILES: int = 36  # Cameras per mosaic; further cameras are left out
+    MOSAIC_MAX_PIXELS: int = 3840 * 2160  # Canvas size limit; tiles shrink to stay within it
+    LIVE_ADAPT_INTERVAL: float = 2.0  # Seconds of send backlog measured before a viewer's variant changes
+    CAPTURE_BACKEND: str = "opencv"  # opencv or pyav (per-camera override)
+    CAPTURE_DECODE_THREADS: int = 0  # Decoder threads per camera (0 = library default)
+    CAPTURE_LOW_LATENCY: bool = True  # nobuffer/low_delay flags, RTSP over TCP
+    CAPTURE_DECODE_ON_DEMAND: bool = True  # Only retrieve grabbed frames when a pipeline is waiting for one
+    MAIN_STREAM_MOTION_HOLD: float = 3.0  # Sub-stream cameras: seconds the main stream stays decoded after motion
+    SUB_STREAM_MAIN_BACKEND: str = "pyav"  # Main-stream capture of sub-stream cameras (no override); idle, pyav decodes keyframes only, opencv every frame
+    MOTION_METHOD: str = "average"  # average, mog2 or diff
+    MOTION_PROCESS_WIDTH: int = 320  # Motion is detected on a copy downscaled to this width
+    DYNAMIC_ROI_ENABLED: bool = True  # OCR only the moving/tracked area (within the static ROI)
+    DYNAMIC_ROI_MARGIN: float = 0.2
+    DYNAMIC_ROI_MIN_SIZE: int = 320
     
     # Logging
     LOG_LEVEL: str = "INFO"
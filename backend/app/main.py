@@ -3,6 +3,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.database.mongo import connect_to_mongo, close_mongo_connection
 from app.utils.logger import logger
+from app.utils.ocr_engines.inference_scheduler import inference_scheduler
+from app.services.live_broadcaster import live_broadcaster
+from app.services.stream_passthrough import passthrough_manager
+from app.services.plate_writer import plate_writer
+from app.services.camera_service import camera_service
 from app.routes import cameras, plates, gates, sites, logs, settings, system
 import uvicorn
 
@@ -12,12 +17,18 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting EvoPlate Enterprise Edition...")
     await connect_to_mongo()
+    plate_writer.start()
     logger.info("EvoPlate system ready!")
     
     yield
     
     # Shutdown
     logger.info("Shutting down EvoPlate...")
+    await live_broadcaster.stop()
+    await passthrough_manager.stop()
+    await camera_service.stop_all_pipelines()  # Plates of open tracks go to the writer
+    inference_scheduler.stop()
+    await plate_writer.stop()  # Flush queued plates before the database closes
     await close_mongo_connection()
     logger.info("EvoPlate shutdown complete")
 
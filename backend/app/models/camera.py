@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Literal
+from typing import Optional, Literal, List
 from datetime import datetime
 import uuid
 
@@ -8,6 +8,9 @@ class Camera(BaseModel):
     name: str
     camera_type: Literal["rtsp", "onvif", "webcam"] = "rtsp"
     stream_url: Optional[str] = None  # RTSP URL or webcam index
+    sub_stream_url: Optional[str] = None  # Low-res stream for live view and motion; main stream only for OCR (captured with SUB_STREAM_MAIN_BACKEND)
+    sub_stream_resolution: str = "640x360"
+    passthrough_stream: Literal["sub", "main"] = "sub"  # Stream remuxed for fMP4 live view (sub falls back to main)
     webcam_index: Optional[int] = None  # For webcam: 0, 1, 2...
     onvif_host: Optional[str] = None
     onvif_port: Optional[int] = 2000
@@ -15,11 +18,18 @@ class Camera(BaseModel):
     onvif_password: Optional[str] = None
     fps: int = 25
     resolution: str = "1920x1080"
+    capture_backend: Optional[Literal["opencv", "pyav"]] = None  # None = CAPTURE_BACKEND
+    decode_mode: Literal["all", "keyframes"] = "all"  # keyframes: idle/overview cameras
+    decode_interval: int = 1  # Use every Nth decoded frame
+    decode_threads: Optional[int] = None  # None = CAPTURE_DECODE_THREADS
     gate_id: Optional[str] = None
     site_id: Optional[str] = None
     is_active: bool = True
     enable_ocr: bool = True
     enable_motion_detection: bool = True
+    motion_method: Optional[Literal["average", "mog2", "diff"]] = None  # None = MOTION_METHOD setting
+    motion_zones: Optional[List[List[List[int]]]] = None  # Polygons [[x, y], ...]; None = whole frame
+    denoise_method: Optional[Literal["nlmeans", "bilateral", "median", "none"]] = None  # None = OCR_DENOISE_METHOD
     roi_enabled: bool = True
     roi_coordinates: Optional[dict] = None  # {"x1": 0, "y1": 0, "x2": 100, "y2": 100}
     created_at: datetime = Field(default_factory=datetime.utcnow)
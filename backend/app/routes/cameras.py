@@ -1,10 +1,15 @@
 from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
-from typing import List
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 from app.models.camera import Camera
 from app.services.camera_service import camera_service
 from app.services.websocket_manager import ws_manager
-from app.services.plate_service import plate_service
+from app.services.live_broadcaster import live_broadcaster
+from app.services.stream_passthrough import passthrough_manager
+from app.utils.video_pipeline_live import DEFAULT_LIVE_VARIANT
+from app.services.plate_writer import plate_writer
 from app.models.plate import Plate
+from datetime import datetime, timezone
 import asyncio
 
 router = APIRouter(prefix="/api/cameras", tags=["cameras"])
@@ -19,6 +24,11 @@ async def get_cameras():
     """Get all cameras"""
     return await camera_service.get_all_cameras()
 
+@router.get("/mosaic/stats")
+async def get_mosaic_stats():
+    """Get statistics of the running mosaic streams"""
+    return live_broadcaster.get_mosaic_stats()
+
 @router.get("/{camera_id}", response_model=Camera)
 async def get_camera(camera_id: str):
     """Get camera by ID"""
@@ -50,21 +60,23 @@ async def start_camera(camera_id: str):
     if not camera:
         raise HTTPException(status_code=404, detail="Camera not found")
     
-    # OCR callback to save detected plates
-    async def ocr_callback(detection):
+    # OCR callback to save detected plates - runs in the OCR thread, so it only queues
+    # the plate; the plate writer stores batches from the event loop
+    def ocr_callback(detection):
+        # Capture time of the last frame showing the plate (the event itself may come seconds later)
+        detected_at = detection.get("frame_timestamp") or detection["timestamp"]
         plate = Plate(
             plate_number=detection["plate"],
             camera_id=detection["camera_id"],
+            gate_id=camera.gate_id,
+            site_id=camera.site_id,
             confidence=detection["confidence"],
-            ocr_engine=detection["engine"]
+            ocr_engine=detection["engine"],
+            detected_at=datetime.fromtimestamp(detected_at, tz=timezone.utc)
         )
-        await plate_service.create_plate_record(plate)
-    
-    # Start pipelines with callback
-    def callback_wrapper(detection):
-        asyncio.create_task(ocr_callback(detection))
+        plate_writer.submit(plate)
     
-    camera_service.start_camera_pipelines(camera, callback_wrapper)
+    camera_service.start_camera_pipelines(camera, ocr_callback)
     
     return {"message": f"Camera {camera_id} started"}
 
@@ -77,7 +89,36 @@ async def stop_camera(camera_id: str):
 @router.get("/{camera_id}/stats")
 async def get_camera_stats(camera_id: str):
     """Get camera pipeline statistics"""
-    return camera_service.get_pipeline_stats(camera_id)
+    stats = camera_service.get_pipeline_stats(camera_id)
+    stats["viewers"] = live_broadcaster.get_stats(camera_id)
+    stats["passthrough"] = passthrough_manager.get_stats(camera_id)
+    return stats
+
+async def _passthrough_url(camera_id: str) -> Optional[str]:
+    """Compressed stream to remux for fMP4 live view (webcams have none)"""
+    camera = await camera_service.get_camera(camera_id)
+    if not camera or camera.camera_type == "webcam":
+        return None
+    if camera.passthrough_stream == "sub" and camera.sub_stream_url:
+        return camera.sub_stream_url
+    return camera.stream_url
+
+@router.get("/{camera_id}/live.mp4")
+async def camera_live_mp4(camera_id: str):
+    """Live stream as fragmented MP4 (camera H.264 remuxed, not re-encoded)"""
+    stream_url = await _passthrough_url(camera_id)
+    if not stream_url:
+        raise HTTPException(status_code=404, detail="No stream for passthrough")
+    
+    # Start the remuxer before the 200 goes out, so failures are real HTTP errors
+    try:
+        remuxer, queue = await passthrough_manager.open(camera_id, stream_url)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Camera stream did not start in time")
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Passthrough unavailable: {e}")
+    
+    return StreamingResponse(passthrough_manager.iter_stream(camera_id, remuxer, queue), media_type="video/mp4")
 
 @router.post("/{camera_id}/ocr-engine")
 async def set_ocr_engine(camera_id: str, engine: dict):
@@ -92,23 +133,69 @@ async def set_ocr_engine(camera_id: str, engine: dict):
     
     return {"message": f"OCR engine set to {engine_name}"}
 
+# Registered before /ws/{camera_id}, which would otherwise match "mosaic"
+@router.websocket("/ws/mosaic")
+async def mosaic_websocket(websocket: WebSocket, cameras: Optional[str] = None, columns: int = 0,
+                           tile_width: int = 320, fps: float = 2.0, quality: int = 60):
+    """WebSocket endpoint for a multi-camera mosaic (?cameras=id1,id2&columns=4&tile_width=320&fps=2)"""
+    await websocket.accept()
+    camera_ids = [camera_id for camera_id in cameras.split(",") if camera_id] if cameras else None
+    
+    try:
+        await live_broadcaster.watch_mosaic(websocket, camera_ids, columns, tile_width, fps, quality)
+    
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"WebSocket error: {e}")
+
+@router.websocket("/ws/{camera_id}/fmp4")
+async def camera_fmp4_websocket(websocket: WebSocket, camera_id: str):
+    """WebSocket endpoint for fMP4 passthrough: {"type": "init", "mime"} text, then init segment and fragments"""
+    await websocket.accept()
+    stream_url = await _passthrough_url(camera_id)
+    if not stream_url:
+        await websocket.close(code=1008)
+        return
+    
+    try:
+        remuxer, queue = await passthrough_manager.open(camera_id, stream_url)
+    except asyncio.TimeoutError:
+        await websocket.close(code=1011)
+        return
+    
+    try:
+        await websocket.send_json({"type": "init", "mime": remuxer.mime})
+        await websocket.send_bytes(remuxer.init_segment)
+        while True:
+            fragment = await queue.get()
+            if fragment is None:
+                # Stream restarted; the client reconnects for the new init segment
+                await websocket.close(code=1012)
+                break
+            await websocket.send_bytes(fragment)
+            remuxer.bytes_out += len(fragment)
+    
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"WebSocket error: {e}")
+    finally:
+        await passthrough_manager.close(camera_id, remuxer, queue)
+
 @router.websocket("/ws/{camera_id}")
-async def camera_websocket(websocket: WebSocket, camera_id: str):
-    """WebSocket endpoint for live camera stream"""
+async def camera_websocket(websocket: WebSocket, camera_id: str,
+                           variant: str = DEFAULT_LIVE_VARIANT, adaptive: bool = True):
+    """WebSocket endpoint for live camera stream (?variant=hd|sd|grid|thumb&adaptive=true)"""
     await ws_manager.connect_camera(websocket, camera_id)
     
     try:
-        while True:
-            # Get frame from live pipeline
-            frame_data = camera_service.get_live_frame(camera_id)
-            
-            if frame_data:
-                await websocket.send_bytes(frame_data)
-            
-            await asyncio.sleep(0.033)  # ~30 FPS
+        # New frames are pushed by the camera's broadcaster (no polling)
+        await live_broadcaster.watch(websocket, camera_id, variant, adaptive)
     
     except WebSocketDisconnect:
-        ws_manager.disconnect_camera(websocket, camera_id)
+        pass
     except Exception as e:
         print(f"WebSocket error: {e}")
+    finally:
         ws_manager.disconnect_camera(websocket, camera_id)
\ No newline at end of file
@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from app.utils.ocr_engines.ocr_manager import ocr_manager
+from app.utils.ocr_engines.inference_scheduler import inference_scheduler
 from app.services.camera_service import camera_service
 
 router = APIRouter(prefix="/api/settings", tags=["settings"])
@@ -17,8 +18,10 @@ async def get_available_ocr_engines():
             {"id": "paddle", "name": "PaddleOCR", "description": "Fast and accurate for Asian languages"},
             {"id": "easy", "name": "EasyOCR", "description": "Good Turkish character support"},
             {"id": "tesseract", "name": "Tesseract", "description": "Open source OCR engine"},
+            {"id": "crnn", "name": "CRNN", "description": "Dedicated plate-text recognizer (ONNX)"},
             {"id": "yolo", "name": "YOLO", "description": "Plate detection only"},
-            {"id": "hybrid", "name": "Hybrid", "description": "Best result from all engines"}
+            {"id": "hybrid", "name": "Hybrid", "description": "Best result from all engines"},
+            {"id": "cascade", "name": "Cascade", "description": "Cheapest engine first, escalates only when needed"}
         ]
     }
 
@@ -43,5 +46,6 @@ async def get_system_info():
         "version": "1.0.0",
         "name": "EvoPlate Enterprise Edition",
         "active_cameras": len(camera_service.active_pipelines),
-        "ocr_engine": ocr_manager.get_current_engine()
+        "ocr_engine": ocr_manager.get_current_engine(),
+        "ocr_scheduler": inference_scheduler.get_stats()
     }
\ No newline at end of file
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from app.services.websocket_manager import ws_manager
+from app.services.plate_writer import plate_writer
 import asyncio
 
 router = APIRouter(prefix="/api/system", tags=["system"])
@@ -14,6 +15,11 @@ async def ping():
     """Ping endpoint"""
     return {"pong": True}
 
+@router.get("/plate-writer")
+async def plate_writer_stats():
+    """Plate persistence queue depth and batch statistics"""
+    return plate_writer.get_stats()
+
 @router.websocket("/ws/events")
 async def events_websocket(websocket: WebSocket):
     """WebSocket endpoint for system events"""
@@ -1,15 +1,18 @@
 from typing import List, Optional, Dict
+from app.config import settings
 from app.database.mongo import get_database
 from app.models.camera import Camera
 from app.utils.video_pipeline_live import LiveVideoPipeline
 from app.utils.video_pipeline_ocr import OCRVideoPipeline
+from app.utils.frame_source import FrameSource
 import asyncio
 
 class CameraService:
     """Service for managing cameras and video pipelines"""
     
     def __init__(self):
-        # Active pipelines: {camera_id: {"live": LiveVideoPipeline, "ocr": OCRVideoPipeline}}
+        # Active pipelines: {camera_id: {"source": FrameSource, "sub_source": FrameSource or None,
+        #                                "live": LiveVideoPipeline, "ocr": OCRVideoPipeline}}
         self.active_pipelines: Dict[str, Dict] = {}
     
     async def create_camera(self, camera: Camera) -> Camera:
@@ -80,11 +83,42 @@ class CameraService:
             print(f"No stream source for camera {camera.id}")
             return
         
+        # Sub-stream cameras idle their main stream on keyframes only, which needs pyav
+        has_sub_stream = bool(camera.sub_stream_url) and camera.camera_type != "webcam"
+        main_backend = camera.capture_backend
+        if has_sub_stream:
+            main_backend = main_backend or settings.SUB_STREAM_MAIN_BACKEND
+            if main_backend != "pyav":
+                print(f"[Camera {camera.id}] {main_backend} capture decodes the idle main stream in full (pyav skips it)")
+        
+        # Single capture/decode shared by both pipelines
+        frame_source = FrameSource(
+            camera_id=camera.id,
+            stream_source=stream_source,
+            resolution=self._parse_resolution(camera.resolution),
+            backend=main_backend,
+            decode_mode=camera.decode_mode,
+            decode_interval=camera.decode_interval,
+            decode_threads=camera.decode_threads
+        )
+        
+        # Sub-stream: live view and motion never touch the main stream
+        sub_source = None
+        if has_sub_stream:
+            sub_source = FrameSource(
+                camera_id=camera.id,
+                stream_source=camera.sub_stream_url,
+                resolution=self._parse_resolution(camera.sub_stream_resolution),
+                backend=camera.capture_backend,
+                decode_threads=camera.decode_threads
+            )
+        
         # Start Pipeline A (Live streaming)
         live_pipeline = LiveVideoPipeline(
             camera_id=camera.id,
-            stream_source=stream_source,
-            fps=camera.fps
+            stream_source=camera.sub_stream_url if sub_source else stream_source,
+            fps=camera.fps,
+            frame_source=sub_source or frame_source
         )
         live_pipeline.start()
         
@@ -98,11 +132,18 @@ class CameraService:
                 enable_motion_detection=camera.enable_motion_detection,
                 enable_roi=camera.roi_enabled,
                 roi_coords=camera.roi_coordinates,
-                ocr_callback=ocr_callback
+                motion_zones=camera.motion_zones,
+                motion_method=camera.motion_method,
+                denoise_method=camera.denoise_method,
+                ocr_callback=ocr_callback,
+                frame_source=frame_source,
+                motion_source=sub_source
             )
             ocr_pipeline.start()
         
         self.active_pipelines[camera.id] = {
+            "source": frame_source,
+            "sub_source": sub_source,
             "live": live_pipeline,
             "ocr": ocr_pipeline
         }
@@ -114,16 +155,39 @@ class CameraService:
         if camera_id not in self.active_pipelines:
             return
         
-        pipelines = self.active_pipelines[camera_id]
+        pipelines = self.active_pipelines.pop(camera_id)
         
+        # Joining threads and flushing the tracker (whose events go to the plate
+        # writer) blocks, so keep it off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self._stop_pipelines, pipelines)
+        print(f"Stopped pipelines for camera {camera_id}")
+    
+    async def stop_all_pipelines(self):
+        """Stop every camera's pipelines (shutdown)"""
+        await asyncio.gather(*(self.stop_camera_pipelines(camera_id)
+                               for camera_id in list(self.active_pipelines)))
+    
+    @staticmethod
+    def _stop_pipelines(pipelines: Dict):
         if pipelines["live"]:
             pipelines["live"].stop()
         
         if pipelines["ocr"]:
             pipelines["ocr"].stop()
         
-        del self.active_pipelines[camera_id]
-        print(f"Stopped pipelines for camera {camera_id}")
+        # Normally already stopped by the last unsubscribe
+        pipelines["source"].stop()
+        if pipelines["sub_source"]:
+            pipelines["sub_source"].stop()
+    
+    @staticmethod
+    def _parse_resolution(resolution: str) -> tuple:
+        """Parse "1920x1080" into (1920, 1080)"""
+        try:
+            width, height = resolution.lower().split("x")
+            return int(width), int(height)
+        except (AttributeError, ValueError):
+            return 1920, 1080
     
     def get_live_frame(self, camera_id: str) -> Optional[bytes]:
         """Get current live frame as JPEG"""
@@ -143,7 +207,9 @@ class CameraService:
         
         pipelines = self.active_pipelines[camera_id]
         
-        stats = {}
+        stats = {"capture": pipelines["source"].get_stats()}
+        if pipelines["sub_source"]:
+            stats["sub_capture"] = pipelines["sub_source"].get_stats()
         if pipelines["live"]:
             stats["live"] = pipelines["live"].get_stats()
         
@@ -0,0 +1,494 @@
+from fastapi import WebSocket
+from typing import Dict, Optional, List, Tuple
+import asyncio
+import json
+import math
+import time
+import cv2
+import numpy as np
+from app.config import settings
+from app.services.camera_service import camera_service
+from app.utils.video_pipeline_live import LIVE_VARIANTS, DEFAULT_LIVE_VARIANT
+
+VARIANT_ORDER = tuple(LIVE_VARIANTS)  # Best first
+
+class ViewerStream:
+    """One live viewer: bounded queue of pending frames drained by its own sender task
+    
+    The viewer asks for a variant (size/quality/fps); when adaptive, it is moved to
+    smaller variants while its send backlog grows and back up once it keeps up.
+    """
+    
+    def __init__(self, websocket: WebSocket, queue_size: int,
+                 variant: str = DEFAULT_LIVE_VARIANT, adaptive: bool = True):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self.task: Optional[asyncio.Task] = None
+        self.sent_frames = 0
+        self.dropped_frames = 0  # Stale frames replaced before this viewer could take them
+        self.variant_changes = 0
+        self.last_offer_time = 0.0
+        self.pending_text: Optional[str] = None  # Sent before the next frame (mosaic layout)
+        
+        # Backlog measurement window
+        self.window_start = time.time()
+        self.window_offers = 0
+        self.window_late = 0  # Offers that found the previous frame still unsent
+        self.clean_windows = 0
+        
+        self.set_variant(variant, adaptive)
+    
+    def set_variant(self, variant: str, adaptive: Optional[bool] = None):
+        """Requested variant (the best one adaptation may use)"""
+        self.max_variant = variant if variant in LIVE_VARIANTS else DEFAULT_LIVE_VARIANT
+        self.variant = self.max_variant
+        if adaptive is not None:
+            self.adaptive = adaptive
+    
+    def due(self, now: float) -> bool:
+        """Whether the variant's frame rate allows another frame"""
+        return now - self.last_offer_time >= 0.9 / LIVE_VARIANTS[self.variant][2]
+    
+    def offer(self, frame_data: bytes, now: float):
+        """Queue a frame, dropping the oldest pending one for a slow viewer"""
+        self.last_offer_time = now
+        self.window_offers += 1
+        if not self.queue.empty():
+            self.window_late += 1
+        
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped_frames += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(frame_data)
+        
+        if self.adaptive and now - self.window_start >= settings.LIVE_ADAPT_INTERVAL:
+            self._adapt(now)
+    
+    def _adapt(self, now: float):
+        """Step one variant down on a growing backlog, up after two clean windows"""
+        index = VARIANT_ORDER.index(self.variant)
+        late_ratio = self.window_late / max(1, self.window_offers)
+        
+        if late_ratio > 0.5 and index < len(VARIANT_ORDER) - 1:
+            self.variant = VARIANT_ORDER[index + 1]
+            self.variant_changes += 1
+            self.clean_windows = 0
+        elif late_ratio == 0:
+            self.clean_windows += 1
+            if self.clean_windows >= 2 and index > VARIANT_ORDER.index(self.max_variant):
+                self.variant = VARIANT_ORDER[index - 1]
+                self.variant_changes += 1
+                self.clean_windows = 0
+        else:
+            self.clean_windows = 0
+        
+        self.window_start = now
+        self.window_offers = 0
+        self.window_late = 0
+    
+    async def run(self):
+        """Send queued frames until the connection fails"""
+        try:
+            while True:
+                frame_data = await self.queue.get()
+                if self.pending_text is not None:
+                    text, self.pending_text = self.pending_text, None
+                    await self.websocket.send_text(text)
+                await self.websocket.send_bytes(frame_data)
+                self.sent_frames += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error sending frame: {e}")
+
+class Broadcast:
+    """Viewers of one stream and the task producing its frames"""
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.viewers: Dict[WebSocket, ViewerStream] = {}
+        self.broadcast_frames = 0
+        self.task = loop.create_task(self._run())
+    
+    async def _run(self):
+        raise NotImplementedError
+    
+    def add_viewer(self, websocket: WebSocket, variant: str = DEFAULT_LIVE_VARIANT,
+                   adaptive: bool = True) -> ViewerStream:
+        viewer = ViewerStream(websocket, settings.LIVE_VIEWER_QUEUE_SIZE, variant, adaptive)
+        viewer.task = self.loop.create_task(viewer.run())
+        self.viewers[websocket] = viewer
+        return viewer
+    
+    async def remove_viewer(self, websocket: WebSocket):
+        viewer = self.viewers.pop(websocket, None)
+        if viewer and viewer.task:
+            viewer.task.cancel()
+            await asyncio.gather(viewer.task, return_exceptions=True)
+    
+    async def close(self):
+        tasks = [self.task] + [viewer.task for viewer in self.viewers.values()]
+        self.viewers.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def get_stats(self) -> Dict:
+        return {
+            "viewers": len(self.viewers),
+            "broadcast_frames": self.broadcast_frames,
+            "sent_frames": sum(viewer.sent_frames for viewer in self.viewers.values()),
+            "dropped_frames": sum(viewer.dropped_frames for viewer in self.viewers.values()),
+            "max_queue_depth": max((viewer.queue.qsize() for viewer in self.viewers.values()), default=0)
+        }
+
+class CameraBroadcast(Broadcast):
+    """Pushes each new live frame of one camera to all of its viewers
+    
+    The live pipeline thread only wakes the broadcast task (call_soon_threadsafe);
+    the frame is then encoded once per variant in use, off the event loop, and
+    queued for every viewer whose frame rate allows it.
+    """
+    
+    def __init__(self, camera_id: str, loop: asyncio.AbstractEventLoop):
+        self.camera_id = camera_id
+        self.wakeup = asyncio.Event()
+        self.live_pipeline = None  # Pipeline our frame listener is attached to
+        self.last_seq = 0
+        super().__init__(loop)
+    
+    def _on_frame(self, seq: int):
+        """Frame listener - called from the live pipeline thread"""
+        try:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+        except RuntimeError:
+            pass  # Event loop already closed
+    
+    def _attach(self):
+        """Follow the camera's current live pipeline (cameras are started/stopped independently)"""
+        pipelines = camera_service.active_pipelines.get(self.camera_id)
+        live_pipeline = pipelines.get("live") if pipelines else None
+        if live_pipeline is self.live_pipeline:
+            return
+        
+        if self.live_pipeline:
+            self.live_pipeline.remove_frame_listener(self._on_frame)
+        self.live_pipeline = live_pipeline
+        self.last_seq = 0
+        if live_pipeline:
+            live_pipeline.add_frame_listener(self._on_frame)
+    
+    async def _run(self):
+        try:
+            while True:
+                self._attach()
+                try:
+                    # Timeout only to notice pipelines being started or stopped
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeup.clear()
+                
+                if not self.live_pipeline or not self.viewers:
+                    continue
+                
+                video_frame = self.live_pipeline.current_video_frame
+                if video_frame is None or video_frame.seq <= self.last_seq:
+                    continue
+                
+                now = time.time()
+                due = [viewer for viewer in self.viewers.values() if viewer.due(now)]
+                if not due:
+                    continue
+                self.last_seq = video_frame.seq
+                
+                # JPEG encodes in worker threads, once per variant for all its viewers
+                variants = sorted({viewer.variant for viewer in due})
+                packets = await asyncio.gather(*(
+                    self.loop.run_in_executor(None, self.live_pipeline.get_frame_packet, 0, variant)
+                    for variant in variants
+                ))
+                packets = dict(zip(variants, packets))
+                
+                self.broadcast_frames += 1
+                for viewer in due:
+                    packet = packets.get(viewer.variant)
+                    if packet:
+                        viewer.offer(packet[1], now)
+        
+        except asyncio.CancelledError:
+            pass
+        finally:
+            if self.live_pipeline:
+                self.live_pipeline.remove_frame_listener(self._on_frame)
+                self.live_pipeline = None
+    
+    def add_viewer(self, websocket: WebSocket, variant: str = DEFAULT_LIVE_VARIANT,
+                   adaptive: bool = True) -> ViewerStream:
+        viewer = super().add_viewer(websocket, variant, adaptive)
+        self.wakeup.set()  # Send the current frame right away
+        return viewer
+    
+    def get_stats(self) -> Dict:
+        stats = super().get_stats()
+        stats.update({
+            "frame_seq": self.last_seq,
+            "variants": {
+                variant: sum(1 for viewer in self.viewers.values() if viewer.variant == variant)
+                for variant in VARIANT_ORDER
+            },
+            "variant_changes": sum(viewer.variant_changes for viewer in self.viewers.values())
+        })
+        return stats
+
+class MosaicBroadcast(Broadcast):
+    """Tiles the live frames of several cameras into one image, encoded once per tick
+    
+    Tiles are only rescaled when their camera has a new frame, and nothing is
+    encoded or sent while no camera changed.
+    """
+    
+    def __init__(self, camera_ids: Optional[List[str]], columns: int, tile_width: int,
+                 fps: float, quality: int, loop: asyncio.AbstractEventLoop):
+        self.camera_ids = camera_ids  # None = every running camera
+        self.columns = columns  # 0 = square-ish grid
+        self.tile_width = tile_width  # Requested; tile_size shrinks for large grids (MOSAIC_MAX_PIXELS)
+        self.tile_size = self._tile_size(tile_width)
+        self.interval = 1.0 / fps
+        self.quality = quality
+        self.layout: Optional[Tuple] = None
+        self.force_redraw = False  # Set on the loop, consumed by _compose in the executor
+        self.canvas: Optional[np.ndarray] = None
+        self.tile_seqs: Dict[int, Tuple[str, int]] = {}  # Tile index -> (camera_id, seq) drawn
+        super().__init__(loop)
+    
+    @staticmethod
+    def _tile_size(tile_width: int) -> Tuple[int, int]:
+        """16:9 tile with even dimensions"""
+        tile_width = max(2, tile_width // 2 * 2)
+        return tile_width, max(2, int(tile_width * 9 / 16) // 2 * 2)
+    
+    def _cameras(self) -> List[str]:
+        if self.camera_ids is not None:
+            return self.camera_ids
+        return sorted(camera_service.active_pipelines)[:settings.MOSAIC_MAX_TILES]
+    
+    def _compose(self, cameras: List[str]) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        Redraw changed tiles and encode (worker thread)
+        
+        Returns:
+            (JPEG or None when nothing changed, layout message when the layout was redrawn)
+        """
+        columns = min(self.columns, len(cameras)) or max(1, math.ceil(math.sqrt(len(cameras))))
+        rows = max(1, math.ceil(len(cameras) / columns))
+        layout = (tuple(cameras), columns)
+        
+        changed = False
+        layout_message = None
+        if layout != self.layout or self.force_redraw:
+            self.force_redraw = False
+            # Shrink tiles so the whole canvas fits MOSAIC_MAX_PIXELS
+            tile_width, tile_height = self._tile_size(self.tile_width)
+            scale = math.sqrt(settings.MOSAIC_MAX_PIXELS / (rows * columns * tile_width * tile_height))
+            self.tile_size = self._tile_size(int(tile_width * min(1.0, scale)))
+            self.layout = layout
+            layout_message = self.layout_message()
+            self.canvas = np.zeros((rows * self.tile_size[1], columns * self.tile_size[0], 3), dtype=np.uint8)
+            self.tile_seqs = {}
+            changed = True
+        tile_width, tile_height = self.tile_size
+        
+        for index, camera_id in enumerate(cameras):
+            pipelines = camera_service.active_pipelines.get(camera_id)
+            live_pipeline = pipelines.get("live") if pipelines else None
+            video_frame = live_pipeline.current_video_frame if live_pipeline else None
+            seq = video_frame.seq if video_frame is not None else -1
+            if self.tile_seqs.get(index) == (camera_id, seq):
+                continue
+            
+            self.tile_seqs[index] = (camera_id, seq)
+            changed = True
+            x = (index % columns) * tile_width
+            y = (index // columns) * tile_height
+            tile = self.canvas[y:y + tile_height, x:x + tile_width]
+            if video_frame is None:
+                tile[:] = 0
+                cv2.putText(tile, "offline", (8, tile_height // 2), cv2.FONT_HERSHEY_SIMPLEX,
+                            0.5, (128, 128, 128), 1)
+            else:
+                tile[:] = cv2.resize(video_frame.image, self.tile_size, interpolation=cv2.INTER_AREA)
+        
+        if not changed:
+            return None, None
+        
+        ret, buffer = cv2.imencode('.jpg', self.canvas, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return (buffer.tobytes(), layout_message) if ret else (None, None)
+    
+    def layout_message(self) -> Optional[str]:
+        layout = self.layout
+        if layout is None:
+            return None
+        cameras, columns = layout
+        return json.dumps({
+            "type": "layout",
+            "cameras": list(cameras),  # Row-major tile order
+            "columns": columns,
+            "tile_width": self.tile_size[0],
+            "tile_height": self.tile_size[1]
+        })
+    
+    def add_viewer(self, websocket: WebSocket, variant: str = DEFAULT_LIVE_VARIANT,
+                   adaptive: bool = False) -> ViewerStream:
+        viewer = super().add_viewer(websocket, variant, adaptive=False)
+        self.force_redraw = True  # Redraw everything so the new viewer gets a full frame and the layout
+        return viewer
+    
+    async def _run(self):
+        try:
+            while True:
+                start_time = time.time()
+                
+                if self.viewers:
+                    try:
+                        frame_data, new_layout = await self.loop.run_in_executor(None, self._compose, self._cameras())
+                    except Exception as e:
+                        # One bad frame must not end the mosaic for every viewer
+                        print(f"Error composing mosaic: {e}")
+                        frame_data, new_layout = None, None
+                    if frame_data is not None:
+                        self.broadcast_frames += 1
+                        now = time.time()
+                        for viewer in list(self.viewers.values()):
+                            if new_layout:
+                                viewer.pending_text = new_layout
+                            viewer.offer(frame_data, now)
+                
+                await asyncio.sleep(max(0.0, self.interval - (time.time() - start_time)))
+        
+        except asyncio.CancelledError:
+            pass
+    
+    def get_stats(self) -> Dict:
+        stats = super().get_stats()
+        layout = self.layout
+        stats["cameras"] = list(layout[0]) if layout else []
+        return stats
+
+class LiveBroadcaster:
+    """Per-camera push broadcast of live frames to websocket viewers"""
+    
+    def __init__(self):
+        # {camera_id: CameraBroadcast}
+        self.broadcasts: Dict[str, CameraBroadcast] = {}
+        # {(camera_ids, columns, tile_width, fps, quality): MosaicBroadcast} - same request, same stream
+        self.mosaics: Dict[Tuple, MosaicBroadcast] = {}
+    
+    async def watch(self, websocket: WebSocket, camera_id: str,
+                    variant: str = DEFAULT_LIVE_VARIANT, adaptive: bool = True):
+        """
+        Stream a camera to an accepted websocket until the client disconnects
+        
+        The client may switch variant later by sending {"variant": ..., "adaptive": ...}.
+        
+        Args:
+            websocket: Accepted viewer connection
+            camera_id: Camera to stream
+            variant: Requested LIVE_VARIANTS name (hd, sd, grid, thumb)
+            adaptive: Step down to smaller variants while the client falls behind
+        """
+        broadcast = self.broadcasts.get(camera_id)
+        if broadcast is None:
+            broadcast = CameraBroadcast(camera_id, asyncio.get_running_loop())
+            self.broadcasts[camera_id] = broadcast
+        
+        viewer = broadcast.add_viewer(websocket, variant, adaptive)
+        await self._serve(websocket, viewer, broadcast, self.broadcasts, camera_id)
+    
+    async def watch_mosaic(self, websocket: WebSocket, camera_ids: Optional[List[str]] = None,
+                           columns: int = 0, tile_width: int = 320, fps: float = 2.0, quality: int = 60):
+        """
+        Stream a tiled mosaic of several cameras to an accepted websocket
+        
+        A JSON layout message ({"type": "layout", "cameras", "columns", "tile_width",
+        "tile_height"}) precedes the first frame and every layout change.
+        
+        Args:
+            websocket: Accepted viewer connection
+            camera_ids: Cameras in tile order (None = every running camera)
+            columns: Tiles per row (0 = automatic)
+            tile_width: Tile width in pixels (16:9 tiles)
+            fps: Mosaic refresh rate
+            quality: JPEG quality
+        """
+        tile_width = min(max(tile_width, 64), 1280)
+        fps = min(max(fps, 0.2), settings.MOSAIC_MAX_FPS)
+        quality = min(max(quality, 10), 95)
+        columns = max(columns, 0)
+        if camera_ids:
+            # Each camera once, at most MOSAIC_MAX_TILES (canvas memory grows with the grid)
+            camera_ids = list(dict.fromkeys(camera_ids))[:settings.MOSAIC_MAX_TILES]
+        key = (tuple(camera_ids) if camera_ids else None, columns, tile_width, fps, quality)
+        
+        mosaic = self.mosaics.get(key)
+        if mosaic is None:
+            mosaic = MosaicBroadcast(camera_ids or None, columns, tile_width, fps, quality,
+                                     asyncio.get_running_loop())
+            self.mosaics[key] = mosaic
+        
+        viewer = mosaic.add_viewer(websocket)
+        await self._serve(websocket, viewer, mosaic, self.mosaics, key)
+    
+    async def _serve(self, websocket: WebSocket, viewer: ViewerStream, broadcast: Broadcast,
+                     registry: Dict, key):
+        try:
+            receiver = asyncio.ensure_future(self._receive_until_closed(websocket, viewer))
+            try:
+                # Ends on client disconnect (receiver) or send failure (sender)
+                await asyncio.wait({receiver, viewer.task}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                receiver.cancel()
+        finally:
+            await broadcast.remove_viewer(websocket)
+            if not broadcast.viewers and registry.get(key) is broadcast:
+                del registry[key]
+                await broadcast.close()
+    
+    @staticmethod
+    async def _receive_until_closed(websocket: WebSocket, viewer: ViewerStream):
+        """Apply client variant requests; returns when the client disconnects"""
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                if message.get("text"):
+                    try:
+                        request = json.loads(message["text"])
+                        if "variant" in request:
+                            viewer.set_variant(request["variant"], request.get("adaptive"))
+                    except (ValueError, TypeError, AttributeError):
+                        pass  # Not a variant request
+        except Exception:
+            return
+    
+    def get_stats(self, camera_id: str) -> Dict:
+        broadcast = self.broadcasts.get(camera_id)
+        return broadcast.get_stats() if broadcast else {"viewers": 0}
+    
+    def get_mosaic_stats(self) -> List[Dict]:
+        return [mosaic.get_stats() for mosaic in self.mosaics.values()]
+    
+    async def stop(self):
+        """Stop all broadcasts (shutdown)"""
+        broadcasts = list(self.broadcasts.values()) + list(self.mosaics.values())
+        self.broadcasts.clear()
+        self.mosaics.clear()
+        for broadcast in broadcasts:
+            await broadcast.close()
+
+# Global live broadcaster
+live_broadcaster = LiveBroadcaster()
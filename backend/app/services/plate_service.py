@@ -1,9 +1,13 @@
 from typing import List, Optional
 from datetime import datetime
+import asyncio
+from pymongo.errors import BulkWriteError
 from app.database.mongo import get_database
 from app.models.plate import Plate
 from app.services.websocket_manager import ws_manager
 
+DUPLICATE_KEY_ERROR = 11000
+
 class PlateService:
     """Service for managing detected plates"""
     
@@ -16,14 +20,46 @@ class PlateService:
         plate_dict["_id"] = str(result.inserted_id)
         
         # Broadcast event
-        await ws_manager.broadcast_event("plate_detected", {
+        await ws_manager.broadcast_event("plate_detected", self._event_payload(plate))
+        
+        return Plate(**plate_dict)
+    
+    async def create_plate_records(self, plates: List[Plate]) -> List[Plate]:
+        """
+        Store several plate detections with one round trip (no events)
+        
+        The plate id is the document _id, so retrying a batch never stores a
+        plate twice: duplicates of already stored plates count as written.
+        
+        Returns:
+            Plates that failed to store (to retry)
+        """
+        db = await get_database()
+        documents = [dict(plate.model_dump(), _id=plate.id) for plate in plates]
+        try:
+            await db.plates.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            failed = {error["index"] for error in e.details.get("writeErrors", [])
+                      if error.get("code") != DUPLICATE_KEY_ERROR}
+            return [plate for index, plate in enumerate(plates) if index in failed]
+        return []
+    
+    async def broadcast_plates(self, plates: List[Plate]):
+        """Send a plate_detected event per plate"""
+        await asyncio.gather(*(
+            ws_manager.broadcast_event("plate_detected", self._event_payload(plate))
+            for plate in plates
+        ))
+    
+    @staticmethod
+    def _event_payload(plate: Plate) -> dict:
+        """Data of a plate_detected websocket event"""
+        return {
             "plate": plate.plate_number,
             "camera_id": plate.camera_id,
             "confidence": plate.confidence,
             "timestamp": plate.detected_at.isoformat()
-        })
-        
-        return Plate(**plate_dict)
+        }
     
     async def get_plate(self, plate_id: str) -> Optional[Plate]:
         """Get plate by ID"""
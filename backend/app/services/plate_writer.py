@@ -0,0 +1,172 @@
+from typing import List, Optional, Dict, Set
+import asyncio
+import queue
+import time
+from app.config import settings
+from app.models.plate import Plate
+from app.services.plate_service import plate_service
+
+class PlateWriter:
+    """Batched, non-blocking persistence of plate detections
+    
+    OCR threads submit plates to a bounded thread-safe queue; an async task on
+    the server event loop drains it and stores them with one insert_many per
+    batch (PLATE_WRITER_BATCH_SIZE plates or PLATE_WRITER_FLUSH_MS, whichever
+    comes first). A full queue blocks the submitting thread briefly, then drops.
+    """
+    
+    def __init__(self):
+        self.queue: queue.Queue = queue.Queue(maxsize=settings.PLATE_WRITER_QUEUE_SIZE)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+        self.stopping = False
+        self._broadcasts: Set[asyncio.Task] = set()
+        
+        # Statistics
+        self.submitted = 0
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0  # Queue full (submit) or batch failed after retries
+        self.max_queue_depth = 0
+        self.last_batch_size = 0
+        self.last_write_ms = 0.0
+    
+    def start(self):
+        """Start the writer task (call from the event loop, after MongoDB is connected)"""
+        if self.task:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+        self.stopping = False
+        self.task = self.loop.create_task(self._run())
+        print("[Plate Writer] Started")
+    
+    async def stop(self):
+        """Write everything still queued, then stop"""
+        if not self.task:
+            return
+        self.stopping = True
+        self.wakeup.set()
+        await asyncio.gather(self.task, return_exceptions=True)
+        self.task = None
+        await asyncio.gather(*self._broadcasts, return_exceptions=True)
+        print("[Plate Writer] Stopped")
+    
+    def submit(self, plate: Plate) -> bool:
+        """
+        Queue a plate for storage (thread-safe, for OCR threads; never blocks on the event loop)
+        
+        Returns:
+            False if the queue stayed full for PLATE_WRITER_PUT_TIMEOUT and the plate was dropped
+        """
+        try:
+            if self._on_loop():
+                # Waiting here would stall the loop that drains the queue
+                self.queue.put_nowait(plate)
+            else:
+                # Backpressure: a producer outpacing the database waits here
+                self.queue.put(plate, timeout=settings.PLATE_WRITER_PUT_TIMEOUT)
+        except queue.Full:
+            self.dropped += 1
+            print(f"[Plate Writer] Queue full, dropped {plate.plate_number}")
+            return False
+        
+        self.submitted += 1
+        depth = self.queue.qsize()
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        
+        # Full batch ready: write now instead of at the end of the flush window
+        if depth >= settings.PLATE_WRITER_BATCH_SIZE and self.loop:
+            try:
+                self.loop.call_soon_threadsafe(self.wakeup.set)
+            except RuntimeError:
+                pass  # Event loop already closed
+        return True
+    
+    def _on_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+    
+    def _drain(self) -> List[Plate]:
+        batch = []
+        while len(batch) < settings.PLATE_WRITER_BATCH_SIZE:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=settings.PLATE_WRITER_FLUSH_MS / 1000.0)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            
+            # Keep writing while full batches are waiting (everything when stopping)
+            while not self.queue.empty():
+                await self._write(self._drain())
+                if not self.stopping and self.queue.qsize() < settings.PLATE_WRITER_BATCH_SIZE:
+                    break
+            
+            if self.stopping:
+                return
+    
+    async def _write(self, batch: List[Plate]):
+        """Store one batch (retrying the plates that failed), then announce it"""
+        if not batch:
+            return
+        
+        pending = batch
+        start_time = time.time()
+        for attempt in range(settings.PLATE_WRITER_RETRIES + 1):
+            try:
+                pending = await plate_service.create_plate_records(pending)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Nothing known about what was stored; ids make the retry idempotent
+                print(f"[Plate Writer] Insert of {len(pending)} plates failed (attempt {attempt + 1}): {e}")
+            else:
+                if not pending:
+                    break
+                print(f"[Plate Writer] {len(pending)} plates not stored (attempt {attempt + 1})")
+            await asyncio.sleep(0.5 * (attempt + 1))
+        self.last_write_ms = (time.time() - start_time) * 1000
+        
+        failed = {plate.id for plate in pending}
+        stored = [plate for plate in batch if plate.id not in failed]
+        self.dropped += len(pending)
+        if not stored:
+            return
+        
+        self.written += len(stored)
+        self.batches += 1
+        self.last_batch_size = len(stored)
+        
+        # Websocket events must not hold up the next batch
+        task = asyncio.ensure_future(plate_service.broadcast_plates(stored))
+        self._broadcasts.add(task)
+        task.add_done_callback(self._broadcasts.discard)
+    
+    def get_stats(self) -> Dict:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "queue_capacity": self.queue.maxsize,
+            "submitted": self.submitted,
+            "written": self.written,
+            "batches": self.batches,
+            "avg_batch_size": round(self.written / self.batches, 1) if self.batches else 0,
+            "last_batch_size": self.last_batch_size,
+            "last_write_ms": round(self.last_write_ms, 1),
+            "dropped": self.dropped,
+            "is_running": self.task is not None
+        }
+
+# Global plate writer
+plate_writer = PlateWriter()
@@ -0,0 +1,257 @@
+from typing import Dict, Optional, List, Tuple, AsyncIterator
+import asyncio
+import struct
+from app.config import settings
+
+class StreamRemuxer:
+    """Remuxes one camera stream into fragmented MP4 (ffmpeg -c copy) for all of its viewers
+    
+    Nothing is decoded or re-encoded: ffmpeg only repackages the camera's H.264
+    into an init segment (ftyp+moov) and moof+mdat fragments that browsers play
+    through Media Source Extensions.
+    """
+    
+    def __init__(self, camera_id: str, stream_url: str, loop: asyncio.AbstractEventLoop):
+        self.camera_id = camera_id
+        self.stream_url = stream_url
+        self.loop = loop
+        self.viewers: List[asyncio.Queue] = []
+        self.init_segment: Optional[bytes] = None
+        self.mime: Optional[str] = None  # MSE type, e.g. video/mp4; codecs="avc1.64001f"
+        self.init_ready = asyncio.Event()
+        self.process: Optional[asyncio.subprocess.Process] = None
+        
+        # Statistics
+        self.fragments = 0
+        self.bytes_out = 0
+        self.dropped_fragments = 0
+        self.restarts = 0
+        
+        self.task = loop.create_task(self._run())
+    
+    def _command(self) -> List[str]:
+        command = [settings.FFMPEG_BINARY, "-hide_banner", "-loglevel", "error"]
+        if self.stream_url.lower().startswith("rtsp://"):
+            command += ["-rtsp_transport", "tcp"]
+        if settings.PASSTHROUGH_IO_TIMEOUT > 0:
+            # A camera that stops sending would otherwise leave ffmpeg (and every viewer) waiting forever
+            command += ["-rw_timeout", str(int(settings.PASSTHROUGH_IO_TIMEOUT * 1_000_000))]
+        command += [
+            "-fflags", "nobuffer", "-i", self.stream_url,
+            "-map", "0:v:0", "-c:v", "copy", "-an",
+            "-f", "mp4", "-movflags", "frag_keyframe+empty_moov+default_base_moof",
+        ]
+        if settings.PASSTHROUGH_FRAGMENT_MS > 0:
+            # Shorter fragments than a GOP: lower latency, but not every fragment starts on a keyframe
+            command += ["-frag_duration", str(settings.PASSTHROUGH_FRAGMENT_MS * 1000)]
+        return command + ["pipe:1"]
+    
+    async def _run(self):
+        try:
+            while True:
+                try:
+                    await self._remux()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"[Passthrough] Error for camera {self.camera_id}: {e}")
+                
+                # Stream ended: viewers need a new init segment, so end their streams
+                self._end_viewers()
+                self.restarts += 1
+                await asyncio.sleep(2)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await self._terminate()
+            # Closed (e.g. replaced for a new stream URL): nobody must wait on a dead remuxer
+            self._end_viewers()
+    
+    def _end_viewers(self):
+        """Drop the init segment and send every viewer the end-of-stream marker"""
+        self.init_segment = None
+        self.init_ready.clear()
+        for queue in self.viewers:
+            self._put(queue, None)
+    
+    async def _remux(self):
+        self.process = await asyncio.create_subprocess_exec(
+            *self._command(), stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+        )
+        print(f"[Passthrough] Started for camera {self.camera_id}")
+        
+        buffer = bytearray()
+        header = bytearray()  # ftyp/moov until the init segment is complete
+        fragment = bytearray()  # Boxes of the fragment being assembled (moof ... mdat)
+        
+        while True:
+            chunk = await self.process.stdout.read(65536)
+            if not chunk:
+                break
+            buffer += chunk
+            
+            for box_type, box in self._split_boxes(buffer):
+                if self.init_segment is None:
+                    header += box
+                    if box_type == b"moov":
+                        self.init_segment = bytes(header)
+                        self.mime = self._mime(self.init_segment)
+                        self.init_ready.set()
+                    continue
+                
+                fragment += box
+                if box_type == b"mdat":
+                    self._publish(bytes(fragment))
+                    fragment = bytearray()
+        
+        await self._terminate()
+        print(f"[Passthrough] Stream ended for camera {self.camera_id}")
+    
+    @staticmethod
+    def _split_boxes(buffer: bytearray) -> List[Tuple[bytes, bytes]]:
+        """Remove and return the complete top-level MP4 boxes at the start of the buffer"""
+        boxes = []
+        while len(buffer) >= 8:
+            size, box_type = struct.unpack(">I4s", buffer[:8])
+            if size == 1:
+                if len(buffer) < 16:
+                    break
+                size = struct.unpack(">Q", buffer[8:16])[0]
+            if size < 8 or len(buffer) < size:
+                break
+            boxes.append((box_type, bytes(buffer[:size])))
+            del buffer[:size]
+        return boxes
+    
+    @staticmethod
+    def _mime(init_segment: bytes) -> str:
+        """MSE MIME type with the codec string from the avcC/hvcC box"""
+        index = init_segment.find(b"avcC")
+        if index >= 0 and len(init_segment) >= index + 8:
+            profile, compatibility, level = init_segment[index + 5:index + 8]
+            return f'video/mp4; codecs="avc1.{profile:02x}{compatibility:02x}{level:02x}"'
+        if init_segment.find(b"hvcC") >= 0:
+            return 'video/mp4; codecs="hvc1.1.6.L93.B0"'
+        return "video/mp4"
+    
+    def _publish(self, fragment: bytes):
+        self.fragments += 1
+        for queue in self.viewers:
+            self._put(queue, fragment)
+    
+    def _put(self, queue: asyncio.Queue, item: Optional[bytes]):
+        """Queue for a viewer; a viewer that fell behind skips to the newest fragment"""
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+                self.dropped_fragments += 1
+        queue.put_nowait(item)
+    
+    def add_viewer(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=max(1, settings.PASSTHROUGH_VIEWER_QUEUE_SIZE))
+        self.viewers.append(queue)
+        return queue
+    
+    def remove_viewer(self, queue: asyncio.Queue):
+        if queue in self.viewers:
+            self.viewers.remove(queue)
+    
+    async def _terminate(self):
+        process, self.process = self.process, None
+        if process and process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+    
+    async def close(self):
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+        print(f"[Passthrough] Stopped for camera {self.camera_id}")
+    
+    def get_stats(self) -> Dict:
+        return {
+            "viewers": len(self.viewers),
+            "mime": self.mime,
+            "fragments": self.fragments,
+            "bytes_out": self.bytes_out,
+            "dropped_fragments": self.dropped_fragments,
+            "restarts": self.restarts,
+            "is_running": self.process is not None
+        }
+
+class PassthroughManager:
+    """One remuxer per watched camera, started with the first viewer and stopped with the last"""
+    
+    def __init__(self):
+        # {camera_id: StreamRemuxer}
+        self.remuxers: Dict[str, StreamRemuxer] = {}
+    
+    async def open(self, camera_id: str, stream_url: str) -> Tuple[StreamRemuxer, asyncio.Queue]:
+        """
+        Attach a viewer to the camera's remuxer and wait for its init segment
+        
+        Returns:
+            (remuxer, fragment queue); a None fragment means the stream restarted
+        
+        Raises:
+            asyncio.TimeoutError: The camera stream did not start in time
+        """
+        remuxer = self.remuxers.get(camera_id)
+        if remuxer is None or remuxer.stream_url != stream_url:
+            if remuxer:
+                await self._stop(camera_id, remuxer)
+            remuxer = StreamRemuxer(camera_id, stream_url, asyncio.get_running_loop())
+            self.remuxers[camera_id] = remuxer
+        
+        queue = remuxer.add_viewer()
+        try:
+            await asyncio.wait_for(remuxer.init_ready.wait(), timeout=settings.PASSTHROUGH_START_TIMEOUT)
+        except BaseException:
+            await self.close(camera_id, remuxer, queue)
+            raise
+        return remuxer, queue
+    
+    async def close(self, camera_id: str, remuxer: StreamRemuxer, queue: asyncio.Queue):
+        """Detach a viewer; stops the remuxer when it was the last one"""
+        remuxer.remove_viewer(queue)
+        if not remuxer.viewers:
+            await self._stop(camera_id, remuxer)
+    
+    async def _stop(self, camera_id: str, remuxer: StreamRemuxer):
+        if self.remuxers.get(camera_id) is remuxer:
+            del self.remuxers[camera_id]
+        await remuxer.close()
+    
+    async def iter_stream(self, camera_id: str, remuxer: StreamRemuxer, queue: asyncio.Queue) -> AsyncIterator[bytes]:
+        """
+        Init segment followed by fragments, until the stream restarts (HTTP streaming)
+        
+        Takes a viewer from open(), so start failures surface before the response begins;
+        the viewer is closed when the iteration ends.
+        """
+        try:
+            yield remuxer.init_segment
+            while True:
+                fragment = await queue.get()
+                if fragment is None:
+                    return
+                remuxer.bytes_out += len(fragment)
+                yield fragment
+        finally:
+            await self.close(camera_id, remuxer, queue)
+    
+    def get_stats(self, camera_id: str) -> Dict:
+        remuxer = self.remuxers.get(camera_id)
+        return remuxer.get_stats() if remuxer else {"viewers": 0}
+    
+    async def stop(self):
+        """Stop all remuxers (shutdown)"""
+        remuxers = list(self.remuxers.values())
+        self.remuxers.clear()
+        for remuxer in remuxers:
+            await remuxer.close()
+
+# Global passthrough manager
+passthrough_manager = PassthroughManager()
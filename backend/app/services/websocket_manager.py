@@ -39,24 +39,6 @@ class WebSocketManager:
         self.event_connections.discard(websocket)
         print(f"Client disconnected from events")
     
-    async def broadcast_camera_frame(self, camera_id: str, frame_data: bytes):
-        """Broadcast frame to all clients watching this camera"""
-        if camera_id not in self.camera_connections:
-            return
-        
-        disconnected = set()
-        
-        for connection in self.camera_connections[camera_id]:
-            try:
-                await connection.send_bytes(frame_data)
-            except Exception as e:
-                print(f"Error sending frame: {e}")
-                disconnected.add(connection)
-        
-        # Remove disconnected clients
-        for connection in disconnected:
-            self.camera_connections[camera_id].discard(connection)
-    
     async def broadcast_event(self, event_type: str, data: dict):
         """Broadcast event to all connected clients"""
         message = json.dumps({
@@ -0,0 +1,188 @@
+import os
+import cv2
+import numpy as np
+from typing import Optional, Tuple
+try:
+    import av
+    PYAV_AVAILABLE = True
+except ImportError:
+    PYAV_AVAILABLE = False
+
+CAPTURE_BACKENDS = ("opencv", "pyav")
+DECODE_MODES = ("all", "keyframes")
+
+# Low-latency demuxer/decoder flags for network streams
+LOW_LATENCY_OPTIONS = {
+    "rtsp_transport": "tcp",
+    "fflags": "nobuffer",
+    "flags": "low_delay",
+    "max_delay": "500000",
+}
+
+class CaptureBackend:
+    """Video capture with a cv2.VideoCapture-like grab()/retrieve() interface
+
+    grab() advances the stream; retrieve() returns the grabbed frame as a
+    BGR image. Callers skip retrieve() for frames nobody needs.
+    """
+
+    def __init__(self, source: str, resolution: Tuple[int, int] = (1920, 1080),
+                 fps: Optional[int] = None, decode_mode: str = "all",
+                 decode_interval: int = 1, threads: int = 0, low_latency: bool = True):
+        self.source = source
+        self.resolution = resolution
+        self.fps = fps
+        self.decode_mode = decode_mode if decode_mode in DECODE_MODES else "all"
+        self.decode_interval = max(1, decode_interval)  # Only every Nth frame is handed out
+        self.threads = threads
+        self.low_latency = low_latency
+        self._frame_count = 0
+
+    def open(self) -> bool:
+        raise NotImplementedError
+
+    def grab(self) -> bool:
+        raise NotImplementedError
+
+    def retrieve(self) -> Tuple[bool, Optional[np.ndarray]]:
+        raise NotImplementedError
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def set_decode_mode(self, decode_mode: str):
+        """Switch between full decode and keyframes only (where the backend supports it)"""
+        self.decode_mode = decode_mode if decode_mode in DECODE_MODES else "all"
+
+    def release(self):
+        pass
+
+    def _wanted(self) -> bool:
+        """Count a frame and tell whether it is one of every decode_interval frames"""
+        self._frame_count += 1
+        return self._frame_count % self.decode_interval == 0
+
+class OpenCVBackend(CaptureBackend):
+    """cv2.VideoCapture (FFmpeg for network streams); cannot skip decoding inside grab()"""
+
+    def open(self) -> bool:
+        if self.source.isdigit():
+            # Webcam
+            self.cap = cv2.VideoCapture(int(self.source))
+        else:
+            # RTSP/ONVIF
+            if self.low_latency and "OPENCV_FFMPEG_CAPTURE_OPTIONS" not in os.environ:
+                os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = "|".join(
+                    f"{key};{value}" for key, value in LOW_LATENCY_OPTIONS.items())
+            self.cap = cv2.VideoCapture(self.source, cv2.CAP_FFMPEG)
+
+        if not self.cap.isOpened():
+            return False
+
+        width, height = self.resolution
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if self.fps:
+            self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+        if self.threads and hasattr(cv2, "CAP_PROP_N_THREADS"):
+            self.cap.set(cv2.CAP_PROP_N_THREADS, self.threads)
+        if self.decode_mode == "keyframes":
+            print("[Capture] Keyframe-only decode needs the pyav backend, decoding all frames")
+
+        return True
+
+    def grab(self) -> bool:
+        while True:
+            if not self.cap.grab():
+                return False
+            if self._wanted():
+                return True
+
+    def retrieve(self) -> Tuple[bool, Optional[np.ndarray]]:
+        return self.cap.retrieve()
+
+    def release(self):
+        self.cap.release()
+
+class PyAVBackend(CaptureBackend):
+    """FFmpeg through PyAV: low-latency flags, decoder threads and keyframe-only decode"""
+
+    def open(self) -> bool:
+        if not PYAV_AVAILABLE:
+            print("PyAV not available. Install av.")
+            return False
+
+        try:
+            options = dict(LOW_LATENCY_OPTIONS) if self.low_latency else {}
+            self.container = av.open(self.source, options=options, timeout=(10.0, 5.0))
+            self.stream = self.container.streams.video[0]
+            self.stream.thread_type = "AUTO"
+            if self.threads:
+                self.stream.codec_context.thread_count = self.threads
+            self.set_decode_mode(self.decode_mode)
+            self._frames = self.container.decode(self.stream)
+            self._frame = None
+            self._await_keyframe = False
+            return True
+        except Exception as e:
+            print(f"[Capture] PyAV open error: {e}")
+            return False
+
+    def set_decode_mode(self, decode_mode: str):
+        previous = self.decode_mode
+        super().set_decode_mode(decode_mode)
+        stream = getattr(self, "stream", None)
+        if stream is not None:
+            # Frames after skipped ones reference pictures the decoder never saw
+            self._await_keyframe = previous == "keyframes" and self.decode_mode != "keyframes"
+            # The decoder drops non-keyframes itself, so they cost no decode time
+            stream.codec_context.skip_frame = "NONKEY" if self.decode_mode == "keyframes" else "DEFAULT"
+
+    def grab(self) -> bool:
+        try:
+            while True:
+                frame = next(self._frames)
+                if self._await_keyframe:
+                    if not frame.key_frame:
+                        continue
+                    self._await_keyframe = False
+                if self._wanted():
+                    self._frame = frame
+                    return True
+        except Exception:
+            # End of stream or network/decoder error
+            self._frame = None
+            return False
+
+    def retrieve(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if self._frame is None:
+            return False, None
+        # YUV -> BGR conversion only happens here, for frames someone consumes
+        return True, self._frame.to_ndarray(format="bgr24")
+
+    def release(self):
+        container = getattr(self, "container", None)
+        if container is not None:
+            container.close()
+            self.container = None
+
+def create_backend(source: str, backend: str = "opencv", **kwargs) -> CaptureBackend:
+    """
+    Instantiate a capture backend
+
+    Args:
+        source: Stream URL or webcam index
+        backend: "opencv" or "pyav" (webcams always use OpenCV)
+        **kwargs: CaptureBackend options
+
+    Returns:
+        Unopened CaptureBackend
+    """
+    if backend == "pyav" and not source.isdigit():
+        if PYAV_AVAILABLE:
+            return PyAVBackend(source, **kwargs)
+        print("PyAV not available, falling back to OpenCV capture")
+    return OpenCVBackend(source, **kwargs)
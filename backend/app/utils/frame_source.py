@@ -0,0 +1,284 @@
+import cv2
+import numpy as np
+import time
+from typing import Optional, Dict, List, Tuple
+import threading
+from app.config import settings
+from .capture_backends import CaptureBackend, create_backend
+
+class VideoFrame:
+    """Decoded frame published by a FrameSource"""
+
+    __slots__ = ("image", "seq", "timestamp")
+
+    def __init__(self, image: np.ndarray, seq: int, timestamp: float):
+        self.image = image
+        self.seq = seq
+        self.timestamp = timestamp  # Time the frame was grabbed from the stream
+
+class FrameSubscription:
+    """Latest-frame slot of a single FrameSource consumer"""
+
+    def __init__(self, source: "FrameSource", name: str, size: Optional[Tuple[int, int]] = None,
+                 max_age: float = 0.5):
+        self.source = source
+        self.name = name
+        self.size = size  # (width, height) box frames are scaled down to fit in, or None for full resolution
+        self.max_age = max_age  # Pending frames older than this are not handed out
+        self._condition = threading.Condition()
+        self._latest: Optional[VideoFrame] = None
+        self._last_seq = 0
+        self.waiting = False  # Consumer is blocked in read() (capture decodes for it)
+        self.closed = False
+
+    def _publish(self, frame: VideoFrame):
+        """Called from the capture thread - replaces the pending frame"""
+        with self._condition:
+            self._latest = frame
+            self._condition.notify_all()
+
+    def read(self, timeout: float = 1.0) -> Optional[VideoFrame]:
+        """
+        Wait for a frame newer than the last one read
+
+        Args:
+            timeout: Seconds to wait before giving up
+
+        Returns:
+            VideoFrame (scaled down to fit the subscription size, aspect ratio kept) or None on timeout
+        """
+        with self._condition:
+            self.waiting = True
+            ready = self._condition.wait_for(
+                lambda: self.closed or (self._latest is not None and self._latest.seq > self._last_seq
+                                        and time.time() - self._latest.timestamp <= self.max_age),
+                timeout=timeout
+            )
+            self.waiting = False
+            if not ready or self.closed:
+                return None
+            frame = self._latest
+            self._last_seq = frame.seq
+
+        # Resize outside the lock, in the consumer's thread
+        if self.size:
+            height, width = frame.image.shape[:2]
+            scale = min(self.size[0] / width, self.size[1] / height)
+            if scale < 1.0:
+                # Even dimensions keep video encoders happy
+                size = (max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2))
+                image = cv2.resize(frame.image, size, interpolation=cv2.INTER_LINEAR)
+                return VideoFrame(image, frame.seq, frame.timestamp)
+
+        return frame
+
+    def close(self):
+        """Detach from the source"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+        self.source.unsubscribe(self)
+
+class FrameSource:
+    """Single capture/decode thread per camera, fanned out to several subscribers.
+
+    Published frames are shared between subscribers and must be treated as read-only.
+    """
+
+    def __init__(self, camera_id: str, stream_source: str,
+                 resolution: Tuple[int, int] = (1920, 1080),
+                 fps: Optional[int] = None,
+                 decode_on_demand: bool = settings.CAPTURE_DECODE_ON_DEMAND,
+                 backend: Optional[str] = None,
+                 decode_mode: str = "all",
+                 decode_interval: int = 1,
+                 decode_threads: Optional[int] = None):
+        self.camera_id = camera_id
+        self.stream_source = stream_source
+        self.resolution = resolution
+        self.fps = fps
+        self.backend = backend or settings.CAPTURE_BACKEND
+        self.decode_mode = decode_mode  # "all" or "keyframes" (idle cameras)
+        self.decode_interval = decode_interval  # Hand out every Nth frame only
+        self.decode_threads = settings.CAPTURE_DECODE_THREADS if decode_threads is None else decode_threads
+        # grab() every frame to keep the stream buffer drained, but retrieve()
+        # (convert/copy) only when a subscriber is waiting for one
+        self.decode_on_demand = decode_on_demand
+
+        self.is_running = False
+        self.cap = None
+        self.thread = None
+        # Each capture thread gets its own stop event, so a thread that outlives
+        # stop()'s join (blocked in grab or a reconnect wait) never resumes
+        # alongside the next one
+        self._stop_event: Optional[threading.Event] = None
+        self.subscribers: List[FrameSubscription] = []
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.frame_seq = 0
+        self.grabbed_frames = 0
+        self.skipped_frames = 0  # Grabbed but never retrieved (nobody waiting)
+        self.actual_fps = 0
+        self.read_failures = 0
+
+    def subscribe(self, name: str, size: Optional[Tuple[int, int]] = None,
+                  max_age: float = 0.5) -> FrameSubscription:
+        """
+        Register a consumer and start capturing if needed
+
+        Args:
+            name: Subscriber name (for stats)
+            size: Optional (width, height) the consumer wants larger frames scaled down to
+            max_age: Oldest pending frame (seconds) the consumer accepts
+
+        Returns:
+            FrameSubscription
+        """
+        subscription = FrameSubscription(self, name, size, max_age)
+        with self._lock:
+            self.subscribers.append(subscription)
+        self.start()
+        return subscription
+
+    def unsubscribe(self, subscription: FrameSubscription):
+        """Remove a consumer, stop capturing when nobody is left"""
+        with self._lock:
+            if subscription in self.subscribers:
+                self.subscribers.remove(subscription)
+            remaining = len(self.subscribers)
+
+        if remaining == 0:
+            self.stop()
+
+    def start(self):
+        """Start capture thread"""
+        with self._lock:
+            if self.is_running:
+                return
+            self.is_running = True
+            self._stop_event = threading.Event()
+
+        self.thread = threading.Thread(target=self._capture_loop, args=(self._stop_event,), daemon=True)
+        self.thread.start()
+        print(f"[Capture] Started for camera {self.camera_id}")
+
+    def stop(self):
+        """Stop capture thread"""
+        with self._lock:
+            if not self.is_running:
+                return
+            self.is_running = False
+            self._stop_event.set()
+
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2)
+        print(f"[Capture] Stopped for camera {self.camera_id}")
+
+    def _open(self) -> Optional[CaptureBackend]:
+        """Open the underlying video capture"""
+        cap = create_backend(
+            self.stream_source, self.backend,
+            resolution=self.resolution, fps=self.fps,
+            decode_mode=self.decode_mode, decode_interval=self.decode_interval,
+            threads=self.decode_threads, low_latency=settings.CAPTURE_LOW_LATENCY
+        )
+
+        if not cap.open():
+            print(f"[Capture] Failed to open stream: {self.stream_source}")
+            return None
+
+        return cap
+
+    def set_decode_mode(self, decode_mode: str):
+        """Switch between full and keyframe-only decode while running"""
+        self.decode_mode = decode_mode
+        if self.cap:
+            self.cap.set_decode_mode(decode_mode)
+
+    def _capture_loop(self, stop_event: threading.Event):
+        """Decode each frame once and hand it to every subscriber"""
+        cap = None
+        try:
+            cap = self._open()
+            if cap is None:
+                return
+            if not stop_event.is_set():
+                self.cap = cap
+
+            fps_counter = 0
+            fps_start_time = time.time()
+
+            while not stop_event.is_set():
+                ret = cap.grab()
+                grabbed_at = time.time()
+
+                if ret:
+                    self.grabbed_frames += 1
+                    with self._lock:
+                        subscribers = list(self.subscribers)
+
+                    if self.decode_on_demand and not any(s.waiting for s in subscribers):
+                        # Nobody would see this frame before the next one replaces it
+                        self.skipped_frames += 1
+                        continue
+
+                    ret, image = cap.retrieve()
+
+                if not ret:
+                    self.read_failures += 1
+                    print(f"[Capture] Failed to read frame from {self.camera_id}")
+                    stop_event.wait(1)  # Wait before retry
+
+                    # Reconnect (a dropped network stream does not recover by itself)
+                    cap.release()
+                    cap = None
+                    while not stop_event.is_set():
+                        cap = self._open()
+                        if cap is not None:
+                            break
+                        stop_event.wait(5)
+                    if cap is None:
+                        break
+                    if not stop_event.is_set():
+                        self.cap = cap
+                    continue
+
+                if stop_event.is_set():
+                    break  # Stopped while blocked in grab/retrieve
+
+                self.frame_seq += 1
+                frame = VideoFrame(image, self.frame_seq, grabbed_at)
+
+                for subscription in subscribers:
+                    subscription._publish(frame)
+
+                # Calculate FPS
+                fps_counter += 1
+                if time.time() - fps_start_time >= 1.0:
+                    self.actual_fps = fps_counter
+                    fps_counter = 0
+                    fps_start_time = time.time()
+
+        except Exception as e:
+            print(f"[Capture] Error: {e}")
+        finally:
+            if cap:
+                cap.release()
+            if self.cap is cap:
+                self.cap = None
+
+    def get_stats(self) -> Dict:
+        """Get capture statistics"""
+        return {
+            "camera_id": self.camera_id,
+            "fps": self.actual_fps,
+            "backend": self.backend,
+            "decode_mode": self.decode_mode,
+            "frame_seq": self.frame_seq,
+            "grabbed_frames": self.grabbed_frames,
+            "skipped_frames": self.skipped_frames,
+            "read_failures": self.read_failures,
+            "subscribers": [s.name for s in self.subscribers],
+            "is_running": self.is_running
+        }
@@ -1,76 +1,179 @@
 import cv2
 import numpy as np
-from typing import Optional
+from typing import Optional, List, Tuple
+
+MOTION_METHODS = ("average", "mog2", "diff")
 
 class MotionDetector:
-    """Detect motion in video frames to trigger OCR processing"""
-    
-    def __init__(self, threshold: int = 30, min_area: int = 500):
+    """Detect motion in video frames to trigger OCR processing.
+
+    Works on a small grayscale copy of the frame (process_width pixels wide),
+    so gating a 1080p frame costs well under a millisecond.
+    """
+
+    def __init__(self, threshold: int = 30, min_area: int = 500,
+                 method: str = "average",
+                 zones: Optional[List[List[List[int]]]] = None,
+                 process_width: int = 320,
+                 learning_rate: float = 0.05,
+                 reference_size: Optional[Tuple[int, int]] = None):
         self.threshold = threshold
-        self.min_area = min_area
-        self.prev_frame = None
+        self.min_area = min_area  # In full-frame pixels
+        self.method = method if method in MOTION_METHODS else "average"
+        self.zones = zones  # Polygons [[x, y], ...] in full-frame pixels; None = whole frame
+        self.process_width = process_width
+        self.learning_rate = learning_rate  # Running-average background adaptation speed
+        # (width, height) of the "full frame" zones, min_area and boxes refer to; None = the
+        # analyzed frames (set when motion runs on a sub-stream but ROIs are in main-stream pixels)
+        self.reference_size = reference_size
+
+        self.prev_frame = None  # Previous frame ("diff") or float background ("average")
+        self.subtractor = None  # MOG2 background model
+        self.zone_mask = None
+        self.frame_size = None  # (width, height) the masks were built for
+        self.scale = 1.0  # Analyzed frame -> processed copy
+        self.output_scale = (1.0, 1.0)  # Reference frame -> processed copy (x, y)
+
+        # Moving regions of the last frame, in full-frame coordinates
+        self.last_motion_box: Optional[Tuple[int, int, int, int]] = None
+        self.last_motion_boxes: List[Tuple[int, int, int, int]] = []
+
         self.frame_count = 0
         self.motion_detected_count = 0
-    
+
+    def _prepare(self, frame: np.ndarray) -> np.ndarray:
+        """Downscale and convert to blurred grayscale (rebuilding masks on resolution change)"""
+        height, width = frame.shape[:2]
+        if self.frame_size != (width, height):
+            self.frame_size = (width, height)
+            self.scale = min(1.0, self.process_width / float(width))
+            ref_width, ref_height = self.reference_size or (width, height)
+            self.output_scale = (self.scale * width / float(ref_width), self.scale * height / float(ref_height))
+            self.prev_frame = None
+            self.subtractor = None
+            self.zone_mask = self._build_zone_mask()
+
+        if self.scale < 1.0:
+            small = cv2.resize(frame, (int(width * self.scale), int(height * self.scale)),
+                               interpolation=cv2.INTER_NEAREST)
+        else:
+            small = frame
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if len(small.shape) == 3 else small
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def _build_zone_mask(self) -> Optional[np.ndarray]:
+        if not self.zones:
+            return None
+        width, height = self.frame_size
+        mask = np.zeros((int(height * self.scale), int(width * self.scale)), dtype=np.uint8)
+        for zone in self.zones:
+            if len(zone) >= 3:
+                points = np.round(np.array(zone, dtype=np.float32) * self.output_scale).astype(np.int32)
+                cv2.fillPoly(mask, [points], 255)
+        return mask
+
+    def _foreground(self, gray: np.ndarray) -> Optional[np.ndarray]:
+        """Binary foreground mask, or None while the background model warms up"""
+        if self.method == "mog2":
+            if self.subtractor is None:
+                self.subtractor = cv2.createBackgroundSubtractorMOG2(history=200, detectShadows=False)
+                self.subtractor.apply(gray)
+                return None
+            return self.subtractor.apply(gray)
+
+        if self.prev_frame is None:
+            self.prev_frame = gray.astype(np.float32) if self.method == "average" else gray
+            return None
+
+        if self.method == "average":
+            frame_diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.prev_frame))
+            cv2.accumulateWeighted(gray, self.prev_frame, self.learning_rate)
+        else:
+            frame_diff = cv2.absdiff(self.prev_frame, gray)
+            self.prev_frame = gray
+
+        return cv2.threshold(frame_diff, self.threshold, 255, cv2.THRESH_BINARY)[1]
+
     def detect_motion(self, frame: np.ndarray) -> bool:
         """
         Detect if there's significant motion in the frame
-        
+
         Args:
             frame: Current frame (BGR)
-        
+
         Returns:
-            True if motion detected, False otherwise
+            True if motion detected, False otherwise (moving area in last_motion_box)
         """
         try:
-            # Convert to grayscale
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            gray = cv2.GaussianBlur(gray, (21, 21), 0)
-            
+            gray = self._prepare(frame)
+            thresh = self._foreground(gray)
+
             # First frame initialization
-            if self.prev_frame is None:
-                self.prev_frame = gray
+            if thresh is None:
+                self.last_motion_box = (0, 0) + (self.reference_size or self.frame_size)
+                self.last_motion_boxes = [self.last_motion_box]
                 return True  # Process first frame
-            
-            # Compute difference
-            frame_diff = cv2.absdiff(self.prev_frame, gray)
-            thresh = cv2.threshold(frame_diff, self.threshold, 255, cv2.THRESH_BINARY)[1]
+
+            if self.zone_mask is not None:
+                thresh = cv2.bitwise_and(thresh, self.zone_mask)
             thresh = cv2.dilate(thresh, None, iterations=2)
-            
+
             # Find contours
             contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            # Check for significant motion
-            motion_detected = False
+
+            # Collect significant moving regions (scaled back to the full frame)
+            scale_x, scale_y = self.output_scale
+            min_area = self.min_area * scale_x * scale_y
+            boxes = []
             for contour in contours:
-                if cv2.contourArea(contour) > self.min_area:
-                    motion_detected = True
-                    self.motion_detected_count += 1
-                    break
-            
-            # Update previous frame
-            self.prev_frame = gray
+                if cv2.contourArea(contour) > min_area:
+                    x, y, w, h = cv2.boundingRect(contour)
+                    boxes.append((int(x / scale_x), int(y / scale_y),
+                                  int((x + w) / scale_x), int((y + h) / scale_y)))
+
+            self.last_motion_boxes = boxes
+            self.last_motion_box = (
+                min(b[0] for b in boxes), min(b[1] for b in boxes),
+                max(b[2] for b in boxes), max(b[3] for b in boxes)
+            ) if boxes else None
+
+            motion_detected = bool(boxes)
+            if motion_detected:
+                self.motion_detected_count += 1
             self.frame_count += 1
-            
+
             return motion_detected
-            
+
         except Exception as e:
             print(f"Motion detection error: {e}")
+            self.last_motion_box = None
+            self.last_motion_boxes = []
             return True  # Process on error to be safe
-    
+
+    def set_reference_size(self, reference_size: Optional[Tuple[int, int]]):
+        """Change the frame size zones and boxes refer to (rebuilds the masks)"""
+        if reference_size != self.reference_size:
+            self.reference_size = reference_size
+            self.frame_size = None
+
     def reset(self):
         """Reset motion detector"""
         self.prev_frame = None
+        self.subtractor = None
+        self.frame_size = None
+        self.last_motion_box = None
+        self.last_motion_boxes = []
         self.frame_count = 0
         self.motion_detected_count = 0
-    
+
     def get_stats(self) -> dict:
         """Get motion detection statistics"""
         if self.frame_count == 0:
-            return {"motion_ratio": 0, "total_frames": 0, "motion_frames": 0}
-        
+            return {"motion_ratio": 0, "total_frames": 0, "motion_frames": 0, "method": self.method}
+
         return {
             "motion_ratio": self.motion_detected_count / self.frame_count,
             "total_frames": self.frame_count,
-            "motion_frames": self.motion_detected_count
-        }
\ No newline at end of file
+            "motion_frames": self.motion_detected_count,
+            "method": self.method
+        }
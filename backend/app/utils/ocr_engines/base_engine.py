@@ -0,0 +1,38 @@
+import numpy as np
+from typing import Optional, Tuple, List, Union
+from .preprocessing import PreprocessedImage
+
+class BaseOCREngine:
+    """Common interface of all OCR engines
+
+    Engines implement recognize_plate; recognize_plates falls back to a loop
+    and is overridden by engines whose backend can run a batch natively.
+    """
+
+    initialized = False
+
+    def recognize_plate(self, image: Union[np.ndarray, PreprocessedImage]) -> Tuple[Optional[str], float]:
+        """
+        Recognize plate from image
+
+        Returns:
+            (plate_text, confidence) or (None, 0.0)
+        """
+        raise NotImplementedError
+
+    def recognize_plates(self, images: List[Union[np.ndarray, PreprocessedImage]],
+                         localized: bool = False) -> list:
+        """
+        Recognize several plate crops at once
+
+        Args:
+            images: Input images (BGR) or shared PreprocessedImages
+            localized: Every image is a detected plate crop (engines may skip text detection)
+
+        Returns:
+            One recognize_plate result per image, in order
+        """
+        return [self.recognize_plate(image) for image in images]
+
+    def get_engine_name(self) -> str:
+        return self.__class__.__name__
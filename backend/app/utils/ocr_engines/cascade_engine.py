@@ -0,0 +1,211 @@
+import time
+import random
+import threading
+import numpy as np
+from typing import Optional, Tuple, List, Dict
+from app.config import settings
+from .engine_registry import engine_registry
+from .preprocessing import prepare
+from .base_engine import BaseOCREngine
+from app.utils.plate_formatter import PlateFormatter
+
+# Cheapest first; used until enough per-camera statistics are collected
+DEFAULT_ORDER = ['crnn', 'tesseract', 'easy', 'paddle']
+
+class EngineStats:
+    """Running accuracy-proxy and latency statistics of one engine on one camera"""
+
+    def __init__(self):
+        self.attempts = 0
+        self.valid = 0  # Passed plate format validation
+        self.accepted = 0  # Valid and above the confidence bar
+        self.avg_latency_ms = 0.0
+        self.avg_confidence = 0.0
+
+    def update(self, latency_ms: float, valid: bool, accepted: bool, confidence: float):
+        self.attempts += 1
+        self.valid += int(valid)
+        self.accepted += int(accepted)
+        alpha = 1.0 / self.attempts if self.attempts < 20 else 0.05
+        self.avg_latency_ms += alpha * (latency_ms - self.avg_latency_ms)
+        self.avg_confidence += alpha * (confidence - self.avg_confidence)
+
+    def expected_cost(self) -> float:
+        """Expected milliseconds spent per accepted plate when tried first"""
+        accept_rate = max(self.accepted / self.attempts, 0.05)
+        return self.avg_latency_ms / accept_rate
+
+    def to_dict(self) -> Dict:
+        return {
+            "attempts": self.attempts,
+            "valid_rate": round(self.valid / self.attempts, 3) if self.attempts else 0.0,
+            "accept_rate": round(self.accepted / self.attempts, 3) if self.attempts else 0.0,
+            "avg_latency_ms": round(self.avg_latency_ms, 1),
+            "avg_confidence": round(self.avg_confidence, 3)
+        }
+
+class CascadeEngine(BaseOCREngine):
+    """Adaptive OCR engine: tries the cheapest engine first and escalates only when needed"""
+
+    def __init__(self, confidence: float = settings.CASCADE_CONFIDENCE,
+                 min_samples: int = 20, explore_rate: float = 0.05):
+        print("Initializing Cascade OCR Engine...")
+
+        self.confidence = confidence
+        self.min_samples = min_samples
+        self.explore_rate = explore_rate
+
+        self.engines = {}
+        for engine_name in DEFAULT_ORDER + ['yolo']:
+            engine = engine_registry.acquire(engine_name)
+            if engine is not None:
+                self.engines[engine_name] = engine
+
+        # {camera_id: {engine_name: EngineStats}}
+        self.stats: Dict[str, Dict[str, EngineStats]] = {}
+        self._lock = threading.Lock()
+
+        self.initialized = any(name in self.engines for name in DEFAULT_ORDER)
+        print(f"Cascade Engine initialized with {len(self.engines)} engines")
+
+    def close(self):
+        """Release sub-engines back to the registry"""
+        for engine_name in list(self.engines.keys()):
+            engine_registry.release(engine_name)
+        self.engines = {}
+        self.initialized = False
+
+    def _engine_order(self, camera_id: str, explore: bool = True) -> List[str]:
+        """Engines to try for this camera, best expected cost first"""
+        available = [name for name in DEFAULT_ORDER if name in self.engines]
+
+        with self._lock:
+            camera_stats = self.stats.get(camera_id, {})
+            learned = all(
+                name in camera_stats and camera_stats[name].attempts >= self.min_samples
+                for name in available
+            )
+            if learned:
+                order = sorted(available, key=lambda name: camera_stats[name].expected_cost())
+            else:
+                # Still learning: engines with few samples go first (cheapest first among them)
+                order = sorted(available, key=lambda name: (
+                    camera_stats[name].attempts >= self.min_samples if name in camera_stats else False,
+                    DEFAULT_ORDER.index(name)
+                ))
+
+        # Occasionally promote another engine so its statistics stay current
+        if explore and learned and len(order) > 1 and random.random() < self.explore_rate:
+            order.insert(0, order.pop(random.randrange(1, len(order))))
+
+        return order
+
+    def _record(self, camera_id: str, engine_name: str, latency_ms: float,
+                valid: bool, accepted: bool, confidence: float):
+        with self._lock:
+            camera_stats = self.stats.setdefault(camera_id, {})
+            engine_stats = camera_stats.setdefault(engine_name, EngineStats())
+            engine_stats.update(latency_ms, valid, accepted, confidence)
+
+    def recognize_plate(self, image: np.ndarray, camera_id: Optional[str] = None,
+                        use_yolo_detection: bool = True,
+                        denoise: Optional[str] = None) -> Tuple[Optional[str], float, str]:
+        """
+        Recognize plate, escalating through engines until one passes validation and the confidence bar
+
+        Args:
+            image: Input image (BGR)
+            camera_id: Camera the image comes from (statistics are kept per camera)
+            use_yolo_detection: Whether to use YOLO for plate detection first
+            denoise: Denoise filter (None = OCR_DENOISE_METHOD)
+
+        Returns:
+            (plate_text, confidence, engine_name)
+        """
+        return self.recognize_plates([image], camera_id, use_yolo_detection, denoise)[0]
+
+    def recognize_plates(self, images: List[np.ndarray], camera_id: Optional[str] = None,
+                         use_yolo_detection: bool = True,
+                         denoise: Optional[str] = None) -> List[Tuple[Optional[str], float, str]]:
+        """
+        Recognize several images of one camera; only unresolved images escalate
+
+        Args:
+            images: Input images (BGR)
+            camera_id: Camera the images come from (statistics are kept per camera)
+            use_yolo_detection: Whether to use YOLO for plate detection first
+            denoise: Denoise filter (None = OCR_DENOISE_METHOD)
+
+        Returns:
+            [(plate_text, confidence, engine_name)] per image
+        """
+        if not self.initialized or not images:
+            return [(None, 0.0, "none")] * len(images)
+
+        camera_id = camera_id or "default"
+
+        # Step 1: Use YOLO to detect and extract plate region (if available)
+        crops = []
+        localized = True  # Every crop is a plate (caller's detector or YOLO found one)
+        for image in images:
+            process_image = image
+            if use_yolo_detection:
+                plate_region = self.engines['yolo'].extract_plate_region(image) if 'yolo' in self.engines else None
+                if plate_region is not None:
+                    process_image = plate_region
+                else:
+                    localized = False
+
+            # Grayscale/contrast/denoise are computed once and reused while escalating
+            crops.append(prepare(process_image, denoise or settings.OCR_DENOISE_METHOD))
+
+        # Step 2: Escalate from the engine expected to be cheapest for this camera
+        accepted_results = [None] * len(crops)
+        best_results = [None] * len(crops)
+        pending = list(range(len(crops)))
+        for engine_name in self._engine_order(camera_id):
+            if not pending:
+                break
+
+            start_time = time.time()
+            try:
+                outputs = self.engines[engine_name].recognize_plates([crops[i] for i in pending], localized=localized)
+            except Exception as e:
+                print(f"Error in {engine_name}: {e}")
+                outputs = [(None, 0.0)] * len(pending)
+            latency_ms = (time.time() - start_time) * 1000 / len(pending)
+
+            unresolved = []
+            for index, (plate_text, confidence) in zip(pending, outputs):
+                valid = bool(plate_text and len(plate_text) >= 5 and PlateFormatter.validate_plate(plate_text))
+                accepted = valid and confidence >= self.confidence
+                self._record(camera_id, engine_name, latency_ms, valid, accepted, confidence)
+
+                if valid:
+                    result = (PlateFormatter.format_plate(plate_text), confidence, engine_name)
+                    if accepted:
+                        accepted_results[index] = result
+                        continue
+                    if best_results[index] is None or confidence > best_results[index][1]:
+                        best_results[index] = result
+                unresolved.append(index)
+            pending = unresolved
+
+        # Step 3: Nothing cleared the bar - return the best valid reading, if any
+        return [accepted_results[i] or best_results[i] or (None, 0.0, "none") for i in range(len(crops))]
+
+    def get_camera_stats(self, camera_id: str) -> Dict:
+        """Per-engine statistics and current engine order for a camera"""
+        with self._lock:
+            camera_stats = {name: s.to_dict() for name, s in self.stats.get(camera_id, {}).items()}
+        return {
+            "engine_order": self._engine_order(camera_id, explore=False),
+            "engines": camera_stats
+        }
+
+    def get_available_engines(self) -> List[str]:
+        """Get list of available OCR engines"""
+        return list(self.engines.keys())
+
+    def get_engine_name(self) -> str:
+        return "Cascade (" + ", ".join(self.get_available_engines()) + ")"
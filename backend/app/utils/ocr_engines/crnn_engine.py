@@ -0,0 +1,166 @@
+import os
+import cv2
+import numpy as np
+from typing import Optional, Tuple, Union, List
+from app.config import settings
+from app.utils.plate_formatter import PlateFormatter
+from .preprocessing import PreprocessedImage, prepare
+from .base_engine import BaseOCREngine
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+def recognizer_available() -> bool:
+    """Whether a plate recognizer model is configured and can be run"""
+    return ONNXRUNTIME_AVAILABLE and bool(settings.PLATE_RECOGNIZER_MODEL) and \
+        os.path.exists(settings.PLATE_RECOGNIZER_MODEL)
+
+def recognizer_input(image: np.ndarray, height: int, width: int, channels: int) -> np.ndarray:
+    """
+    Resize a plate crop to the recognizer input (NCHW, normalized to -1..1)
+
+    Args:
+        image: Plate crop (BGR or grayscale)
+        height, width, channels: Model input size
+    """
+    if channels == 1 and len(image.shape) == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    elif channels == 3 and len(image.shape) == 2:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    resized = cv2.resize(image, (width, height), interpolation=cv2.INTER_LINEAR).astype(np.float32)
+    resized = (resized / 255.0 - 0.5) / 0.5
+    if resized.ndim == 2:
+        return resized[None, None]
+    return resized.transpose(2, 0, 1)[None]
+
+class CRNNEngine(BaseOCREngine):
+    """Dedicated plate-text recognizer: CRNN with CTC decoding on ONNX Runtime
+
+    Only reads the text line of an already localized plate crop (no text
+    detection), and only emits characters PlateFormatter accepts.
+    """
+
+    def __init__(self, model_path: Optional[str] = None, alphabet: Optional[str] = None):
+        if not ONNXRUNTIME_AVAILABLE:
+            print("ONNX Runtime not available. Install onnxruntime.")
+            self.initialized = False
+            return
+
+        model_path = model_path or settings.PLATE_RECOGNIZER_MODEL
+        if not model_path or not os.path.exists(model_path):
+            print("Plate recognizer model not configured (PLATE_RECOGNIZER_MODEL)")
+            self.initialized = False
+            return
+
+        try:
+            from .quantization import resolve_model
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if settings.PLATE_RECOGNIZER_THREADS > 0:
+                options.intra_op_num_threads = settings.PLATE_RECOGNIZER_THREADS
+            self.session = ort.InferenceSession(resolve_model(model_path), options,
+                                                providers=["CPUExecutionProvider"])
+
+            model_input = self.session.get_inputs()[0]
+            self.input_name = model_input.name
+            shape = model_input.shape
+            self.channels = shape[1] if isinstance(shape[1], int) else 1
+            self.height = shape[2] if isinstance(shape[2], int) else 32
+            self.width = shape[3] if isinstance(shape[3], int) else 128
+            self.fixed_batch = isinstance(shape[0], int)  # Exported with batch size 1
+
+            # Class 0 is the CTC blank; class i is alphabet[i - 1]
+            self.alphabet = alphabet or settings.PLATE_RECOGNIZER_ALPHABET or PlateFormatter.ALPHABET
+            self.allowed = np.array([True] + [c in PlateFormatter.ALPHABET for c in self.alphabet])
+
+            self.initialized = True
+        except Exception as e:
+            print(f"Plate recognizer initialization error: {e}")
+            self.initialized = False
+
+    def recognize_plate(self, image: Union[np.ndarray, PreprocessedImage]) -> Tuple[Optional[str], float]:
+        """
+        Recognize plate from image
+
+        Args:
+            image: Plate crop (BGR) or a shared PreprocessedImage
+
+        Returns:
+            (plate_text, confidence) or (None, 0.0)
+        """
+        if not self.initialized:
+            return None, 0.0
+
+        try:
+            logits = self.session.run(None, {self.input_name: self._blob(image)})[0]
+            return self._decode(logits[0] if logits.shape[0] == 1 else logits[:, 0])
+
+        except Exception as e:
+            print(f"Plate recognizer error: {e}")
+            return None, 0.0
+
+    def recognize_plates(self, images: List[Union[np.ndarray, PreprocessedImage]],
+                         localized: bool = False) -> List[Tuple[Optional[str], float]]:
+        """
+        Recognize several plate crops in one forward pass
+
+        Args:
+            images: Plate crops (BGR) or shared PreprocessedImages
+            localized: Unused (the recognizer always reads the whole image)
+
+        Returns:
+            [(plate_text, confidence) or (None, 0.0)] per image
+        """
+        if not self.initialized or not images:
+            return [(None, 0.0)] * len(images)
+        if self.fixed_batch:
+            return super().recognize_plates(images)
+
+        try:
+            blob = np.concatenate([self._blob(image) for image in images])
+            logits = self.session.run(None, {self.input_name: blob})[0]
+            if logits.shape[0] != len(images):
+                logits = logits.transpose(1, 0, 2)  # (T, N, C) output layout
+            return [self._decode(sequence) for sequence in logits]
+
+        except Exception as e:
+            print(f"Plate recognizer batch error: {e}")
+            return [(None, 0.0)] * len(images)
+
+    def _blob(self, image: Union[np.ndarray, PreprocessedImage]) -> np.ndarray:
+        crop = prepare(image)
+        source = crop.gray() if self.channels == 1 else crop.image
+        return recognizer_input(source, self.height, self.width, self.channels)
+
+    def _decode(self, logits: np.ndarray) -> Tuple[Optional[str], float]:
+        """Greedy CTC decoding restricted to plate characters"""
+        if logits.shape[-1] != len(self.allowed):
+            raise ValueError(f"Model has {logits.shape[-1]} classes, alphabet has {len(self.allowed) - 1} + blank")
+
+        # Softmax over time steps, then forbid characters plates never contain
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=-1, keepdims=True)
+        probabilities[:, ~self.allowed] = 0.0
+
+        best = probabilities.argmax(axis=-1)
+        confidences = probabilities.max(axis=-1)
+
+        chars = []
+        char_confidences = []
+        previous = 0
+        for step, index in enumerate(best):
+            if index != 0 and index != previous:
+                chars.append(self.alphabet[index - 1])
+                char_confidences.append(confidences[step])
+            previous = index
+
+        if not chars:
+            return None, 0.0
+
+        return ''.join(chars), float(np.mean(char_confidences))
+
+    def get_engine_name(self) -> str:
+        return "CRNN"
@@ -1,6 +1,8 @@
 import cv2
 import numpy as np
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union, List
+from .preprocessing import PreprocessedImage, prepare
+from .base_engine import BaseOCREngine
 
 try:
     import easyocr
@@ -9,7 +11,7 @@ except Exception as e:
     print(f"EasyOCR not available: {e}")
     EASYOCR_AVAILABLE = False
 
-class EasyOCREngine:
+class EasyOCREngine(BaseOCREngine):
     """EasyOCR engine for Turkish plate recognition"""
     
     def __init__(self):
@@ -26,12 +28,12 @@ class EasyOCREngine:
             print(f"EasyOCR initialization error: {e}")
             self.initialized = False
     
-    def recognize_plate(self, image: np.ndarray) -> Tuple[Optional[str], float]:
+    def recognize_plate(self, image: Union[np.ndarray, PreprocessedImage]) -> Tuple[Optional[str], float]:
         """
         Recognize plate from image
         
         Args:
-            image: Input image (BGR)
+            image: Input image (BGR) or a shared PreprocessedImage
         
         Returns:
             (plate_text, confidence) or (None, 0.0)
@@ -73,25 +75,59 @@ class EasyOCREngine:
             print(f"EasyOCR recognition error: {e}")
             return None, 0.0
     
-    def _preprocess(self, image: np.ndarray) -> np.ndarray:
-        """Preprocess image for better OCR"""
-        # Convert to grayscale
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image
-        
-        # Increase contrast
-        gray = cv2.convertScaleAbs(gray, alpha=1.5, beta=10)
+    def recognize_plates(self, images: List[Union[np.ndarray, PreprocessedImage]],
+                         localized: bool = False) -> List[Tuple[Optional[str], float]]:
+        """
+        Recognize several plate crops with readtext_batched
         
-        # Denoise
-        gray = cv2.fastNlMeansDenoising(gray)
+        Args:
+            images: Plate crops (BGR) or shared PreprocessedImages
+            localized: Unused (readtext always runs text detection)
         
-        # Adaptive threshold
-        binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                                       cv2.THRESH_BINARY, 11, 2)
+        Returns:
+            [(plate_text, confidence) or (None, 0.0)] per image
+        """
+        if not self.initialized or not images:
+            return [(None, 0.0)] * len(images)
         
-        return binary
+        try:
+            processed = [self._preprocess(image) for image in images]
+            
+            # Batched readtext needs one size: pad every crop to the largest one
+            # with its background color instead of stretching it (keeps aspect ratio)
+            width = max(p.shape[1] for p in processed)
+            height = max(p.shape[0] for p in processed)
+            padded = [self._pad(p, width, height) for p in processed]
+            batch_results = self.reader.readtext_batched(padded, n_width=width, n_height=height)
+            
+            plates = []
+            for results in batch_results:
+                texts = [text for (_, text, _) in results]
+                confidences = [conf for (_, _, conf) in results]
+                if not texts:
+                    plates.append((None, 0.0))
+                    continue
+                plate_text = self._filter_plate_chars(''.join(texts).upper())
+                plates.append((plate_text, sum(confidences) / len(confidences)))
+            
+            return plates
+            
+        except Exception as e:
+            print(f"EasyOCR batch recognition error: {e}")
+            return [(None, 0.0)] * len(images)
+    
+    def _preprocess(self, image: Union[np.ndarray, PreprocessedImage]) -> np.ndarray:
+        """Preprocess image for better OCR (intermediates are shared with other engines)"""
+        return prepare(image).adaptive()
+    
+    @staticmethod
+    def _pad(image: np.ndarray, width: int, height: int) -> np.ndarray:
+        """Pad an image at the bottom/right to width x height"""
+        if image.shape[1] == width and image.shape[0] == height:
+            return image
+        background = int(np.median(image))
+        return cv2.copyMakeBorder(image, 0, height - image.shape[0], 0, width - image.shape[1],
+                                  cv2.BORDER_CONSTANT, value=background)
     
     def _filter_plate_chars(self, text: str) -> str:
         """Filter only valid Turkish plate characters"""
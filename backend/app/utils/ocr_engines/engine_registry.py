@@ -0,0 +1,201 @@
+import gc
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Callable
+from app.config import settings
+
+# Engines that only dispatch to other registry engines (no model of their own)
+AGGREGATE_ENGINES = ("hybrid", "cascade")
+
+# Engines whose methods are serialized by the registry (models are not thread-safe)
+LOCKED_METHODS = ("recognize_plate", "recognize_plates", "detect_plates",
+                  "extract_plate_region", "extract_plate_regions")
+
+def _create_engine(engine_type: str):
+    """Instantiate an engine (imports are local to avoid circular imports with HybridEngine)"""
+    if engine_type == "paddle":
+        from .paddle_engine import PaddleEngine
+        return PaddleEngine()
+    elif engine_type == "easy":
+        from .easyocr_engine import EasyOCREngine
+        return EasyOCREngine()
+    elif engine_type == "tesseract":
+        from .tesseract_engine import TesseractEngine
+        return TesseractEngine()
+    elif engine_type == "yolo":
+        from .yolo_engine import YOLOEngine
+        return YOLOEngine()
+    elif engine_type == "crnn":
+        from .crnn_engine import CRNNEngine
+        return CRNNEngine()
+    elif engine_type == "hybrid":
+        from .hybrid_engine import HybridEngine
+        return HybridEngine()
+    elif engine_type == "cascade":
+        from .cascade_engine import CascadeEngine
+        return CascadeEngine()
+    return None
+
+def _library_available(engine_type: str) -> bool:
+    """Cheap availability check that does not load any model"""
+    if engine_type == "paddle":
+        from .paddle_engine import PADDLE_AVAILABLE
+        return PADDLE_AVAILABLE
+    elif engine_type == "easy":
+        from .easyocr_engine import EASYOCR_AVAILABLE
+        return EASYOCR_AVAILABLE
+    elif engine_type == "tesseract":
+        from .tesseract_engine import TESSERACT_AVAILABLE
+        return TESSERACT_AVAILABLE
+    elif engine_type == "yolo":
+        from .yolo_engine import detector_available
+        return detector_available()
+    elif engine_type == "crnn":
+        from .crnn_engine import recognizer_available
+        return recognizer_available()
+    elif engine_type in AGGREGATE_ENGINES:
+        return any(_library_available(t) for t in ("paddle", "easy", "tesseract", "crnn"))
+    return False
+
+class SharedEngine:
+    """Thread-safe proxy around a registry-owned engine"""
+
+    def __init__(self, engine_type: str, engine):
+        self.engine_type = engine_type
+        self._engine = engine
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._engine, name)
+        if name in LOCKED_METHODS and callable(attr):
+            def locked(*args, **kwargs):
+                with self._lock:
+                    return attr(*args, **kwargs)
+            return locked
+        return attr
+
+class _RegistryEntry:
+    def __init__(self):
+        self.engine = None
+        self.refs = 0
+        self.load_lock = threading.Lock()
+
+class EngineRegistry:
+    """Process-wide, reference-counted OCR engine registry.
+
+    Each model is loaded once per process, shared by every camera and unloaded
+    when the last user releases it.
+    """
+
+    def __init__(self, factory: Callable = _create_engine):
+        self._factory = factory
+        self._entries: Dict[str, _RegistryEntry] = {}
+        # {engine_type: failure time}; retried after ENGINE_RETRY_INTERVAL (e.g. model files installed later)
+        self._unavailable: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, engine_type: str):
+        """
+        Get a shared engine and take a reference on it
+
+        Args:
+            engine_type: Engine to acquire
+
+        Returns:
+            Initialized engine or None if it is not available
+        """
+        with self._lock:
+            if self._failed_recently(engine_type):
+                return None
+            entry = self._entries.setdefault(engine_type, _RegistryEntry())
+            entry.refs += 1
+
+        # Load outside the registry lock so other engines stay usable meanwhile
+        with entry.load_lock:
+            if entry.engine is None:
+                try:
+                    engine = self._factory(engine_type)
+                except Exception as e:
+                    print(f"Failed to initialize {engine_type}: {e}")
+                    engine = None
+
+                if engine is not None and engine.initialized:
+                    # Aggregates only dispatch to registry engines, which lock themselves
+                    entry.engine = engine if engine_type in AGGREGATE_ENGINES else SharedEngine(engine_type, engine)
+                    print(f"[Engine Registry] Loaded {engine_type}")
+                else:
+                    with self._lock:
+                        self._unavailable[engine_type] = time.time()
+
+        if entry.engine is None:
+            self.release(engine_type)
+            return None
+
+        return entry.engine
+
+    def release(self, engine_type: str):
+        """Drop a reference, unloading the engine when nobody uses it anymore"""
+        with self._lock:
+            entry = self._entries.get(engine_type)
+            if entry is None:
+                return
+            entry.refs -= 1
+            if entry.refs > 0:
+                return
+            del self._entries[engine_type]
+            engine = entry.engine
+
+        if engine is not None:
+            close = getattr(engine, "close", None)
+            if close:
+                close()
+            del engine, entry
+            gc.collect()
+            print(f"[Engine Registry] Unloaded {engine_type}")
+
+    @contextmanager
+    def borrow(self, engine_type: str):
+        """
+        Temporarily hold a reference on an already loaded engine for the duration of a with-block
+
+        Never loads a model (that is acquire's job); yields None when the engine is not loaded.
+        """
+        with self._lock:
+            entry = self._entries.get(engine_type)
+            engine = entry.engine if entry else None
+            if engine is not None:
+                entry.refs += 1
+        try:
+            yield engine
+        finally:
+            if engine is not None:
+                self.release(engine_type)
+
+    def is_available(self, engine_type: str) -> bool:
+        """Check whether an engine can be used, without loading it"""
+        with self._lock:
+            entry = self._entries.get(engine_type)
+            if entry and entry.engine is not None:
+                return True
+            if self._failed_recently(engine_type):
+                return False
+        return _library_available(engine_type)
+
+    def _failed_recently(self, engine_type: str) -> bool:
+        """Whether the engine failed to load within the retry interval (registry lock held)"""
+        failed_at = self._unavailable.get(engine_type)
+        if failed_at is None:
+            return False
+        if time.time() - failed_at >= settings.ENGINE_RETRY_INTERVAL:
+            del self._unavailable[engine_type]
+            return False
+        return True
+
+    def get_stats(self) -> Dict[str, int]:
+        """Loaded engines and their reference counts"""
+        with self._lock:
+            return {t: e.refs for t, e in self._entries.items() if e.engine is not None}
+
+# Global engine registry (one per process)
+engine_registry = EngineRegistry()
@@ -1,110 +1,144 @@
 import cv2
 import numpy as np
 from typing import Optional, Tuple, List, Dict
-from .paddle_engine import PaddleEngine
-from .easyocr_engine import EasyOCREngine
-from .tesseract_engine import TesseractEngine
-from .yolo_engine import YOLOEngine
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from app.config import settings
+from .engine_registry import engine_registry
+from .preprocessing import prepare
+from .base_engine import BaseOCREngine
 from app.utils.plate_formatter import PlateFormatter
 
-class HybridEngine:
+# Shared by all hybrid calls; engines release the GIL inside their native inference code
+_executor = ThreadPoolExecutor(max_workers=settings.HYBRID_MAX_WORKERS, thread_name_prefix="hybrid-ocr")
+
+# Text engines, fastest first; early exit skips the ones that have not started
+ENGINE_COST_ORDER = ('crnn', 'tesseract', 'paddle', 'easy')
+
+class HybridEngine(BaseOCREngine):
     """Hybrid OCR engine that combines multiple engines and selects the best result"""
     
-    def __init__(self):
+    def __init__(self, early_exit_confidence: float = settings.HYBRID_EARLY_EXIT_CONFIDENCE):
         print("Initializing Hybrid OCR Engine...")
         
-        # Initialize all engines
-        self.engines = {}
-        
-        # PaddleOCR
-        try:
-            paddle = PaddleEngine()
-            if paddle.initialized:
-                self.engines['paddle'] = paddle
-                print("✓ PaddleOCR loaded")
-        except Exception as e:
-            print(f"✗ PaddleOCR failed: {e}")
-        
-        # EasyOCR
-        try:
-            easy = EasyOCREngine()
-            if easy.initialized:
-                self.engines['easy'] = easy
-                print("✓ EasyOCR loaded")
-        except Exception as e:
-            print(f"✗ EasyOCR failed: {e}")
+        self.early_exit_confidence = early_exit_confidence
         
-        # Tesseract
-        try:
-            tess = TesseractEngine()
-            if tess.initialized:
-                self.engines['tesseract'] = tess
-                print("✓ Tesseract loaded")
-        except Exception as e:
-            print(f"✗ Tesseract failed: {e}")
+        # Sub-engines come from the process-wide registry, so models already
+        # loaded for other cameras or single-engine mode are shared
+        self.engines = {}
         
-        # YOLO (for detection only)
-        try:
-            yolo = YOLOEngine()
-            if yolo.initialized:
-                self.engines['yolo'] = yolo
-                print("✓ YOLO loaded")
-        except Exception as e:
-            print(f"✗ YOLO failed: {e}")
+        for engine_name, label in [('paddle', 'PaddleOCR'), ('easy', 'EasyOCR'),
+                                   ('tesseract', 'Tesseract'), ('crnn', 'CRNN'), ('yolo', 'YOLO')]:
+            try:
+                engine = engine_registry.acquire(engine_name)
+                if engine is not None:
+                    self.engines[engine_name] = engine
+                    print(f"✓ {label} loaded")
+                else:
+                    print(f"✗ {label} not available")
+            except Exception as e:
+                print(f"✗ {label} failed: {e}")
         
         self.initialized = len(self.engines) > 0
         print(f"Hybrid Engine initialized with {len(self.engines)} engines")
     
-    def recognize_plate(self, image: np.ndarray, use_yolo_detection: bool = True) -> Tuple[Optional[str], float, str]:
+    def close(self):
+        """Release sub-engines back to the registry"""
+        for engine_name in list(self.engines.keys()):
+            engine_registry.release(engine_name)
+        self.engines = {}
+        self.initialized = False
+    
+    def recognize_plate(self, image: np.ndarray, use_yolo_detection: bool = True,
+                        denoise: Optional[str] = None) -> Tuple[Optional[str], float, str]:
         """
         Recognize plate using all engines and return the best result
         
         Args:
             image: Input image (BGR)
             use_yolo_detection: Whether to use YOLO for plate detection first
+            denoise: Denoise filter (None = OCR_DENOISE_METHOD)
         
         Returns:
             (plate_text, confidence, engine_name)
         """
-        if not self.initialized:
-            return None, 0.0, "none"
+        return self.recognize_plates([image], use_yolo_detection, denoise)[0]
+    
+    def recognize_plates(self, images: List[np.ndarray], use_yolo_detection: bool = True,
+                         denoise: Optional[str] = None) -> List[Tuple[Optional[str], float, str]]:
+        """
+        Recognize several images, each engine running once over the whole batch
         
-        # Step 1: Use YOLO to detect and extract plate region (if available)
-        process_image = image
-        if use_yolo_detection and 'yolo' in self.engines:
-            plate_region = self.engines['yolo'].extract_plate_region(image)
-            if plate_region is not None:
-                process_image = plate_region
+        Args:
+            images: Input images (BGR)
+            use_yolo_detection: Whether to use YOLO for plate detection first
+            denoise: Denoise filter (None = OCR_DENOISE_METHOD)
         
-        # Step 2: Run all OCR engines in parallel
-        results = []
+        Returns:
+            [(plate_text, confidence, engine_name)] per image
+        """
+        if not self.initialized or not images:
+            return [(None, 0.0, "none")] * len(images)
         
-        for engine_name, engine in self.engines.items():
-            if engine_name == 'yolo':  # Skip YOLO for text recognition
-                continue
+        # Step 1: Use YOLO to detect and extract plate region (if available)
+        crops = []
+        localized = True  # Every crop is a plate (caller's detector or YOLO found one)
+        for image in images:
+            process_image = image
+            if use_yolo_detection:
+                plate_region = self.engines['yolo'].extract_plate_region(image) if 'yolo' in self.engines else None
+                if plate_region is not None:
+                    process_image = plate_region
+                else:
+                    localized = False
             
-            try:
-                plate_text, confidence = engine.recognize_plate(process_image)
-                
-                if plate_text and len(plate_text) >= 5:  # Minimum plate length
-                    # Validate and format plate
-                    if PlateFormatter.validate_plate(plate_text):
-                        formatted_plate = PlateFormatter.format_plate(plate_text)
-                        results.append({
-                            'text': formatted_plate,
-                            'confidence': confidence,
-                            'engine': engine_name
-                        })
-            except Exception as e:
-                print(f"Error in {engine_name}: {e}")
+            # Grayscale/contrast/denoise are computed once and shared by all engines
+            crops.append(prepare(process_image, denoise or settings.OCR_DENOISE_METHOD))
         
-        if not results:
-            return None, 0.0, "none"
+        # Step 2: Run OCR engines in parallel, cheapest first, HYBRID_PARALLEL_ENGINES at a time
+        waiting = [name for name in ENGINE_COST_ORDER if name in self.engines]
+        running = set()
+        best_results = [None] * len(crops)
         
-        # Step 3: Select best result based on confidence and validation
-        best_result = max(results, key=lambda x: x['confidence'])
+        while waiting or running:
+            while waiting and len(running) < max(1, settings.HYBRID_PARALLEL_ENGINES):
+                engine_name = waiting.pop(0)
+                running.add(_executor.submit(self._run_engine, engine_name, self.engines[engine_name], crops, localized))
+            
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                for index, result in enumerate(future.result()):
+                    if result and (best_results[index] is None or result['confidence'] > best_results[index]['confidence']):
+                        best_results[index] = result
+            
+            # Early exit: every image has a valid plate above the threshold, so
+            # engines still waiting are never started (running ones finish in the background)
+            if all(r and r['confidence'] >= self.early_exit_confidence for r in best_results):
+                break
         
-        return best_result['text'], best_result['confidence'], best_result['engine']
+        # Step 3: Best validated result per image
+        return [(r['text'], r['confidence'], r['engine']) if r else (None, 0.0, "none") for r in best_results]
+    
+    @staticmethod
+    def _run_engine(engine_name: str, engine, images: list, localized: bool = False) -> List[Optional[Dict]]:
+        """Run one engine over a batch and return validated, formatted results (None when invalid)"""
+        try:
+            outputs = engine.recognize_plates(images, localized=localized)
+        except Exception as e:
+            print(f"Error in {engine_name}: {e}")
+            return [None] * len(images)
+        
+        results = []
+        for plate_text, confidence in outputs:
+            # Minimum plate length, then validate and format plate
+            if plate_text and len(plate_text) >= 5 and PlateFormatter.validate_plate(plate_text):
+                results.append({
+                    'text': PlateFormatter.format_plate(plate_text),
+                    'confidence': confidence,
+                    'engine': engine_name
+                })
+            else:
+                results.append(None)
+        return results
     
     def get_available_engines(self) -> List[str]:
         """Get list of available OCR engines"""
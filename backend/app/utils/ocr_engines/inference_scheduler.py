@@ -0,0 +1,264 @@
+import numpy as np
+import time
+from typing import Optional, Dict, List, Callable
+import threading
+from queue import Queue, Empty
+from concurrent.futures import Future
+from app.config import settings
+from .engine_registry import engine_registry
+from .ocr_manager import run_batch, STATEFUL_ENGINES
+from .ocr_worker_pool import OCRWorkerPool
+
+class InferenceRequest:
+    """Single OCR request waiting in the scheduler queue"""
+
+    __slots__ = ("kind", "camera_id", "image", "engine_type", "options", "callback", "future", "submitted_at")
+
+    def __init__(self, kind: str, camera_id: str, image: np.ndarray, engine_type: str,
+                 options: Optional[dict] = None, callback: Optional[Callable] = None):
+        self.kind = kind  # "recognize" or "detect"
+        self.camera_id = camera_id
+        self.image = image
+        self.engine_type = engine_type
+        self.options = options or {}
+        self.callback = callback
+        self.future = Future()
+        self.submitted_at = time.time()
+
+class InferenceScheduler:
+    """Collect OCR requests from all cameras into micro-batches run by shared engines"""
+
+    def __init__(self, max_batch_size: int = 8, max_wait_ms: int = 20, worker_processes: int = 0):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+
+        # Optional multiprocess mode: batches run in worker processes instead of this one
+        self.worker_pool = OCRWorkerPool(worker_processes) if worker_processes > 0 else None
+
+        self.queue: Queue = Queue()
+        self.is_running = False
+        self.thread = None
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.batches = 0
+        self.processed_requests = 0
+        self.avg_batch_size = 0.0
+        self.avg_queue_ms = 0.0
+
+    def start(self):
+        """Start dispatcher thread"""
+        with self._lock:
+            if self.is_running:
+                return
+            self.is_running = True
+
+        self.thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self.thread.start()
+        print("[OCR Scheduler] Started")
+
+    def stop(self):
+        """Stop dispatcher thread and fail pending requests"""
+        with self._lock:
+            if not self.is_running:
+                return
+            self.is_running = False
+
+        if self.thread:
+            self.thread.join(timeout=2)
+
+        if self.worker_pool:
+            self.worker_pool.stop()
+
+        while True:
+            try:
+                request = self.queue.get_nowait()
+            except Empty:
+                break
+            request.future.set_exception(RuntimeError("OCR scheduler stopped"))
+
+        print("[OCR Scheduler] Stopped")
+
+    def acquire_engine(self, engine_type: str) -> bool:
+        """
+        Take a reference on an engine for a camera (loads it once per process)
+
+        Args:
+            engine_type: Engine to acquire
+
+        Returns:
+            True if the engine is usable, False otherwise
+        """
+        if self.worker_pool:
+            return self.worker_pool.acquire_engine(engine_type)
+        return engine_registry.acquire(engine_type) is not None
+
+    def release_engine(self, engine_type: str):
+        """Drop a camera's reference on an engine"""
+        if self.worker_pool:
+            self.worker_pool.release_engine(engine_type)
+        else:
+            engine_registry.release(engine_type)
+
+    def submit(self, camera_id: str, image: np.ndarray, engine_type: str = "hybrid",
+               callback: Optional[Callable] = None, detect: bool = True,
+               denoise: Optional[str] = None) -> Future:
+        """
+        Queue an image for recognition
+
+        Args:
+            camera_id: Requesting camera
+            image: Input image (BGR)
+            engine_type: Engine to run
+            callback: Optional callable receiving (camera_id, (plate_text, confidence, engine_name))
+            detect: Let the engine locate the plate first (False for plate crops)
+            denoise: Denoise filter for this camera (None = OCR_DENOISE_METHOD)
+
+        Returns:
+            Future resolving to (plate_text, confidence, engine_name)
+        """
+        return self._enqueue(InferenceRequest("recognize", camera_id, image, engine_type,
+                                              {"detect": detect, "denoise": denoise}, callback))
+
+    def submit_detection(self, camera_id: str, image: np.ndarray,
+                         callback: Optional[Callable] = None) -> Future:
+        """
+        Queue an image for plate detection
+
+        Args:
+            camera_id: Requesting camera
+            image: Input image (BGR)
+            callback: Optional callable receiving (camera_id, detections)
+
+        Returns:
+            Future resolving to a list of {"bbox": (x1, y1, x2, y2), "confidence": float}
+        """
+        return self._enqueue(InferenceRequest("detect", camera_id, image, "yolo", None, callback))
+
+    def _enqueue(self, request: InferenceRequest) -> Future:
+        self.start()
+        self.queue.put(request)
+        return request.future
+
+    def _dispatch_loop(self):
+        """Collect requests until the batch is full or the oldest one waited max_wait"""
+        while self.is_running:
+            try:
+                first = self.queue.get(timeout=0.5)
+            except Empty:
+                continue
+
+            batch = [first]
+            deadline = first.submitted_at + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except Empty:
+                    break
+
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: List[InferenceRequest]):
+        """Run each engine once over its share of the batch and route results back"""
+        start_time = time.time()
+
+        groups: Dict[tuple, List[InferenceRequest]] = {}
+        for request in batch:
+            groups.setdefault((request.kind, request.engine_type), []).append(request)
+
+        for (kind, engine_type), requests in groups.items():
+            if self.worker_pool:
+                self._submit_to_pool(kind, engine_type, requests)
+                continue
+
+            try:
+                # Cameras hold their own references; an engine nobody acquired yields no results
+                with engine_registry.borrow(engine_type) as engine:
+                    results = run_batch(kind, engine_type, engine, [r.image for r in requests],
+                                        [r.camera_id for r in requests], [r.options for r in requests])
+            except Exception as e:
+                print(f"[OCR Scheduler] Batch error ({kind}/{engine_type}): {e}")
+                results = [self._error_result(kind)] * len(requests)
+
+            self._complete(requests, results)
+
+        # Update statistics (exponential moving averages)
+        queue_ms = sum(start_time - r.submitted_at for r in batch) / len(batch) * 1000
+        self.batches += 1
+        self.processed_requests += len(batch)
+        self.avg_batch_size = 0.9 * self.avg_batch_size + 0.1 * len(batch) if self.batches > 1 else float(len(batch))
+        self.avg_queue_ms = 0.9 * self.avg_queue_ms + 0.1 * queue_ms if self.batches > 1 else queue_ms
+
+    @staticmethod
+    def _error_result(kind: str):
+        return [] if kind == "detect" else (None, 0.0, "error")
+
+    def _submit_to_pool(self, kind: str, engine_type: str, requests: List[InferenceRequest]):
+        """Hand a group to worker processes and keep collecting the next batch"""
+        if engine_type in STATEFUL_ENGINES:
+            # Per-camera engine state lives in one worker, so pin each camera to a worker
+            partitions: Dict[int, List[InferenceRequest]] = {}
+            for request in requests:
+                partitions.setdefault(self.worker_pool.worker_for(request.camera_id), []).append(request)
+        else:
+            partitions = {None: requests}
+
+        for worker_index, part in partitions.items():
+            future = self.worker_pool.submit_batch(
+                kind, engine_type, [r.image for r in part], [r.camera_id for r in part],
+                [r.options for r in part], worker_index
+            )
+            future.add_done_callback(lambda f, part=part, kind=kind: self._complete_from_future(kind, part, f))
+
+    def get_engine_stats(self, engine_type: str, camera_id: str) -> Optional[Dict]:
+        """Per-camera statistics of a stateful engine (in-process mode only)"""
+        if self.worker_pool:
+            return None
+        with engine_registry.borrow(engine_type) as engine:
+            get_camera_stats = getattr(engine, "get_camera_stats", None)
+            return get_camera_stats(camera_id) if get_camera_stats else None
+
+    def _complete_from_future(self, kind: str, requests: List[InferenceRequest], future: Future):
+        """Route a worker pool batch result back to the requests"""
+        try:
+            results = future.result()
+        except Exception as e:
+            print(f"[OCR Scheduler] Worker batch error: {e}")
+            results = [self._error_result(kind)] * len(requests)
+        self._complete(requests, results)
+
+    def _complete(self, requests: List[InferenceRequest], results: list):
+        """Resolve futures and invoke camera callbacks"""
+        for request, result in zip(requests, results):
+            request.future.set_result(result)
+            if request.callback:
+                try:
+                    request.callback(request.camera_id, result)
+                except Exception as e:
+                    print(f"[OCR Scheduler] Callback error: {e}")
+
+    def get_stats(self) -> Dict:
+        """Get scheduler statistics"""
+        return {
+            "is_running": self.is_running,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": int(self.max_wait * 1000),
+            "queue_depth": self.queue.qsize(),
+            "batches": self.batches,
+            "processed_requests": self.processed_requests,
+            "avg_batch_size": round(self.avg_batch_size, 2),
+            "avg_queue_ms": round(self.avg_queue_ms, 2),
+            "loaded_engines": engine_registry.get_stats(),
+            "worker_pool": self.worker_pool.get_stats() if self.worker_pool else None
+        }
+
+# Global inference scheduler shared by all OCR pipelines
+inference_scheduler = InferenceScheduler(
+    max_batch_size=settings.OCR_BATCH_MAX_SIZE,
+    max_wait_ms=settings.OCR_BATCH_MAX_WAIT_MS,
+    worker_processes=settings.OCR_WORKER_PROCESSES
+)
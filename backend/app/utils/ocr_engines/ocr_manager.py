@@ -1,42 +1,139 @@
 import cv2
 import numpy as np
-from typing import Optional, Tuple, Literal
-from .paddle_engine import PaddleEngine
-from .easyocr_engine import EasyOCREngine
-from .tesseract_engine import TesseractEngine
-from .yolo_engine import YOLOEngine
-from .hybrid_engine import HybridEngine
+from typing import Optional, Tuple, Literal, List, Dict
+from app.config import settings
+from .engine_registry import engine_registry
+from .preprocessing import prepare
 
-OCREngineType = Literal["paddle", "easy", "tesseract", "yolo", "hybrid"]
+OCREngineType = Literal["paddle", "easy", "tesseract", "crnn", "yolo", "hybrid", "cascade"]
+
+ENGINE_TYPES = ["paddle", "easy", "tesseract", "crnn", "yolo", "hybrid", "cascade"]
+
+# Engines that keep per-camera state (results depend on which camera a frame came from)
+STATEFUL_ENGINES = ("cascade",)
+
+def run_engine(engine_type: str, engine, image: np.ndarray,
+               camera_id: Optional[str] = None, use_detection: bool = True,
+               denoise: Optional[str] = None) -> Tuple[Optional[str], float, str]:
+    """
+    Run a single engine and normalize its output
+    
+    Args:
+        engine_type: Engine type key
+        engine: Engine instance (from the registry)
+        image: Input image (BGR)
+        camera_id: Camera the image comes from (used by the cascade engine)
+        use_detection: Let hybrid/cascade locate the plate with YOLO first
+            (False when the image is already a plate crop)
+        denoise: Denoise filter of the shared preprocessing stage (None = OCR_DENOISE_METHOD)
+    
+    Returns:
+        (plate_text, confidence, engine_name)
+    """
+    return run_engine_batch(engine_type, engine, [image], camera_id, use_detection, denoise)[0]
+
+def run_engine_batch(engine_type: str, engine, images: List[np.ndarray],
+                     camera_id: Optional[str] = None, use_detection: bool = True,
+                     denoise: Optional[str] = None) -> List[Tuple[Optional[str], float, str]]:
+    """
+    Run a single engine over several images at once (see run_engine)
+    
+    Returns:
+        [(plate_text, confidence, engine_name)] per image
+    """
+    if not engine or not engine.initialized:
+        return [(None, 0.0, "none")] * len(images)
+    
+    try:
+        if engine_type == "hybrid":
+            return engine.recognize_plates(images, use_yolo_detection=use_detection, denoise=denoise)
+        elif engine_type == "cascade":
+            return engine.recognize_plates(images, camera_id=camera_id, use_yolo_detection=use_detection,
+                                           denoise=denoise)
+        else:
+            if engine_type != "yolo":
+                # Text engines read their variant from the shared preprocessing stage
+                images = [prepare(image, denoise or settings.OCR_DENOISE_METHOD) for image in images]
+            # Without detection the images are whole frames/ROIs, not plate crops
+            return [(plate_text, confidence, engine_type)
+                    for plate_text, confidence in engine.recognize_plates(images, localized=not use_detection)]
+    except Exception as e:
+        print(f"Recognition error: {e}")
+        return [(None, 0.0, "error")] * len(images)
+
+def run_task(kind: str, engine_type: str, engine, image: np.ndarray,
+             camera_id: Optional[str] = None, options: Optional[dict] = None):
+    """
+    Run one scheduler task
+    
+    Args:
+        kind: "recognize" (returns (plate_text, confidence, engine_name)) or
+              "detect" (returns list of {"bbox", "confidence"} from the plate detector)
+        engine_type: Engine type key
+        engine: Engine instance (from the registry)
+        image: Input image (BGR)
+        camera_id: Camera the image comes from
+        options: Task options ({"detect": bool, "denoise": str} for recognition)
+    """
+    return run_batch(kind, engine_type, engine, [image], [camera_id], [options])[0]
+
+def run_batch(kind: str, engine_type: str, engine, images: List[np.ndarray],
+              camera_ids: List[Optional[str]], options: List[Optional[dict]]) -> list:
+    """
+    Run several scheduler tasks of one engine, batching those that share options
+    
+    Returns:
+        One run_task result per image, in order
+    """
+    if kind == "detect":
+        if not engine or not engine.initialized:
+            return [[] for _ in images]
+        return [engine.detect_plates(image) for image in images]
+    
+    # Requests with the same options (and camera, for stateful engines) form one engine call
+    groups: Dict[tuple, List[int]] = {}
+    for index, (camera_id, image_options) in enumerate(zip(camera_ids, options)):
+        image_options = image_options or {}
+        key = (camera_id if engine_type in STATEFUL_ENGINES else None,
+               image_options.get("detect", True), image_options.get("denoise"))
+        groups.setdefault(key, []).append(index)
+    
+    results = [None] * len(images)
+    for (camera_id, use_detection, denoise), indices in groups.items():
+        group_results = run_engine_batch(engine_type, engine, [images[i] for i in indices],
+                                         camera_id, use_detection, denoise)
+        for index, result in zip(indices, group_results):
+            results[index] = result
+    return results
 
 class OCRManager:
-    """Manage OCR engines and switch between them"""
+    """Manage OCR engines and switch between them
+    
+    Engines are acquired from the process-wide engine registry, so several
+    managers share the same loaded models.
+    """
     
-    def __init__(self, default_engine: OCREngineType = "hybrid"):
+    def __init__(self, default_engine: OCREngineType = "hybrid", preload: bool = True):
         self.current_engine = default_engine
         self.engines = {}
         
         # Initialize engines lazily
-        self._initialize_engine(default_engine)
+        if preload:
+            self._initialize_engine(default_engine)
     
     def _initialize_engine(self, engine_type: OCREngineType):
-        """Initialize a specific engine"""
+        """Acquire a specific engine from the registry"""
         if engine_type in self.engines:
             return
         
-        try:
-            if engine_type == "paddle":
-                self.engines[engine_type] = PaddleEngine()
-            elif engine_type == "easy":
-                self.engines[engine_type] = EasyOCREngine()
-            elif engine_type == "tesseract":
-                self.engines[engine_type] = TesseractEngine()
-            elif engine_type == "yolo":
-                self.engines[engine_type] = YOLOEngine()
-            elif engine_type == "hybrid":
-                self.engines[engine_type] = HybridEngine()
-        except Exception as e:
-            print(f"Failed to initialize {engine_type}: {e}")
+        engine = engine_registry.acquire(engine_type)
+        if engine is not None:
+            self.engines[engine_type] = engine
+    
+    def _release_engine(self, engine_type: OCREngineType):
+        """Give an engine back to the registry"""
+        if self.engines.pop(engine_type, None) is not None:
+            engine_registry.release(engine_type)
     
     def set_engine(self, engine_type: OCREngineType) -> bool:
         """
@@ -52,7 +149,10 @@ class OCRManager:
             self._initialize_engine(engine_type)
             
             if engine_type in self.engines and self.engines[engine_type].initialized:
+                previous_engine = self.current_engine
                 self.current_engine = engine_type
+                if previous_engine != engine_type:
+                    self._release_engine(previous_engine)
                 print(f"Switched to {engine_type} engine")
                 return True
             else:
@@ -62,43 +162,46 @@ class OCRManager:
             print(f"Failed to switch engine: {e}")
             return False
     
-    def recognize_plate(self, image: np.ndarray) -> Tuple[Optional[str], float, str]:
+    def recognize_plate(self, image: np.ndarray, camera_id: Optional[str] = None) -> Tuple[Optional[str], float, str]:
         """
         Recognize plate using current engine
         
         Args:
             image: Input image (BGR)
+            camera_id: Camera the image comes from (used by the cascade engine)
         
         Returns:
             (plate_text, confidence, engine_name)
         """
-        engine = self.engines.get(self.current_engine)
+        self._initialize_engine(self.current_engine)
+        return run_engine(self.current_engine, self.engines.get(self.current_engine), image, camera_id)
+    
+    def recognize_plates(self, images: List[np.ndarray], camera_id: Optional[str] = None) -> List[Tuple[Optional[str], float, str]]:
+        """
+        Recognize several images with one call of the current engine
         
-        if not engine or not engine.initialized:
-            return None, 0.0, "none"
+        Args:
+            images: Input images (BGR)
+            camera_id: Camera the images come from (used by the cascade engine)
         
-        try:
-            if self.current_engine == "hybrid":
-                return engine.recognize_plate(image)
-            else:
-                plate_text, confidence = engine.recognize_plate(image)
-                return plate_text, confidence, self.current_engine
-        except Exception as e:
-            print(f"Recognition error: {e}")
-            return None, 0.0, "error"
+        Returns:
+            [(plate_text, confidence, engine_name)] per image
+        """
+        self._initialize_engine(self.current_engine)
+        return run_engine_batch(self.current_engine, self.engines.get(self.current_engine), images, camera_id)
     
     def get_current_engine(self) -> str:
         """Get current engine name"""
         return self.current_engine
     
     def get_available_engines(self) -> list:
-        """Get list of available engines"""
-        available = []
-        for engine_type in ["paddle", "easy", "tesseract", "yolo", "hybrid"]:
-            self._initialize_engine(engine_type)
-            if engine_type in self.engines and self.engines[engine_type].initialized:
-                available.append(engine_type)
-        return available
+        """Get list of available engines (without loading their models)"""
+        return [engine_type for engine_type in ENGINE_TYPES if engine_registry.is_available(engine_type)]
+    
+    def close(self):
+        """Release all engines held by this manager"""
+        for engine_type in list(self.engines.keys()):
+            self._release_engine(engine_type)
 
-# Global OCR manager instance
-ocr_manager = OCRManager()
\ No newline at end of file
+# Global OCR manager instance (models are loaded on first use, not on import)
+ocr_manager = OCRManager(preload=False)
\ No newline at end of file
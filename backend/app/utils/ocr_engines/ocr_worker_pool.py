@@ -0,0 +1,403 @@
+import os
+import time
+import itertools
+import zlib
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from concurrent.futures import Future
+from queue import Empty
+from typing import Optional, Dict, List, Tuple, Callable
+import numpy as np
+
+SEGMENT_ALIGN = 64
+SEGMENT_GRANULARITY = 1024 * 1024  # Segments are rounded up to whole MBs so they can be reused
+
+def _worker_main(worker_index: int, task_queue, result_queue):
+    """OCR worker process: owns its own engine registry and reads frames from shared memory"""
+    from .engine_registry import engine_registry
+    from .ocr_manager import run_batch
+
+    segments: Dict[str, shared_memory.SharedMemory] = {}
+    held = set()
+
+    print(f"[OCR Worker {worker_index}] Started (pid {os.getpid()})")
+
+    while True:
+        message = task_queue.get()
+        if message is None:
+            break
+
+        kind = message[0]
+
+        if kind == "acquire":
+            _, request_id, engine_type = message
+            if engine_type not in held and engine_registry.acquire(engine_type) is not None:
+                held.add(engine_type)
+            result_queue.put(("ack", request_id, worker_index, engine_type in held))
+
+        elif kind == "release":
+            _, engine_type = message
+            if engine_type in held:
+                held.discard(engine_type)
+                engine_registry.release(engine_type)
+
+        elif kind == "close":
+            # The parent replaced this segment; drop our mapping so memory is freed
+            _, segment_name = message
+            segment = segments.pop(segment_name, None)
+            if segment is not None:
+                try:
+                    segment.close()
+                except BufferError:
+                    pass
+
+        elif kind == "batch":
+            _, batch_id, kind, engine_type, segment_name, layouts, camera_ids, options = message
+            try:
+                segment = segments.get(segment_name)
+                if segment is None:
+                    # Spawned workers share the parent's resource tracker, which owns unlinking
+                    segment = shared_memory.SharedMemory(name=segment_name)
+                    segments[segment_name] = segment
+
+                # Zero-copy views into the parent's buffer
+                images = [np.ndarray(shape, dtype=dtype, buffer=segment.buf, offset=offset)
+                          for offset, shape, dtype in layouts]
+
+                with engine_registry.borrow(engine_type) as engine:
+                    results = run_batch(kind, engine_type, engine, images, camera_ids, options)
+                del images
+
+                result_queue.put(("batch", batch_id, worker_index, results, None))
+            except Exception as e:
+                result_queue.put(("batch", batch_id, worker_index, None, str(e)))
+
+    for engine_type in held:
+        engine_registry.release(engine_type)
+    for segment in segments.values():
+        segment.close()
+
+class SharedBufferPool:
+    """Reusable shared-memory segments used to hand batches of images to workers"""
+
+    def __init__(self, max_segments: int, on_evict: Optional[Callable[[str], None]] = None):
+        self.max_segments = max_segments
+        self.on_evict = on_evict  # Called with the name of each segment that is unlinked
+        self._free: List[shared_memory.SharedMemory] = []
+        self._all: List[shared_memory.SharedMemory] = []
+        self._condition = threading.Condition()
+
+    def acquire(self, nbytes: int, timeout: float = 10.0) -> Optional[shared_memory.SharedMemory]:
+        """Get the smallest free segment that fits, creating one if the pool is not full"""
+        deadline = time.time() + timeout
+        with self._condition:
+            while True:
+                fitting = [s for s in self._free if s.size >= nbytes]
+                if fitting:
+                    segment = min(fitting, key=lambda s: s.size)
+                    self._free.remove(segment)
+                    return segment
+
+                if len(self._all) < self.max_segments:
+                    size = -(-nbytes // SEGMENT_GRANULARITY) * SEGMENT_GRANULARITY
+                    segment = shared_memory.SharedMemory(create=True, size=size)
+                    self._all.append(segment)
+                    return segment
+
+                if self._free:
+                    # Pool is full but nothing fits: replace the largest free segment
+                    victim = max(self._free, key=lambda s: s.size)
+                    self._free.remove(victim)
+                    self._all.remove(victim)
+                    victim.close()
+                    victim.unlink()
+                    if self.on_evict:
+                        self.on_evict(victim.name)
+                    continue
+
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self._condition.wait(timeout=remaining):
+                    return None
+
+    def release(self, segment: shared_memory.SharedMemory):
+        with self._condition:
+            self._free.append(segment)
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            for segment in self._all:
+                try:
+                    segment.close()
+                    segment.unlink()
+                except Exception:
+                    pass
+            self._all = []
+            self._free = []
+
+class OCRWorkerPool:
+    """Pool of OCR worker processes fed through shared memory (escapes the GIL)"""
+
+    def __init__(self, num_workers: int, max_segments: Optional[int] = None):
+        self.num_workers = max(1, num_workers)
+        self.buffers = SharedBufferPool(max_segments or self.num_workers * 4, on_evict=self._close_segment)
+
+        self.is_running = False
+        self.context = mp.get_context("spawn")
+        self.processes: List = []
+        self.task_queues: List = []
+        self.result_queue = None
+        self.result_thread = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+        # batch_id -> (worker_index, future, segment)
+        self.pending: Dict[int, Tuple[int, Future, shared_memory.SharedMemory]] = {}
+        # request_id -> (future, acks)
+        self.pending_acks: Dict[int, Tuple[Future, List[bool]]] = {}
+        self.outstanding = [0] * self.num_workers
+        self.engine_refs: Dict[str, int] = {}
+
+        # Statistics
+        self.batches = 0
+        self.worker_restarts = 0
+
+    def start(self):
+        """Spawn worker processes"""
+        with self._lock:
+            if self.is_running:
+                return
+            self.is_running = True
+
+        self.result_queue = self.context.Queue()
+        for index in range(self.num_workers):
+            self.task_queues.append(self.context.Queue())
+            self.processes.append(self._spawn(index))
+
+        self.result_thread = threading.Thread(target=self._result_loop, daemon=True)
+        self.result_thread.start()
+        print(f"[OCR Pool] Started {self.num_workers} worker processes")
+
+    def _spawn(self, index: int):
+        process = self.context.Process(
+            target=_worker_main,
+            args=(index, self.task_queues[index], self.result_queue),
+            daemon=True
+        )
+        process.start()
+        return process
+
+    def stop(self):
+        """Stop workers and fail pending batches"""
+        with self._lock:
+            if not self.is_running:
+                return
+            self.is_running = False
+
+        for task_queue in self.task_queues:
+            task_queue.put(None)
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+        if self.result_thread:
+            self.result_thread.join(timeout=2)
+
+        with self._lock:
+            pending = list(self.pending.values())
+            self.pending = {}
+        for _, future, segment in pending:
+            future.set_exception(RuntimeError("OCR worker pool stopped"))
+
+        self.buffers.close()
+        self.processes = []
+        self.task_queues = []
+        print("[OCR Pool] Stopped")
+
+    def _broadcast_acquire(self, engine_type: str, timeout: float) -> bool:
+        """Ask every worker to load an engine and wait for all acknowledgements"""
+        request_id = next(self._ids)
+        future = Future()
+        with self._lock:
+            self.pending_acks[request_id] = (future, [])
+        for task_queue in self.task_queues:
+            task_queue.put(("acquire", request_id, engine_type))
+        try:
+            return future.result(timeout=timeout)
+        except Exception:
+            with self._lock:
+                self.pending_acks.pop(request_id, None)
+            return False
+
+    def acquire_engine(self, engine_type: str, timeout: float = 300.0) -> bool:
+        """
+        Take a reference on an engine in every worker process
+
+        Args:
+            engine_type: Engine to load
+            timeout: Seconds to wait for workers to load the model
+
+        Returns:
+            True if every worker loaded the engine
+        """
+        self.start()
+
+        with self._lock:
+            refs = self.engine_refs.get(engine_type, 0)
+            self.engine_refs[engine_type] = refs + 1
+        if refs > 0:
+            return True
+
+        if not self._broadcast_acquire(engine_type, timeout):
+            self.release_engine(engine_type)
+            return False
+        return True
+
+    def release_engine(self, engine_type: str):
+        """Drop a reference; workers unload the engine when it reaches zero"""
+        with self._lock:
+            refs = self.engine_refs.get(engine_type, 0) - 1
+            if refs > 0:
+                self.engine_refs[engine_type] = refs
+                return
+            self.engine_refs.pop(engine_type, None)
+        for task_queue in self.task_queues:
+            task_queue.put(("release", engine_type))
+
+    def worker_for(self, camera_id: str) -> int:
+        """Stable worker index for a camera (keeps per-camera engine state in one process)"""
+        return zlib.crc32(camera_id.encode()) % self.num_workers
+
+    def submit_batch(self, kind: str, engine_type: str, images: List[np.ndarray],
+                     camera_ids: List[str], options: List[dict],
+                     worker_index: Optional[int] = None) -> Future:
+        """
+        Copy a batch into shared memory and hand it to a worker
+
+        Args:
+            kind: "recognize" or "detect"
+            engine_type: Engine to run
+            images: Input images (BGR)
+            camera_ids: Camera of each image
+            options: Task options of each image
+            worker_index: Worker to use, or None for the least busy one
+
+        Returns:
+            Future resolving to a list of per-image results (see run_task)
+        """
+        self.start()
+        future = Future()
+
+        # Pack images back to back, 64-byte aligned
+        layouts = []
+        offset = 0
+        for image in images:
+            layouts.append((offset, image.shape, image.dtype.str))
+            offset += -(-image.nbytes // SEGMENT_ALIGN) * SEGMENT_ALIGN
+
+        segment = self.buffers.acquire(max(offset, 1))
+        if segment is None:
+            future.set_exception(RuntimeError("No shared memory available (workers overloaded)"))
+            return future
+
+        for image, (image_offset, shape, dtype) in zip(images, layouts):
+            np.ndarray(shape, dtype=dtype, buffer=segment.buf, offset=image_offset)[...] = image
+
+        batch_id = next(self._ids)
+        with self._lock:
+            if worker_index is None:
+                worker_index = min(range(self.num_workers), key=lambda i: self.outstanding[i])
+            self.outstanding[worker_index] += 1
+            self.pending[batch_id] = (worker_index, future, segment)
+
+        self.task_queues[worker_index].put(("batch", batch_id, kind, engine_type, segment.name,
+                                             layouts, camera_ids, options))
+        return future
+
+    def _close_segment(self, segment_name: str):
+        """Tell workers to unmap a segment the buffer pool replaced"""
+        for task_queue in self.task_queues:
+            task_queue.put(("close", segment_name))
+
+    def _result_loop(self):
+        """Resolve futures from worker replies and respawn crashed workers"""
+        last_check = time.time()
+        while self.is_running:
+            # Check liveness on a schedule: under load the queue is never idle
+            if time.time() - last_check >= 1.0:
+                self._check_workers()
+                last_check = time.time()
+
+            try:
+                message = self.result_queue.get(timeout=1.0)
+            except Empty:
+                continue
+            except (EOFError, OSError):
+                break
+
+            kind = message[0]
+
+            if kind == "ack":
+                _, request_id, _, ok = message
+                with self._lock:
+                    entry = self.pending_acks.get(request_id)
+                    if entry is None:
+                        continue
+                    future, acks = entry
+                    acks.append(ok)
+                    if len(acks) < self.num_workers:
+                        continue
+                    del self.pending_acks[request_id]
+                future.set_result(all(acks))
+
+            elif kind == "batch":
+                _, batch_id, worker_index, results, error = message
+                with self._lock:
+                    entry = self.pending.pop(batch_id, None)
+                    self.outstanding[worker_index] = max(0, self.outstanding[worker_index] - 1)
+                    self.batches += 1
+                if entry is None:
+                    continue
+                _, future, segment = entry
+                self.buffers.release(segment)
+                if error:
+                    future.set_exception(RuntimeError(error))
+                else:
+                    future.set_result(results)
+
+    def _check_workers(self):
+        """Fail batches of dead workers and start replacements"""
+        for index, process in enumerate(self.processes):
+            if process.is_alive() or not self.is_running:
+                continue
+
+            print(f"[OCR Pool] Worker {index} died (exit code {process.exitcode}), restarting")
+            with self._lock:
+                lost = [(b, e) for b, e in self.pending.items() if e[0] == index]
+                for batch_id, _ in lost:
+                    del self.pending[batch_id]
+                self.outstanding[index] = 0
+                engine_types = list(self.engine_refs.keys())
+                self.worker_restarts += 1
+
+            for _, (_, future, segment) in lost:
+                self.buffers.release(segment)
+                future.set_exception(RuntimeError(f"OCR worker {index} died"))
+
+            self.task_queues[index] = self.context.Queue()
+            self.processes[index] = self._spawn(index)
+            for engine_type in engine_types:
+                self.task_queues[index].put(("acquire", 0, engine_type))
+
+    def get_stats(self) -> Dict:
+        """Get worker pool statistics"""
+        return {
+            "workers": self.num_workers,
+            "alive_workers": sum(1 for p in self.processes if p.is_alive()),
+            "outstanding_batches": list(self.outstanding),
+            "batches": self.batches,
+            "worker_restarts": self.worker_restarts,
+            "engines": dict(self.engine_refs)
+        }
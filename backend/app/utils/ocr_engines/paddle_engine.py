@@ -1,6 +1,8 @@
 import cv2
 import numpy as np
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union, List
+from .preprocessing import PreprocessedImage, prepare
+from .base_engine import BaseOCREngine
 import os
 
 try:
@@ -10,7 +12,7 @@ except Exception as e:
     print(f"PaddleOCR not available: {e}")
     PADDLE_AVAILABLE = False
 
-class PaddleEngine:
+class PaddleEngine(BaseOCREngine):
     """PaddleOCR engine for Turkish plate recognition"""
     
     def __init__(self):
@@ -28,12 +30,12 @@ class PaddleEngine:
             print(f"PaddleOCR initialization error: {e}")
             self.initialized = False
     
-    def recognize_plate(self, image: np.ndarray) -> Tuple[Optional[str], float]:
+    def recognize_plate(self, image: Union[np.ndarray, PreprocessedImage]) -> Tuple[Optional[str], float]:
         """
         Recognize plate from image
         
         Args:
-            image: Input image (BGR)
+            image: Input image (BGR) or a shared PreprocessedImage
         
         Returns:
             (plate_text, confidence) or (None, 0.0)
@@ -77,24 +79,50 @@ class PaddleEngine:
             print(f"PaddleOCR recognition error: {e}")
             return None, 0.0
     
-    def _preprocess(self, image: np.ndarray) -> np.ndarray:
-        """Preprocess image for better OCR"""
-        # Convert to grayscale
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image
+    def recognize_plates(self, images: List[Union[np.ndarray, PreprocessedImage]],
+                         localized: bool = False) -> List[Tuple[Optional[str], float]]:
+        """
+        Recognize several plate crops in one recognizer call
         
-        # Increase contrast
-        gray = cv2.convertScaleAbs(gray, alpha=1.5, beta=10)
+        Detected plate crops skip text detection and the recognizer runs on
+        the whole list at once. Anything else (full frames, motion ROIs) still
+        needs text detection, so it is read image by image.
         
-        # Denoise
-        gray = cv2.fastNlMeansDenoising(gray)
+        Args:
+            images: Plate crops (BGR) or shared PreprocessedImages
+            localized: Every image is a detected plate crop
         
-        # Threshold
-        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        Returns:
+            [(plate_text, confidence) or (None, 0.0)] per image
+        """
+        if not self.initialized or not images:
+            return [(None, 0.0)] * len(images)
+        if not localized:
+            return super().recognize_plates(images)
         
-        return binary
+        try:
+            # Recognizer expects 3-channel input
+            processed = [cv2.cvtColor(self._preprocess(image), cv2.COLOR_GRAY2BGR) for image in images]
+            
+            # A nested list is recognized as one batch
+            result = self.ocr.ocr([processed], det=False, cls=True)
+            
+            plates = []
+            for text, conf in (result[0] if result else []):
+                plate_text = self._filter_plate_chars(text.upper())
+                plates.append((plate_text, conf) if plate_text else (None, 0.0))
+            
+            if len(plates) != len(images):
+                return super().recognize_plates(images)
+            return plates
+            
+        except Exception as e:
+            print(f"PaddleOCR batch recognition error: {e}")
+            return [(None, 0.0)] * len(images)
+    
+    def _preprocess(self, image: Union[np.ndarray, PreprocessedImage]) -> np.ndarray:
+        """Preprocess image for better OCR (intermediates are shared with other engines)"""
+        return prepare(image).otsu()
     
     def _filter_plate_chars(self, text: str) -> str:
         """Filter only valid Turkish plate characters"""
@@ -0,0 +1,83 @@
+import cv2
+import threading
+import numpy as np
+from typing import Optional, Union
+
+# Cheapest last: nlmeans is the most accurate and by far the slowest
+DENOISE_METHODS = ("nlmeans", "bilateral", "median", "none")
+
+class PreprocessedImage:
+    """Preprocessing intermediates of one plate crop, computed once and shared by all engines
+
+    Every variant is built lazily on first use and cached, so engines running
+    concurrently on the same crop (hybrid) denoise it only once.
+    """
+
+    def __init__(self, image: np.ndarray, denoise: Optional[str] = None):
+        self.image = image  # Original crop (BGR)
+        self.denoise_method = denoise if denoise in DENOISE_METHODS else "nlmeans"
+        self._cache = {}
+        self._lock = threading.RLock()
+
+    def _get(self, key, build):
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = build()
+            return self._cache[key]
+
+    def gray(self) -> np.ndarray:
+        """Grayscale crop"""
+        return self._get("gray", lambda: cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+                         if len(self.image.shape) == 3 else self.image)
+
+    def contrast(self) -> np.ndarray:
+        """Grayscale with increased contrast"""
+        return self._get("contrast", lambda: cv2.convertScaleAbs(self.gray(), alpha=1.5, beta=10))
+
+    def denoised(self) -> np.ndarray:
+        """Contrast image after the configured denoise filter"""
+        return self._get("denoised", lambda: apply_denoise(self.contrast(), self.denoise_method))
+
+    def otsu(self) -> np.ndarray:
+        """Otsu-binarized denoised image"""
+        return self._get("otsu", lambda: cv2.threshold(
+            self.denoised(), 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1])
+
+    def adaptive(self) -> np.ndarray:
+        """Adaptive (Gaussian) binarized denoised image"""
+        return self._get("adaptive", lambda: cv2.adaptiveThreshold(
+            self.denoised(), 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2))
+
+    def upscaled_otsu(self, scale_factor: int = 2) -> np.ndarray:
+        """Otsu-binarized, upscaled image (denoised before upscaling, which is much cheaper)"""
+        def build():
+            gray = self.denoised()
+            size = (int(gray.shape[1] * scale_factor), int(gray.shape[0] * scale_factor))
+            gray = cv2.resize(gray, size, interpolation=cv2.INTER_CUBIC)
+            return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+        return self._get(("upscaled_otsu", scale_factor), build)
+
+def apply_denoise(gray: np.ndarray, method: str = "nlmeans") -> np.ndarray:
+    """
+    Denoise a grayscale image
+
+    Args:
+        gray: Grayscale image
+        method: nlmeans, bilateral, median or none
+
+    Returns:
+        Denoised image
+    """
+    if method == "none":
+        return gray
+    elif method == "median":
+        return cv2.medianBlur(gray, 3)
+    elif method == "bilateral":
+        return cv2.bilateralFilter(gray, 5, 50, 50)
+    return cv2.fastNlMeansDenoising(gray)
+
+def prepare(image: Union[np.ndarray, PreprocessedImage], denoise: Optional[str] = None) -> PreprocessedImage:
+    """Wrap a crop for preprocessing (already wrapped crops are returned as they are)"""
+    if isinstance(image, PreprocessedImage):
+        return image
+    return PreprocessedImage(image, denoise)
@@ -0,0 +1,254 @@
+"""INT8 quantization of the ONNX plate models (detector and recognizer)
+
+Usage (from the backend directory):
+
+    python -m app.utils.ocr_engines.quantization quantize --model models/plate.onnx \
+        --kind detector --mode static --calibration-dir data/plate_crops
+    python -m app.utils.ocr_engines.quantization report --model models/plate.onnx \
+        --kind detector --images data/plate_crops
+
+Quantized models are written next to the original as <name>.int8.onnx and
+are picked up by the engines when OCR_INT8 is enabled.
+"""
+import os
+import sys
+import time
+import argparse
+import cv2
+import numpy as np
+from typing import Optional, List, Dict
+from app.config import settings
+
+try:
+    import onnxruntime as ort
+    from onnxruntime.quantization import (quantize_dynamic, quantize_static, CalibrationDataReader,
+                                          QuantFormat, QuantType)
+    QUANTIZATION_AVAILABLE = True
+except ImportError:
+    QUANTIZATION_AVAILABLE = False
+    CalibrationDataReader = object
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+def quantized_path(model_path: str) -> str:
+    """models/plate.onnx -> models/plate.int8.onnx"""
+    root, _ = os.path.splitext(model_path)
+    return root + ".int8.onnx"
+
+def resolve_model(model_path: str) -> str:
+    """Model file to load: the INT8 variant when OCR_INT8 is on and it exists"""
+    if settings.OCR_INT8 and model_path.lower().endswith(".onnx"):
+        candidate = quantized_path(model_path)
+        if os.path.exists(candidate):
+            return candidate
+        print(f"OCR_INT8 enabled but {candidate} not found, using FP32 model")
+    return model_path
+
+def list_images(folder: str, limit: Optional[int] = None) -> List[str]:
+    paths = sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    return paths[:limit] if limit else paths
+
+def model_input(image: np.ndarray, input_shape: list, kind: str) -> np.ndarray:
+    """
+    Build the model input tensor for an image, as the engines do at inference time
+
+    Args:
+        image: Input image (BGR)
+        input_shape: Model input shape (NCHW, dynamic dims as strings/None)
+        kind: "detector" (letterboxed RGB, 0..1) or "recognizer" (resized, -1..1)
+    """
+    if kind == "detector":
+        from .yolo_engine import letterbox
+        size = input_shape[2] if isinstance(input_shape[2], int) else settings.PLATE_DETECTOR_INPUT_SIZE
+        padded, _, _ = letterbox(image, size)
+        return cv2.dnn.blobFromImage(padded, 1 / 255.0, swapRB=True)
+
+    from .crnn_engine import recognizer_input
+    channels = input_shape[1] if isinstance(input_shape[1], int) else 1
+    height = input_shape[2] if isinstance(input_shape[2], int) else 32
+    width = input_shape[3] if isinstance(input_shape[3], int) else 128
+    return recognizer_input(image, height, width, channels)
+
+class PlateCropCalibrationReader(CalibrationDataReader):
+    """Feeds our own plate crops (or frames, for the detector) to static calibration"""
+
+    def __init__(self, model_path: str, folder: str, kind: str, limit: int = 200):
+        session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        model_in = session.get_inputs()[0]
+        self.input_name = model_in.name
+        self.input_shape = model_in.shape
+        self.kind = kind
+        self.paths = list_images(folder, limit)
+        self._iterator = iter(self.paths)
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        for path in self._iterator:
+            image = cv2.imread(path)
+            if image is not None:
+                return {self.input_name: model_input(image, self.input_shape, self.kind)}
+        return None
+
+    def rewind(self):
+        self._iterator = iter(self.paths)
+
+def quantize_model(model_path: str, mode: str = "dynamic", kind: str = "detector",
+                   calibration_dir: Optional[str] = None, output_path: Optional[str] = None,
+                   calibration_limit: int = 200) -> str:
+    """
+    Quantize an ONNX model to INT8
+
+    Args:
+        model_path: FP32 ONNX model
+        mode: "dynamic" (weights only, no data needed) or "static" (weights and activations)
+        kind: "detector" or "recognizer" (selects calibration preprocessing)
+        calibration_dir: Folder of plate crops/frames (required for static)
+        output_path: Destination (default <name>.int8.onnx)
+        calibration_limit: Max calibration images
+
+    Returns:
+        Path of the quantized model
+    """
+    if not QUANTIZATION_AVAILABLE:
+        raise RuntimeError("ONNX Runtime quantization not available. Install onnxruntime.")
+
+    output_path = output_path or quantized_path(model_path)
+
+    if mode == "static":
+        if not calibration_dir:
+            raise ValueError("Static quantization needs --calibration-dir")
+        reader = PlateCropCalibrationReader(model_path, calibration_dir, kind, calibration_limit)
+        if not reader.paths:
+            raise ValueError(f"No images found in {calibration_dir}")
+        print(f"Calibrating on {len(reader.paths)} images...")
+        quantize_static(model_path, output_path, reader,
+                        quant_format=QuantFormat.QDQ,
+                        activation_type=QuantType.QUInt8,
+                        weight_type=QuantType.QInt8,
+                        per_channel=True)
+    else:
+        quantize_dynamic(model_path, output_path, weight_type=QuantType.QUInt8)
+
+    print(f"Quantized model written to {output_path} "
+          f"({os.path.getsize(model_path) / 1e6:.1f} MB -> {os.path.getsize(output_path) / 1e6:.1f} MB)")
+    return output_path
+
+def _session(model_path: str, threads: int) -> "ort.InferenceSession":
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if threads > 0:
+        options.intra_op_num_threads = threads
+    return ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+
+def _compare_outputs(kind: str, reference: np.ndarray, candidate: np.ndarray) -> float:
+    """Agreement of two outputs for one image (1.0 = identical decision)"""
+    if kind == "detector":
+        # Same best box? (IoU of the highest scoring predictions)
+        def best_box(output):
+            predictions = output[0].T if output[0].shape[0] < output[0].shape[1] else output[0]
+            row = predictions[predictions[:, 4:].max(axis=1).argmax()]
+            cx, cy, w, h = row[:4]
+            return cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2
+        from app.utils.plate_tracker import bbox_iou
+        return bbox_iou(best_box(reference), best_box(candidate))
+
+    # Recognizer: same per-timestep argmax (same decoded text)
+    return float(np.mean(reference.argmax(axis=-1) == candidate.argmax(axis=-1)))
+
+def benchmark(model_path: str, quantized_model_path: str, images_dir: str, kind: str = "detector",
+              threads: int = 0, limit: int = 200, repeats: int = 3) -> Dict:
+    """
+    Side-by-side latency and agreement of the FP32 and INT8 models
+
+    Returns:
+        {"fp32": {...}, "int8": {...}, "agreement": float, "speedup": float}
+    """
+    if not QUANTIZATION_AVAILABLE:
+        raise RuntimeError("ONNX Runtime not available. Install onnxruntime.")
+
+    sessions = {"fp32": _session(model_path, threads), "int8": _session(quantized_model_path, threads)}
+    model_in = sessions["fp32"].get_inputs()[0]
+
+    images = [cv2.imread(path) for path in list_images(images_dir, limit)]
+    inputs = [model_input(image, model_in.shape, kind) for image in images if image is not None]
+    if not inputs:
+        raise ValueError(f"No images found in {images_dir}")
+
+    report = {}
+    outputs = {}
+    for name, session in sessions.items():
+        path = model_path if name == "fp32" else quantized_model_path
+        session.run(None, {model_in.name: inputs[0]})  # Warm up
+        latencies = []
+        outputs[name] = []
+        for blob in inputs:
+            for repeat in range(repeats):
+                start_time = time.perf_counter()
+                output = session.run(None, {model_in.name: blob})[0]
+                latencies.append((time.perf_counter() - start_time) * 1000)
+            outputs[name].append(output)
+        latencies.sort()
+        report[name] = {
+            "model": path,
+            "size_mb": round(os.path.getsize(path) / 1e6, 2),
+            "avg_ms": round(sum(latencies) / len(latencies), 2),
+            "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2)
+        }
+
+    report["images"] = len(inputs)
+    report["agreement"] = round(float(np.mean([
+        _compare_outputs(kind, reference, candidate)
+        for reference, candidate in zip(outputs["fp32"], outputs["int8"])
+    ])), 4)
+    report["speedup"] = round(report["fp32"]["avg_ms"] / max(report["int8"]["avg_ms"], 1e-6), 2)
+    return report
+
+def print_report(report: Dict):
+    print(f"{'':6} {'size MB':>8} {'avg ms':>8} {'p95 ms':>8}")
+    for name in ("fp32", "int8"):
+        row = report[name]
+        print(f"{name:6} {row['size_mb']:>8} {row['avg_ms']:>8} {row['p95_ms']:>8}")
+    print(f"Images: {report['images']}  Speedup: {report['speedup']}x  "
+          f"Agreement with FP32: {report['agreement'] * 100:.1f}%")
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="INT8 quantization of the ONNX plate models")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    quantize_parser = commands.add_parser("quantize", help="Write an INT8 copy of a model")
+    quantize_parser.add_argument("--model", required=True)
+    quantize_parser.add_argument("--kind", choices=["detector", "recognizer"], default="detector")
+    quantize_parser.add_argument("--mode", choices=["dynamic", "static"], default="dynamic")
+    quantize_parser.add_argument("--calibration-dir", help="Folder of plate crops (static mode)")
+    quantize_parser.add_argument("--calibration-limit", type=int, default=200)
+    quantize_parser.add_argument("--output")
+    quantize_parser.add_argument("--report", action="store_true", help="Benchmark on the calibration images afterwards")
+
+    report_parser = commands.add_parser("report", help="Compare FP32 and INT8 latency/agreement")
+    report_parser.add_argument("--model", required=True)
+    report_parser.add_argument("--quantized", help="INT8 model (default <name>.int8.onnx)")
+    report_parser.add_argument("--kind", choices=["detector", "recognizer"], default="detector")
+    report_parser.add_argument("--images", required=True, help="Folder of plate crops/frames")
+    report_parser.add_argument("--threads", type=int, default=0)
+    report_parser.add_argument("--limit", type=int, default=200)
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "quantize":
+            output_path = quantize_model(args.model, args.mode, args.kind, args.calibration_dir,
+                                         args.output, args.calibration_limit)
+            if args.report and args.calibration_dir:
+                print_report(benchmark(args.model, output_path, args.calibration_dir, args.kind))
+        else:
+            print_report(benchmark(args.model, args.quantized or quantized_path(args.model),
+                                   args.images, args.kind, args.threads, args.limit))
+    except (RuntimeError, ValueError, FileNotFoundError) as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,15 @@
 import cv2
 import numpy as np
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union
+from .preprocessing import PreprocessedImage, prepare
+from .base_engine import BaseOCREngine
 try:
     import pytesseract
     TESSERACT_AVAILABLE = True
 except ImportError:
     TESSERACT_AVAILABLE = False
 
-class TesseractEngine:
+class TesseractEngine(BaseOCREngine):
     """Tesseract OCR engine for Turkish plate recognition"""
     
     def __init__(self):
@@ -24,12 +26,12 @@ class TesseractEngine:
             print(f"Tesseract initialization error: {e}")
             self.initialized = False
     
-    def recognize_plate(self, image: np.ndarray) -> Tuple[Optional[str], float]:
+    def recognize_plate(self, image: Union[np.ndarray, PreprocessedImage]) -> Tuple[Optional[str], float]:
         """
         Recognize plate from image
         
         Args:
-            image: Input image (BGR)
+            image: Input image (BGR) or a shared PreprocessedImage
         
         Returns:
             (plate_text, confidence) or (None, 0.0)
@@ -72,30 +74,9 @@ class TesseractEngine:
             print(f"Tesseract recognition error: {e}")
             return None, 0.0
     
-    def _preprocess(self, image: np.ndarray) -> np.ndarray:
-        """Preprocess image for better OCR"""
-        # Convert to grayscale
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image
-        
-        # Resize for better recognition
-        scale_factor = 2
-        width = int(gray.shape[1] * scale_factor)
-        height = int(gray.shape[0] * scale_factor)
-        gray = cv2.resize(gray, (width, height), interpolation=cv2.INTER_CUBIC)
-        
-        # Increase contrast
-        gray = cv2.convertScaleAbs(gray, alpha=1.5, beta=10)
-        
-        # Denoise
-        gray = cv2.fastNlMeansDenoising(gray)
-        
-        # Threshold
-        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        
-        return binary
+    def _preprocess(self, image: Union[np.ndarray, PreprocessedImage]) -> np.ndarray:
+        """Preprocess image for better OCR (intermediates are shared with other engines)"""
+        return prepare(image).upscaled_otsu(scale_factor=2)
     
     def _filter_plate_chars(self, text: str) -> str:
         """Filter only valid Turkish plate characters"""
@@ -1,16 +1,114 @@
+import os
+import functools
 import cv2
 import numpy as np
 from typing import Optional, Tuple, List
+from app.config import settings
+from .base_engine import BaseOCREngine
 try:
     from ultralytics import YOLO
     YOLO_AVAILABLE = True
 except ImportError:
     YOLO_AVAILABLE = False
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+try:
+    try:
+        from openvino import Core
+    except ImportError:
+        from openvino.runtime import Core
+    OPENVINO_AVAILABLE = True
+except ImportError:
+    OPENVINO_AVAILABLE = False
+
+DEFAULT_YOLO_MODEL = 'yolov8n.pt'
+
+def detector_available() -> bool:
+    """Whether the configured plate detector can be loaded (ONNX model, or ultralytics model with a plate class)"""
+    if settings.PLATE_DETECTOR_MODEL and _is_exported_model(settings.PLATE_DETECTOR_MODEL):
+        return ONNXRUNTIME_AVAILABLE or OPENVINO_AVAILABLE
+    if not YOLO_AVAILABLE:
+        return False
+    # Same check as YOLOEngine: a generic model without plate classes does not initialize
+    names = _model_class_names(settings.PLATE_DETECTOR_MODEL or DEFAULT_YOLO_MODEL)
+    return names is not None and bool(YOLOEngine._plate_classes(names))
+
+@functools.lru_cache(maxsize=4)
+def _model_class_names(model_path: str):
+    """Class names of an ultralytics model (loaded once per path), None if it cannot be loaded"""
+    try:
+        return YOLO(model_path).names
+    except Exception as e:
+        print(f"YOLO model {model_path} could not be loaded: {e}")
+        return None
+
+def _is_exported_model(model_path: str) -> bool:
+    return os.path.splitext(model_path)[1].lower() in (".onnx", ".xml")
+
+def letterbox(image: np.ndarray, size: int) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """
+    Resize keeping the aspect ratio and pad to a size x size square
+    
+    Returns:
+        (padded_image, scale, (pad_x, pad_y))
+    """
+    height, width = image.shape[:2]
+    scale = min(size / height, size / width)
+    new_width, new_height = int(round(width * scale)), int(round(height * scale))
+    pad_x, pad_y = (size - new_width) // 2, (size - new_height) // 2
+    
+    padded = np.full((size, size, 3), 114, dtype=np.uint8)
+    padded[pad_y:pad_y + new_height, pad_x:pad_x + new_width] = cv2.resize(
+        image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    return padded, scale, (pad_x, pad_y)
 
-class YOLOEngine:
-    """YOLO-based plate detection and recognition"""
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> List[int]:
+    """
+    Non-maximum suppression (vectorized over the remaining boxes)
     
-    def __init__(self, model_path: Optional[str] = None):
+    Args:
+        boxes: (N, 4) array of x1, y1, x2, y2
+        scores: (N,) array of confidences
+        iou_threshold: Boxes overlapping a kept box more than this are dropped
+    
+    Returns:
+        Indices of kept boxes, best first
+    """
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size > 0:
+        best = order[0]
+        keep.append(int(best))
+        rest = order[1:]
+        ix1 = np.maximum(boxes[best, 0], boxes[rest, 0])
+        iy1 = np.maximum(boxes[best, 1], boxes[rest, 1])
+        ix2 = np.minimum(boxes[best, 2], boxes[rest, 2])
+        iy2 = np.minimum(boxes[best, 3], boxes[rest, 3])
+        intersection = np.maximum(0, ix2 - ix1) * np.maximum(0, iy2 - iy1)
+        iou = intersection / (areas[best] + areas[rest] - intersection + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return keep
+
+class YOLOEngine(BaseOCREngine):
+    """YOLO-based plate detection and recognition
+    
+    A dedicated plate detector exported to ONNX (.onnx) or OpenVINO IR (.xml)
+    runs on ONNX Runtime / OpenVINO with a fixed input size; otherwise the
+    ultralytics model is used.
+    """
+    
+    def __init__(self, model_path: Optional[str] = None, backend: Optional[str] = None):
+        model_path = model_path or settings.PLATE_DETECTOR_MODEL
+        self.backend = None
+        
+        if model_path and _is_exported_model(model_path):
+            self.initialized = self._load_exported(model_path, backend or settings.PLATE_DETECTOR_BACKEND)
+            return
+        
         if not YOLO_AVAILABLE:
             print("YOLO not available. Install ultralytics.")
             self.initialized = False
@@ -19,12 +117,119 @@ class YOLOEngine:
         try:
             # Use YOLOv8 nano model for plate detection
             # In production, use a custom trained model
-            self.model = YOLO('yolov8n.pt') if not model_path else YOLO(model_path)
+            self.model = YOLO(model_path or DEFAULT_YOLO_MODEL)
+            self.backend = "ultralytics"
+            self.plate_classes = self._plate_classes(self.model.names)
+            if not self.plate_classes:
+                # A generic model (e.g. COCO yolov8n) would report cars and people as plates
+                print(f"YOLO model {model_path or DEFAULT_YOLO_MODEL} has no plate class, "
+                      f"set PLATE_DETECTOR_MODEL to a plate detector")
+                self.initialized = False
+                return
             self.initialized = True
         except Exception as e:
             print(f"YOLO initialization error: {e}")
             self.initialized = False
     
+    @staticmethod
+    def _plate_classes(names) -> List[int]:
+        """
+        Class ids of the model that are plates
+        
+        PLATE_DETECTOR_CLASSES names them explicitly; otherwise classes named
+        like "plate", or the only class of a single-class model.
+        """
+        names = dict(enumerate(names)) if isinstance(names, (list, tuple)) else dict(names)
+        if settings.PLATE_DETECTOR_CLASSES:
+            wanted = {name.strip().lower() for name in settings.PLATE_DETECTOR_CLASSES.split(",")}
+            return [i for i, name in names.items() if str(name).lower() in wanted or str(i) in wanted]
+        if len(names) == 1:
+            return list(names)
+        return [i for i, name in names.items() if "plate" in str(name).lower()]
+    
+    def _load_exported(self, model_path: str, backend: str) -> bool:
+        """Load an exported single-class plate detector on ONNX Runtime or OpenVINO"""
+        if backend == "auto":
+            use_openvino = OPENVINO_AVAILABLE and (model_path.lower().endswith(".xml") or not ONNXRUNTIME_AVAILABLE)
+            backend = "openvino" if use_openvino else "onnxruntime"
+        
+        from .quantization import resolve_model
+        model_path = resolve_model(model_path)
+        threads = settings.PLATE_DETECTOR_THREADS
+        self.input_size = settings.PLATE_DETECTOR_INPUT_SIZE
+        
+        try:
+            if backend == "openvino":
+                if not OPENVINO_AVAILABLE:
+                    print("OpenVINO not available. Install openvino.")
+                    return False
+                core = Core()
+                config = {"PERFORMANCE_HINT": "LATENCY"}
+                if threads > 0:
+                    config["INFERENCE_NUM_THREADS"] = threads
+                model = core.read_model(model_path)
+                input_shape = model.inputs[0].get_partial_shape()
+                if input_shape.is_static:
+                    self.input_size = int(input_shape[2].get_length())
+                self.model = core.compile_model(model, "CPU", config)
+                self._output = self.model.output(0)
+            else:
+                if not ONNXRUNTIME_AVAILABLE:
+                    print("ONNX Runtime not available. Install onnxruntime.")
+                    return False
+                options = ort.SessionOptions()
+                options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                if threads > 0:
+                    options.intra_op_num_threads = threads
+                self.model = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+                model_input = self.model.get_inputs()[0]
+                self._input_name = model_input.name
+                if isinstance(model_input.shape[2], int):
+                    self.input_size = model_input.shape[2]
+            
+            self.backend = backend
+            print(f"Plate detector {model_path} loaded on {backend} ({self.input_size}x{self.input_size})")
+            return True
+        except Exception as e:
+            print(f"Plate detector initialization error: {e}")
+            return False
+    
+    def _detect_exported(self, image: np.ndarray) -> List[dict]:
+        """Letterbox, run the exported model and decode its boxes back to image coordinates"""
+        padded, scale, (pad_x, pad_y) = letterbox(image, self.input_size)
+        blob = cv2.dnn.blobFromImage(padded, 1 / 255.0, swapRB=True)
+        
+        if self.backend == "openvino":
+            output = self.model([blob])[self._output]
+        else:
+            output = self.model.run(None, {self._input_name: blob})[0]
+        
+        predictions = output[0]
+        if predictions.shape[0] < predictions.shape[1]:
+            # YOLOv8 layout: (4 + classes, anchors), class scores only
+            predictions = predictions.T
+            scores = predictions[:, 4:].max(axis=1)
+        else:
+            # YOLOv5 layout: (anchors, 5 + classes), objectness times class score
+            scores = predictions[:, 4] * (predictions[:, 5:].max(axis=1) if predictions.shape[1] > 5 else 1.0)
+        
+        mask = scores >= settings.PLATE_DETECTION_CONFIDENCE
+        if not mask.any():
+            return []
+        predictions, scores = predictions[mask], scores[mask]
+        
+        # (cx, cy, w, h) in letterbox space -> (x1, y1, x2, y2) in image space
+        cx, cy, w, h = predictions[:, 0], predictions[:, 1], predictions[:, 2], predictions[:, 3]
+        boxes = np.stack([cx - w / 2 - pad_x, cy - h / 2 - pad_y, cx + w / 2 - pad_x, cy + h / 2 - pad_y], axis=1) / scale
+        height, width = image.shape[:2]
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+        
+        return [
+            {"bbox": tuple(int(v) for v in boxes[i]), "confidence": float(scores[i])}
+            for i in nms(boxes, scores, settings.PLATE_DETECTOR_IOU)
+        ]
+    
     def detect_plates(self, image: np.ndarray) -> List[dict]:
         """
         Detect license plates in image
@@ -39,7 +244,10 @@ class YOLOEngine:
             return []
         
         try:
-            results = self.model(image, verbose=False)
+            if self.backend != "ultralytics":
+                return self._detect_exported(image)
+            
+            results = self.model(image, verbose=False, classes=self.plate_classes)
             
             plates = []
             for result in results:
@@ -102,18 +310,34 @@ class YOLOEngine:
         Returns:
             Cropped plate image or None
         """
-        plates = self.detect_plates(image)
+        regions = self.extract_plate_regions(image)
         
-        if not plates:
+        if not regions:
             return None
         
-        # Get the plate with highest confidence
-        best_plate = max(plates, key=lambda x: x['confidence'])
-        x1, y1, x2, y2 = best_plate['bbox']
+        # Crop of the plate with highest confidence
+        return regions[0][1]
+    
+    def extract_plate_regions(self, image: np.ndarray, min_confidence: float = 0.0) -> List[Tuple[tuple, np.ndarray]]:
+        """
+        Extract every detected plate region from image
+        
+        Args:
+            image: Input image (BGR)
+            min_confidence: Detections below this are skipped
+        
+        Returns:
+            [((x1, y1, x2, y2), cropped_plate)], highest confidence first
+        """
+        plates = sorted((p for p in self.detect_plates(image) if p['confidence'] >= min_confidence),
+                        key=lambda x: x['confidence'], reverse=True)
         
-        # Crop the plate region
-        plate_img = image[y1:y2, x1:x2]
-        return plate_img
+        regions = []
+        for plate in plates:
+            x1, y1, x2, y2 = plate['bbox']
+            if x2 > x1 and y2 > y1:
+                regions.append(((x1, y1, x2, y2), image[y1:y2, x1:x2]))
+        return regions
     
     def get_engine_name(self) -> str:
-        return "YOLO"
\ No newline at end of file
+        return "YOLO" if self.backend == "ultralytics" else f"YOLO ({self.backend})"
\ No newline at end of file
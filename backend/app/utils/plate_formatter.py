@@ -3,6 +3,9 @@ import re
 class PlateFormatter:
     """Turkish license plate formatter and validator"""
     
+    # Characters a formatted plate can contain
+    ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    
     @staticmethod
     def format_plate(plate_text: str) -> str:
         """
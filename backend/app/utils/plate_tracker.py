@@ -0,0 +1,278 @@
+import itertools
+from difflib import SequenceMatcher
+from typing import Optional, Dict, List, Tuple
+from app.utils.plate_formatter import PlateFormatter
+
+def bbox_iou(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> float:
+    """Intersection over union of two (x1, y1, x2, y2) boxes"""
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    intersection = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    if intersection == 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return intersection / float(area_a + area_b - intersection)
+
+def bbox_center_distance(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> float:
+    """Distance between box centers, relative to the width of box a"""
+    ax, ay = (a[0] + a[2]) / 2.0, (a[1] + a[3]) / 2.0
+    bx, by = (b[0] + b[2]) / 2.0, (b[1] + b[3]) / 2.0
+    width = max(1, a[2] - a[0])
+    return ((ax - bx) ** 2 + (ay - by) ** 2) ** 0.5 / width
+
+class PlateTrack:
+    """One plate followed across frames, with all of its OCR readings"""
+
+    def __init__(self, track_id: int, bbox: Tuple[int, int, int, int], timestamp: float):
+        self.track_id = track_id
+        self.bbox = bbox
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.last_detected = timestamp  # Unlike last_seen, not refreshed by hold()
+        self.hits = 1
+        self.readings: List[Tuple[str, float, str]] = []  # (plate, confidence, engine)
+        self.emitted = False
+        self.last_frame_seq = None
+        self.last_frame_timestamp = None
+
+    def add_reading(self, plate: str, confidence: float, engine: str):
+        self.readings.append((plate, confidence, engine))
+
+    def vote(self) -> Tuple[Optional[str], float, int]:
+        """
+        Per-character confidence voting over all readings of the track
+
+        Readings are grouped by length (the length with the highest total
+        confidence wins), then every character position picks the character
+        with the highest summed confidence.
+
+        Returns:
+            (plate, confidence, supporting_readings) - confidence is the mean
+            per-position vote share times the mean reading confidence
+        """
+        if not self.readings:
+            return None, 0.0, 0
+
+        length_weights: Dict[int, float] = {}
+        for plate, confidence, _ in self.readings:
+            length_weights[len(plate)] = length_weights.get(len(plate), 0.0) + confidence
+        length = max(length_weights, key=length_weights.get)
+        readings = [r for r in self.readings if len(r[0]) == length]
+
+        chars = []
+        shares = []
+        for position in range(length):
+            weights: Dict[str, float] = {}
+            for plate, confidence, _ in readings:
+                weights[plate[position]] = weights.get(plate[position], 0.0) + confidence
+            char = max(weights, key=weights.get)
+            total = sum(weights.values())
+            chars.append(char)
+            shares.append(weights[char] / total if total > 0 else 0.0)
+
+        plate = ''.join(chars)
+        mean_confidence = sum(r[1] for r in readings) / len(readings)
+        confidence = (sum(shares) / len(shares)) * mean_confidence
+        supporting = sum(1 for r in self.readings if r[0] == plate)
+
+        return plate, confidence, supporting
+
+    def best_engine(self, plate: str) -> str:
+        """Engine that produced the most readings of the voted plate"""
+        counts: Dict[str, int] = {}
+        for reading, _, engine in self.readings:
+            if reading == plate:
+                counts[engine] = counts.get(engine, 0) + 1
+        return max(counts, key=counts.get) if counts else "vote"
+
+class PlateTracker:
+    """Per-camera tracker linking plate boxes across frames and voting their readings"""
+
+    def __init__(self, camera_id: str,
+                 iou_threshold: float = 0.3,
+                 max_center_distance: float = 1.5,
+                 max_age: float = 1.5,
+                 stability_readings: int = 3,
+                 min_confidence: float = 0.6,
+                 reemit_interval: float = 10.0,
+                 min_text_similarity: float = 0.5):
+        self.camera_id = camera_id
+        self.iou_threshold = iou_threshold
+        self.max_center_distance = max_center_distance  # In plate widths
+        self.max_age = max_age  # Seconds without a detection before a track ends
+        self.stability_readings = stability_readings
+        self.min_confidence = min_confidence
+        self.reemit_interval = reemit_interval  # Same plate from a new track is suppressed for this long
+        self.min_text_similarity = min_text_similarity  # Readings this different never join a track
+
+        self.tracks: Dict[int, PlateTrack] = {}
+        self._ids = itertools.count(1)
+        self.recent_plates: Dict[str, float] = {}
+
+        # Statistics
+        self.total_tracks = 0
+        self.finalized_events = 0
+        self.suppressed_events = 0
+
+    def _match(self, detections: List[Dict]) -> List[Tuple[Dict, Optional[PlateTrack]]]:
+        """Greedy IoU matching, falling back to center distance for fast-moving plates"""
+        voted = {track.track_id: track.vote()[0] for track in self.tracks.values()}
+
+        candidates = []
+        for d_index, detection in enumerate(detections):
+            plate = detection.get("plate")
+            for track in self.tracks.values():
+                # A clearly different plate is another car, even at the same position
+                if plate and voted[track.track_id] and \
+                        SequenceMatcher(None, plate, voted[track.track_id]).ratio() < self.min_text_similarity:
+                    continue
+
+                iou = bbox_iou(track.bbox, detection["bbox"])
+                if iou >= self.iou_threshold:
+                    candidates.append((1.0 + iou, d_index, track.track_id))
+                else:
+                    distance = bbox_center_distance(track.bbox, detection["bbox"])
+                    if distance <= self.max_center_distance:
+                        candidates.append((1.0 - distance / (self.max_center_distance + 1e-6), d_index, track.track_id))
+
+        matched_detections = {}
+        used_tracks = set()
+        for _, d_index, track_id in sorted(candidates, reverse=True):
+            if d_index in matched_detections or track_id in used_tracks:
+                continue
+            matched_detections[d_index] = self.tracks[track_id]
+            used_tracks.add(track_id)
+
+        return [(detection, matched_detections.get(i)) for i, detection in enumerate(detections)]
+
+    def find_track(self, bbox: Tuple[int, int, int, int]) -> Optional[PlateTrack]:
+        """Active track whose last box best overlaps bbox (used before OCR has run)"""
+        best_track, best_iou = None, self.iou_threshold
+        for track in self.tracks.values():
+            iou = bbox_iou(track.bbox, bbox)
+            if iou >= best_iou:
+                best_track, best_iou = track, iou
+        return best_track
+
+    def update(self, detections: List[Dict], timestamp: float,
+               frame_seq: Optional[int] = None, frame_timestamp: Optional[float] = None) -> List[Dict]:
+        """
+        Feed one frame of detections
+
+        Args:
+            detections: [{"bbox": (x1, y1, x2, y2), "plate": str or None,
+                          "confidence": float, "engine": str}]
+            timestamp: Time of the frame
+            frame_seq: Capture sequence number of the frame
+            frame_timestamp: Capture timestamp of the frame
+
+        Returns:
+            Finalized plate events (one per track, at most once)
+        """
+        for detection, track in self._match(detections):
+            if track is None:
+                track = PlateTrack(next(self._ids), detection["bbox"], timestamp)
+                self.tracks[track.track_id] = track
+                self.total_tracks += 1
+            else:
+                track.bbox = detection["bbox"]
+                track.last_seen = timestamp
+                track.last_detected = timestamp
+                track.hits += 1
+
+            track.last_frame_seq = frame_seq
+            track.last_frame_timestamp = frame_timestamp
+            detection["track_id"] = track.track_id
+
+            plate = detection.get("plate")
+            if plate and PlateFormatter.validate_plate(plate):
+                track.add_reading(PlateFormatter.format_plate(plate), detection.get("confidence", 0.0),
+                                  detection.get("engine", "unknown"))
+
+        events = []
+
+        # Stable tracks are finalized early (car still in view)
+        for track in self.tracks.values():
+            if not track.emitted:
+                plate, confidence, supporting = track.vote()
+                if plate and supporting >= self.stability_readings and confidence >= self.min_confidence:
+                    self._emit(track, timestamp, events)
+
+        # Ended tracks are finalized with whatever they collected
+        for track_id in [t for t, track in self.tracks.items() if timestamp - track.last_seen > self.max_age]:
+            track = self.tracks.pop(track_id)
+            if not track.emitted:
+                self._emit(track, timestamp, events)
+
+        return events
+
+    def hold(self, timestamp: float) -> List[Dict]:
+        """
+        Feed a frame that was skipped for lack of motion
+
+        Nothing moved, so every tracked plate is still where it was last seen
+        (e.g. a car waiting at the gate). Tracks are kept alive for max_age
+        after their last detection as usual; then a track with a voted plate
+        is finalized but stays alive (the car is still there, so it must not
+        come back as a new track), and one without a plate ends.
+
+        Returns:
+            Finalized plate events
+        """
+        events = []
+        for track in self.tracks.values():
+            if timestamp - track.last_detected <= self.max_age:
+                track.last_seen = timestamp
+            elif track.vote()[0]:
+                if not track.emitted:
+                    self._emit(track, timestamp, events)
+                track.last_seen = timestamp
+        return events + self.update([], timestamp)
+
+    def flush(self, timestamp: float) -> List[Dict]:
+        """End all tracks (pipeline stopping) and return their pending events"""
+        events = []
+        for track in self.tracks.values():
+            if not track.emitted:
+                self._emit(track, timestamp, events)
+        self.tracks = {}
+        return events
+
+    def _emit(self, track: PlateTrack, timestamp: float, events: List[Dict]):
+        track.emitted = True
+        plate, confidence, supporting = track.vote()
+        if not plate or confidence < self.min_confidence:
+            return
+
+        # Forget old entries, then suppress a plate re-acquired by a new track
+        self.recent_plates = {p: t for p, t in self.recent_plates.items() if timestamp - t < self.reemit_interval}
+        if plate in self.recent_plates:
+            self.recent_plates[plate] = timestamp
+            self.suppressed_events += 1
+            return
+        self.recent_plates[plate] = timestamp
+
+        self.finalized_events += 1
+        events.append({
+            "camera_id": self.camera_id,
+            "plate": plate,
+            "confidence": confidence,
+            "engine": track.best_engine(plate),
+            "timestamp": timestamp,
+            "frame_seq": track.last_frame_seq,
+            "frame_timestamp": track.last_frame_timestamp,
+            "bbox": track.bbox,
+            "track_id": track.track_id,
+            "readings": len(track.readings),
+            "supporting_readings": supporting
+        })
+
+    def get_stats(self) -> Dict:
+        """Get tracker statistics"""
+        return {
+            "active_tracks": len(self.tracks),
+            "total_tracks": self.total_tracks,
+            "finalized_events": self.finalized_events,
+            "suppressed_events": self.suppressed_events
+        }
@@ -0,0 +1,70 @@
+import cv2
+import numpy as np
+from typing import Optional, Dict, Tuple
+
+def dhash(image: np.ndarray, hash_size: int = 8) -> int:
+    """
+    Difference hash of an image (cheap perceptual hash)
+
+    Args:
+        image: Input image (BGR or grayscale)
+        hash_size: Hash is hash_size * hash_size bits
+
+    Returns:
+        Hash as an integer
+    """
+    if len(image.shape) == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+class RecognitionCache:
+    """Last OCR result per plate track, reused while the plate crop looks the same"""
+
+    def __init__(self, max_distance: int = 6, max_age: float = 10.0):
+        self.max_distance = max_distance  # Hamming distance (of 64 bits) still counted as "same crop"
+        self.max_age = max_age  # Seconds before a cached result is refreshed anyway
+
+        # {track_id: (hash, (plate_text, confidence, engine_name), timestamp)}
+        self.entries: Dict[int, Tuple[int, tuple, float]] = {}
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, track_id: int, crop_hash: int, timestamp: float) -> Optional[tuple]:
+        """
+        Get the cached result of a track if the crop did not change materially
+
+        Returns:
+            (plate_text, confidence, engine_name) or None
+        """
+        entry = self.entries.get(track_id)
+        if entry and timestamp - entry[2] <= self.max_age and \
+                hamming_distance(entry[0], crop_hash) <= self.max_distance:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        return None
+
+    def store(self, track_id: int, crop_hash: int, result: tuple, timestamp: float):
+        self.entries[track_id] = (crop_hash, result, timestamp)
+
+    def prune(self, active_track_ids):
+        """Forget tracks that ended"""
+        for track_id in [t for t in self.entries if t not in active_track_ids]:
+            del self.entries[track_id]
+
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0
+        }
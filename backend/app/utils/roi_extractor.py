@@ -1,6 +1,6 @@
 import cv2
 import numpy as np
-from typing import Optional, Tuple
+from typing import Optional, Tuple, List
 
 class ROIExtractor:
     """Extract Region of Interest for plate detection"""
@@ -21,22 +21,78 @@ class ROIExtractor:
             return frame
         
         try:
-            x1 = roi_coords.get("x1", 0)
-            y1 = roi_coords.get("y1", 0)
-            x2 = roi_coords.get("x2", frame.shape[1])
-            y2 = roi_coords.get("y2", frame.shape[0])
-            
-            # Ensure coordinates are within frame bounds
-            x1 = max(0, min(x1, frame.shape[1]))
-            y1 = max(0, min(y1, frame.shape[0]))
-            x2 = max(0, min(x2, frame.shape[1]))
-            y2 = max(0, min(y2, frame.shape[0]))
-            
+            x1, y1, x2, y2 = ROIExtractor.clamp_roi(frame.shape, roi_coords)
             return frame[y1:y2, x1:x2]
         except Exception as e:
             print(f"ROI extraction error: {e}")
             return frame
     
+    @staticmethod
+    def clamp_roi(frame_shape: tuple, roi_coords: Optional[dict] = None) -> Tuple[int, int, int, int]:
+        """
+        Resolve ROI coordinates against a frame size
+        
+        Args:
+            frame_shape: Shape of the frame (height, width, ...)
+            roi_coords: {"x1": int, "y1": int, "x2": int, "y2": int} or None for full frame
+        
+        Returns:
+            (x1, y1, x2, y2) within frame bounds
+        """
+        height, width = frame_shape[:2]
+        if not roi_coords:
+            return 0, 0, width, height
+        
+        x1 = roi_coords.get("x1", 0)
+        y1 = roi_coords.get("y1", 0)
+        x2 = roi_coords.get("x2", width)
+        y2 = roi_coords.get("y2", height)
+        
+        # Ensure coordinates are within frame bounds
+        x1 = max(0, min(x1, width))
+        y1 = max(0, min(y1, height))
+        x2 = max(0, min(x2, width))
+        y2 = max(0, min(y2, height))
+        
+        return x1, y1, x2, y2
+    
+    @staticmethod
+    def dynamic_roi(frame_shape: tuple, boxes: List[Tuple[int, int, int, int]],
+                    static_roi: Optional[Tuple[int, int, int, int]] = None,
+                    margin: float = 0.2, min_size: int = 320) -> Tuple[int, int, int, int]:
+        """
+        Union of moving/tracked regions, padded and clamped to the static ROI
+        
+        Args:
+            frame_shape: Shape of the frame (height, width, ...)
+            boxes: (x1, y1, x2, y2) regions that must be covered
+            static_roi: (x1, y1, x2, y2) limit, or None for the full frame
+            margin: Padding added on each side, relative to the union size
+            min_size: Minimum width/height of the result (context for the detector)
+        
+        Returns:
+            (x1, y1, x2, y2) - the static ROI when there is nothing to cover
+        """
+        height, width = frame_shape[:2]
+        sx1, sy1, sx2, sy2 = static_roi or (0, 0, width, height)
+        if not boxes:
+            return sx1, sy1, sx2, sy2
+        
+        x1 = min(b[0] for b in boxes)
+        y1 = min(b[1] for b in boxes)
+        x2 = max(b[2] for b in boxes)
+        y2 = max(b[3] for b in boxes)
+        
+        pad_x = max(int((x2 - x1) * margin), (min_size - (x2 - x1)) // 2, 0)
+        pad_y = max(int((y2 - y1) * margin), (min_size - (y2 - y1)) // 2, 0)
+        x1, x2 = max(sx1, x1 - pad_x), min(sx2, x2 + pad_x)
+        y1, y2 = max(sy1, y1 - pad_y), min(sy2, y2 + pad_y)
+        
+        if x2 <= x1 or y2 <= y1:
+            # Motion only outside the static ROI
+            return sx1, sy1, sx2, sy2
+        return x1, y1, x2, y2
+    
     @staticmethod
     def draw_roi(frame: np.ndarray, roi_coords: Optional[dict] = None, color: Tuple[int, int, int] = (0, 255, 0)) -> np.ndarray:
         """
@@ -2,25 +2,51 @@ import cv2
 import numpy as np
 import asyncio
 import time
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple, List, Callable
 import threading
 from queue import Queue, Empty
+from .frame_source import FrameSource
+
+# Live stream variants: name -> (max width, JPEG quality, max fps), best first
+LIVE_VARIANTS = {
+    "hd": (1280, 70, 15),  # Single-camera full view
+    "sd": (480, 60, 15),
+    "grid": (320, 55, 5),
+    "thumb": (160, 50, 2),  # Dashboard thumbnails
+}
+DEFAULT_LIVE_VARIANT = "sd"
 
 class LiveVideoPipeline:
     """Pipeline A: Low-res live streaming - NEVER FREEZES"""
     
-    def __init__(self, camera_id: str, stream_source: str, fps: int = 15):
+    def __init__(self, camera_id: str, stream_source: str, fps: int = 15,
+                 frame_source: Optional[FrameSource] = None):
         self.camera_id = camera_id
         self.stream_source = stream_source
         self.target_fps = fps
         self.is_running = False
-        self.cap = None
         self.current_frame = None
+        self.current_seq = 0
+        self.current_timestamp = None
+        self.current_video_frame = None
         self.frame_count = 0
         self.actual_fps = 0
         self.last_fps_update = time.time()
         self.thread = None
         self.frame_queue = Queue(maxsize=2)  # Small queue to prevent lag
+        
+        # Latest frame encoded once per variant, shared by every viewer: {variant: (seq, jpeg bytes)}
+        self._jpeg_packets: Dict[str, Tuple[int, bytes]] = {}
+        self._jpeg_locks = {variant: threading.Lock() for variant in LIVE_VARIANTS}
+        self.encoded_frames = {variant: 0 for variant in LIVE_VARIANTS}
+        self.served_packets = 0
+        
+        # Called with the seq of every new frame, from the pipeline thread (must not block)
+        self.frame_listeners: List[Callable[[int], None]] = []
+        
+        # Shared capture (one decode per camera); own one if none given
+        self.frame_source = frame_source or FrameSource(camera_id, stream_source, resolution=(640, 480), fps=fps)
+        self.subscription = None
     
     def start(self):
         """Start live streaming pipeline"""
@@ -28,6 +54,9 @@ class LiveVideoPipeline:
             return
         
         self.is_running = True
+        # Largest live variant (fitted into 1280x720, keeping the camera's aspect ratio);
+        # smaller variants are scaled from it when encoded
+        self.subscription = self.frame_source.subscribe("live", size=(1280, 720))
         self.thread = threading.Thread(target=self._stream_loop, daemon=True)
         self.thread.start()
         print(f"[Pipeline A] Started for camera {self.camera_id}")
@@ -35,32 +64,15 @@ class LiveVideoPipeline:
     def stop(self):
         """Stop live streaming pipeline"""
         self.is_running = False
+        if self.subscription:
+            self.subscription.close()
         if self.thread:
             self.thread.join(timeout=2)
-        if self.cap:
-            self.cap.release()
         print(f"[Pipeline A] Stopped for camera {self.camera_id}")
     
     def _stream_loop(self):
         """Main streaming loop - runs in separate thread"""
         try:
-            # Open video capture
-            if self.stream_source.isdigit():
-                # Webcam
-                self.cap = cv2.VideoCapture(int(self.stream_source))
-            else:
-                # RTSP/ONVIF
-                self.cap = cv2.VideoCapture(self.stream_source)
-            
-            if not self.cap.isOpened():
-                print(f"[Pipeline A] Failed to open stream: {self.stream_source}")
-                return
-            
-            # Set low resolution for fast streaming
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            self.cap.set(cv2.CAP_PROP_FPS, self.target_fps)
-            
             frame_delay = 1.0 / self.target_fps
             fps_counter = 0
             fps_start_time = time.time()
@@ -68,20 +80,26 @@ class LiveVideoPipeline:
             while self.is_running:
                 start_time = time.time()
                 
-                ret, frame = self.cap.read()
+                video_frame = self.subscription.read(timeout=1.0)
                 
-                if not ret:
-                    print(f"[Pipeline A] Failed to read frame from {self.camera_id}")
-                    time.sleep(1)  # Wait before retry
+                if video_frame is None:
                     continue
                 
-                # Resize to even smaller for web streaming
-                frame = cv2.resize(frame, (480, 360), interpolation=cv2.INTER_LINEAR)
+                frame = video_frame.image
                 
                 # Update current frame
-                self.current_frame = frame.copy()
+                self.current_frame = frame
+                self.current_seq = video_frame.seq
+                self.current_video_frame = video_frame  # Frame and seq as one reference
+                self.current_timestamp = video_frame.timestamp
                 self.frame_count += 1
                 
+                for listener in list(self.frame_listeners):
+                    try:
+                        listener(video_frame.seq)
+                    except Exception as e:
+                        print(f"[Pipeline A] Frame listener error: {e}")
+                
                 # Put frame in queue (non-blocking)
                 if not self.frame_queue.full():
                     self.frame_queue.put(frame)
@@ -93,7 +111,7 @@ class LiveVideoPipeline:
                     fps_counter = 0
                     fps_start_time = time.time()
                 
-                # Frame rate limiting
+                # Frame rate limiting (frames arriving meanwhile are dropped by the subscription)
                 elapsed = time.time() - start_time
                 sleep_time = max(0, frame_delay - elapsed)
                 if sleep_time > 0:
@@ -101,28 +119,67 @@ class LiveVideoPipeline:
         
         except Exception as e:
             print(f"[Pipeline A] Error: {e}")
-        finally:
-            if self.cap:
-                self.cap.release()
+    
+    def add_frame_listener(self, listener: Callable[[int], None]):
+        """Get notified (from the pipeline thread) whenever a new frame is available"""
+        self.frame_listeners.append(listener)
+    
+    def remove_frame_listener(self, listener: Callable[[int], None]):
+        if listener in self.frame_listeners:
+            self.frame_listeners.remove(listener)
     
     def get_frame(self) -> Optional[np.ndarray]:
         """Get current frame (non-blocking)"""
         return self.current_frame
     
-    def get_frame_jpeg(self) -> Optional[bytes]:
+    def get_frame_jpeg(self, variant: str = DEFAULT_LIVE_VARIANT) -> Optional[bytes]:
         """Get current frame as JPEG bytes for streaming"""
-        if self.current_frame is None:
-            return None
+        packet = self.get_frame_packet(variant=variant)
+        return packet[1] if packet else None
+    
+    def get_frame_packet(self, after_seq: int = 0, variant: str = DEFAULT_LIVE_VARIANT) -> Optional[Tuple[int, bytes]]:
+        """
+        Get the current frame as a (seq, JPEG bytes) packet
         
-        try:
-            # Encode to JPEG with low quality for fast streaming
-            ret, buffer = cv2.imencode('.jpg', self.current_frame, [cv2.IMWRITE_JPEG_QUALITY, 60])
-            if ret:
-                return buffer.tobytes()
-        except Exception as e:
-            print(f"[Pipeline A] JPEG encoding error: {e}")
+        Each frame is encoded once per variant, on first request, and the bytes
+        are shared by all viewers of that variant.
         
-        return None
+        Args:
+            after_seq: Sequence number the caller already has
+            variant: LIVE_VARIANTS name (size and quality)
+        
+        Returns:
+            (seq, jpeg) or None if there is no frame newer than after_seq
+        """
+        video_frame = self.current_video_frame
+        if video_frame is None or video_frame.seq <= after_seq:
+            return None
+        frame, seq = video_frame.image, video_frame.seq
+        if variant not in LIVE_VARIANTS:
+            variant = DEFAULT_LIVE_VARIANT
+        
+        with self._jpeg_locks[variant]:
+            packet = self._jpeg_packets.get(variant)
+            if packet is None or packet[0] != seq:
+                try:
+                    max_width, quality, _ = LIVE_VARIANTS[variant]
+                    if frame.shape[1] > max_width:
+                        height = int(frame.shape[0] * max_width / frame.shape[1])
+                        frame = cv2.resize(frame, (max_width, height), interpolation=cv2.INTER_AREA)
+                    
+                    # Encode to JPEG with low quality for fast streaming
+                    ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+                    if not ret:
+                        return None
+                    packet = (seq, buffer.tobytes())
+                    self._jpeg_packets[variant] = packet
+                    self.encoded_frames[variant] += 1
+                except Exception as e:
+                    print(f"[Pipeline A] JPEG encoding error: {e}")
+                    return None
+            
+            self.served_packets += 1
+            return packet
     
     def get_stats(self) -> Dict:
         """Get pipeline statistics"""
@@ -131,5 +188,8 @@ class LiveVideoPipeline:
             "pipeline": "A",
             "fps": self.actual_fps,
             "frame_count": self.frame_count,
+            "frame_seq": self.current_seq,
+            "encoded_frames": dict(self.encoded_frames),
+            "served_packets": self.served_packets,
             "is_running": self.is_running
         }
\ No newline at end of file
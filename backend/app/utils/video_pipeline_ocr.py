@@ -6,8 +6,12 @@ import threading
 from queue import Queue
 from .motion_detector import MotionDetector
 from .roi_extractor import ROIExtractor
-from .ocr_engines.ocr_manager import OCRManager
-from app.utils.plate_formatter import PlateFormatter
+from .frame_source import FrameSource
+from .ocr_engines.inference_scheduler import inference_scheduler
+from .ocr_engines.ocr_manager import STATEFUL_ENGINES
+from app.config import settings
+from .plate_tracker import PlateTracker
+from .recognition_cache import RecognitionCache, dhash
 
 class OCRVideoPipeline:
     """Pipeline B: Full-res OCR processing - INDEPENDENT from Pipeline A"""
@@ -17,7 +21,12 @@ class OCRVideoPipeline:
                  enable_motion_detection: bool = True,
                  enable_roi: bool = True,
                  roi_coords: Optional[dict] = None,
-                 ocr_callback: Optional[Callable] = None):
+                 motion_zones: Optional[list] = None,
+                 motion_method: Optional[str] = None,
+                 denoise_method: Optional[str] = None,
+                 ocr_callback: Optional[Callable] = None,
+                 frame_source: Optional[FrameSource] = None,
+                 motion_source: Optional[FrameSource] = None):
         
         self.camera_id = camera_id
         self.stream_source = stream_source
@@ -26,17 +35,51 @@ class OCRVideoPipeline:
         self.enable_roi = enable_roi
         self.roi_coords = roi_coords
         self.ocr_callback = ocr_callback
+        self.denoise_method = denoise_method
         
         self.is_running = False
-        self.cap = None
         self.thread = None
         
-        # OCR components
-        self.ocr_manager = OCRManager()
-        self.motion_detector = MotionDetector() if enable_motion_detection else None
+        # Shared capture (one decode per camera); own one if none given
+        self.frame_source = frame_source or FrameSource(camera_id, stream_source, resolution=(1920, 1080))
+        self.subscription = None
+        
+        # Optional low-res sub-stream watched for motion; the main stream is then only
+        # fully decoded while motion lasts (plus MAIN_STREAM_MOTION_HOLD seconds)
+        self.motion_source = motion_source if enable_motion_detection else None
+        self.motion_subscription = None
+        self.main_decode_mode = self.frame_source.decode_mode
+        self.main_stream_active = True
+        self.last_motion_time = 0.0
+        self.main_stream_activations = 0
+        
+        # OCR components (engines are shared through the global inference scheduler)
+        self.ocr_engine = settings.DEFAULT_OCR_ENGINE
+        self.engine_ref = None  # Engine type this pipeline holds a registry reference on
+        self.detector_ref = None  # Set while this pipeline holds the plate detector
+        self.next_engine_retry = 0.0  # When to try acquiring missing engines again
+        self.motion_detector = MotionDetector(
+            threshold=settings.MOTION_THRESHOLD,
+            method=motion_method or settings.MOTION_METHOD,
+            zones=motion_zones,
+            process_width=settings.MOTION_PROCESS_WIDTH,
+            reference_size=self.frame_source.resolution if self.motion_source else None
+        ) if enable_motion_detection else None
+        self.tracker = PlateTracker(
+            camera_id,
+            max_age=settings.TRACK_MAX_AGE,
+            stability_readings=settings.TRACK_STABILITY_READINGS,
+            min_confidence=settings.OCR_CONFIDENCE_THRESHOLD
+        )
+        self.recognition_cache = RecognitionCache(max_age=settings.RECOGNITION_CACHE_MAX_AGE)
         
         # Statistics
         self.processed_frames = 0
+        self.skipped_ocr = 0  # Plate crops answered from the recognition cache
+        self.avg_roi_ratio = 1.0  # Share of the static ROI actually sent to detection/OCR
+        self.avg_frame_age_ms = 0.0  # Frame age when OCR picked it up
+        self.avg_latency_ms = 0.0  # Capture-to-decision latency
+        self.last_latency_ms = 0.0
         self.detected_plates = 0
         self.last_detection = None
         self.last_detection_time = None
@@ -46,98 +89,122 @@ class OCRVideoPipeline:
         if self.is_running:
             return
         
+        self._acquire_engines()
+        
         self.is_running = True
+        # Full resolution for better OCR
+        self.subscription = self.frame_source.subscribe("ocr")
+        if self.motion_source:
+            self.motion_subscription = self.motion_source.subscribe("motion")
         self.thread = threading.Thread(target=self._ocr_loop, daemon=True)
         self.thread.start()
         print(f"[Pipeline B] Started for camera {self.camera_id}")
     
+    def _acquire_engines(self):
+        """Take references on the OCR engine and plate detector (retried while they are missing)"""
+        self.next_engine_retry = time.time() + settings.ENGINE_RETRY_INTERVAL
+        
+        if self.engine_ref is None:
+            if inference_scheduler.acquire_engine(self.ocr_engine):
+                self.engine_ref = self.ocr_engine
+            else:
+                print(f"[Pipeline B] Engine {self.ocr_engine} not available for camera {self.camera_id}")
+        
+        # Plate detector gives the tracker its boxes (without it the ROI is one box)
+        if settings.PLATE_DETECTOR_ENABLED and self.detector_ref is None:
+            if inference_scheduler.acquire_engine("yolo"):
+                self.detector_ref = "yolo"
+    
     def stop(self):
         """Stop OCR pipeline"""
         self.is_running = False
+        if self.subscription:
+            self.subscription.close()
+        if self.motion_subscription:
+            self.motion_subscription.close()
         if self.thread:
             self.thread.join(timeout=2)
-        if self.cap:
-            self.cap.release()
+        self._emit_events(self.tracker.flush(time.time()))
+        if self.engine_ref:
+            inference_scheduler.release_engine(self.engine_ref)
+            self.engine_ref = None
+        if self.detector_ref:
+            inference_scheduler.release_engine(self.detector_ref)
+            self.detector_ref = None
         print(f"[Pipeline B] Stopped for camera {self.camera_id}")
     
     def _ocr_loop(self):
         """Main OCR processing loop - runs independently"""
         try:
-            # Open video capture (separate from Pipeline A)
-            if self.stream_source.isdigit():
-                self.cap = cv2.VideoCapture(int(self.stream_source))
-            else:
-                self.cap = cv2.VideoCapture(self.stream_source)
-            
-            if not self.cap.isOpened():
-                print(f"[Pipeline B] Failed to open stream: {self.stream_source}")
-                return
-            
-            # Set full resolution for better OCR
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1920)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 1080)
-            
             frame_delay = 1.0 / self.ocr_fps
             
             while self.is_running:
                 start_time = time.time()
                 
-                ret, frame = self.cap.read()
+                if (self.engine_ref is None or (settings.PLATE_DETECTOR_ENABLED and self.detector_ref is None)) \
+                        and start_time >= self.next_engine_retry:
+                    self._acquire_engines()
+                
+                # No OCR engine: nothing to submit until one loads
+                if self.engine_ref is None:
+                    self._emit_events(self.tracker.update([], time.time()))
+                    time.sleep(frame_delay)
+                    continue
+                
+                # Sub-stream camera: no motion, no main-stream frames
+                if self.motion_subscription and not self._sub_stream_motion():
+                    self._emit_events(self.tracker.hold(time.time()))
+                    time.sleep(frame_delay)
+                    continue
                 
-                if not ret:
-                    print(f"[Pipeline B] Failed to read frame from {self.camera_id}")
-                    time.sleep(1)
+                video_frame = self.subscription.read(timeout=1.0)
+                
+                if video_frame is None:
+                    # Keep ending tracks while the stream is quiet
+                    self._emit_events(self.tracker.update([], time.time()))
                     continue
                 
+                frame = video_frame.image
+                frame_age_ms = (time.time() - video_frame.timestamp) * 1000
+                if self.motion_subscription:
+                    # Sub-stream motion boxes are mapped to the actual main-stream size
+                    self.motion_detector.set_reference_size((frame.shape[1], frame.shape[0]))
+                
                 # Motion detection (skip OCR if no motion)
-                if self.enable_motion_detection and self.motion_detector:
+                if self.enable_motion_detection and self.motion_detector and not self.motion_subscription:
                     has_motion = self.motion_detector.detect_motion(frame)
                     if not has_motion:
                         # No motion, skip OCR processing
+                        self._emit_events(self.tracker.hold(time.time()))
                         time.sleep(frame_delay)
                         continue
                 
                 # Extract ROI if enabled
-                process_frame = frame
+                roi = (0, 0, frame.shape[1], frame.shape[0])
                 if self.enable_roi and self.roi_coords:
-                    process_frame = ROIExtractor.extract_roi(frame, self.roi_coords)
+                    roi = ROIExtractor.clamp_roi(frame.shape, self.roi_coords)
+                roi = self._dynamic_roi(frame.shape, roi)
+                process_frame = frame[roi[1]:roi[3], roi[0]:roi[2]]
                 
-                # Run OCR
-                plate_text, confidence, engine = self.ocr_manager.recognize_plate(process_frame)
+                # Detect + recognize (batched with other cameras)
+                try:
+                    detections = self._recognize(process_frame, (roi[0], roi[1]))
+                except Exception as e:
+                    print(f"[Pipeline B] OCR request failed: {e}")
+                    continue
                 
                 self.processed_frames += 1
                 
-                # If plate detected with sufficient confidence
-                if plate_text and confidence > 0.6:
-                    # Validate plate format
-                    if PlateFormatter.validate_plate(plate_text):
-                        formatted_plate = PlateFormatter.format_plate(plate_text)
-                        
-                        # Check if this is a new detection (debounce)
-                        is_new_detection = True
-                        if self.last_detection == formatted_plate:
-                            if self.last_detection_time and (time.time() - self.last_detection_time) < 5:
-                                is_new_detection = False
-                        
-                        if is_new_detection:
-                            self.detected_plates += 1
-                            self.last_detection = formatted_plate
-                            self.last_detection_time = time.time()
-                            
-                            # Callback with detection result
-                            if self.ocr_callback:
-                                try:
-                                    self.ocr_callback({
-                                        "camera_id": self.camera_id,
-                                        "plate": formatted_plate,
-                                        "confidence": confidence,
-                                        "engine": engine,
-                                        "timestamp": time.time()
-                                    })
-                                except Exception as e:
-                                    print(f"[Pipeline B] Callback error: {e}")
-                            
-                            print(f"[Pipeline B] Detected: {formatted_plate} (conf: {confidence:.2f}, engine: {engine})")
+                # Link detections to tracks; finalized tracks produce one event each
+                events = self.tracker.update(detections, time.time(), video_frame.seq, video_frame.timestamp)
+                self._emit_events(events)
+                self.recognition_cache.prune(self.tracker.tracks)
+                
+                # Capture-to-decision latency (frame grabbed -> tracker decided)
+                latency_ms = (time.time() - video_frame.timestamp) * 1000
+                self.last_latency_ms = latency_ms
+                self.avg_latency_ms += 0.1 * (latency_ms - self.avg_latency_ms)
+                self.avg_frame_age_ms += 0.1 * (frame_age_ms - self.avg_frame_age_ms)
                 
                 # Frame rate limiting
                 elapsed = time.time() - start_time
@@ -147,22 +214,182 @@ class OCRVideoPipeline:
         
         except Exception as e:
             print(f"[Pipeline B] Error: {e}")
-        finally:
-            if self.cap:
-                self.cap.release()
+    
+    def _sub_stream_motion(self) -> bool:
+        """Detect motion on the sub-stream and switch main-stream decoding on/off accordingly"""
+        motion_frame = self.motion_subscription.read(timeout=1.0)
+        now = time.time()
+        
+        # A stalled sub-stream must not blind OCR: fall back to the main stream
+        if motion_frame is None or self.motion_detector.detect_motion(motion_frame.image):
+            self.last_motion_time = now
+        
+        active = now - self.last_motion_time <= settings.MAIN_STREAM_MOTION_HOLD
+        if active != self.main_stream_active:
+            self.main_stream_active = active
+            if active:
+                self.main_stream_activations += 1
+            # Idle main stream: keyframes only (pyav); grabbed frames are not retrieved either way
+            self.frame_source.set_decode_mode(self.main_decode_mode if active else "keyframes")
+        return active
+    
+    def _dynamic_roi(self, frame_shape: tuple, static_roi: tuple) -> tuple:
+        """Shrink the static ROI to the moving regions plus the boxes of active tracks"""
+        if not (settings.DYNAMIC_ROI_ENABLED and self.enable_roi and self.motion_detector):
+            return static_roi
+        
+        motion_box = self.motion_detector.last_motion_box
+        if motion_box is None:
+            # Motion detector failed - no idea where to look
+            return static_roi
+        
+        boxes = [motion_box] + [track.bbox for track in self.tracker.tracks.values()]
+        roi = ROIExtractor.dynamic_roi(frame_shape, boxes, static_roi,
+                                       margin=settings.DYNAMIC_ROI_MARGIN,
+                                       min_size=settings.DYNAMIC_ROI_MIN_SIZE)
+        
+        static_area = max(1, (static_roi[2] - static_roi[0]) * (static_roi[3] - static_roi[1]))
+        ratio = (roi[2] - roi[0]) * (roi[3] - roi[1]) / static_area
+        self.avg_roi_ratio += 0.1 * (ratio - self.avg_roi_ratio)
+        return roi
+    
+    def _recognize(self, image: np.ndarray, offset: tuple) -> list:
+        """
+        Locate and read plates in a frame region
+        
+        Args:
+            image: Frame region (BGR)
+            offset: (x, y) of the region in the full frame
+        
+        Returns:
+            [{"bbox": (x1, y1, x2, y2) in full-frame coordinates, "plate", "confidence", "engine"}]
+        """
+        height, width = image.shape[:2]
+        
+        # Step 1: Locate every plate; no plate box means no OCR at all
+        if self.detector_ref:
+            future = inference_scheduler.submit_detection(self.camera_id, image)
+            boxes = sorted((b for b in future.result(timeout=settings.OCR_RESULT_TIMEOUT)
+                            if b["confidence"] >= settings.PLATE_DETECTION_CONFIDENCE),
+                           key=lambda b: b["confidence"], reverse=True)
+            
+            regions = []
+            for box in boxes[:settings.MAX_PLATES_PER_FRAME]:
+                x1, y1, x2, y2 = box["bbox"]
+                if x2 > x1 and y2 > y1:
+                    regions.append(((x1, y1, x2, y2), image[y1:y2, x1:x2]))
+            if not regions:
+                return []
+            use_detection = False
+        else:
+            # No detector: the whole region is one "plate box"
+            regions = [((0, 0, width, height), image)]
+            use_detection = True
+        
+        # Step 2: Recognize the plate crops (queued together, so they share a recognizer batch),
+        # reusing results of unchanged crops of confident tracks
+        now = time.time()
+        requests = []
+        for bbox, crop in regions:
+            full_bbox = (bbox[0] + offset[0], bbox[1] + offset[1], bbox[2] + offset[0], bbox[3] + offset[1])
+            track = self.tracker.find_track(full_bbox) if self.detector_ref else None
+            
+            if track is not None and crop.size:
+                crop_hash = dhash(crop)
+                if track.vote()[1] >= settings.RECOGNITION_CACHE_TARGET_CONFIDENCE and \
+                        self.recognition_cache.lookup(track.track_id, crop_hash, now) is not None:
+                    # Same plate image as before: keep the track alive, skip OCR
+                    self.skipped_ocr += 1
+                    requests.append((full_bbox, None, None, None))
+                    continue
+            else:
+                crop_hash = None
+            
+            future = inference_scheduler.submit(self.camera_id, crop, self.ocr_engine, detect=use_detection,
+                                                denoise=self.denoise_method)
+            requests.append((full_bbox, future, track, crop_hash))
+        
+        detections = []
+        for full_bbox, future, track, crop_hash in requests:
+            if future is None:
+                detections.append({"bbox": full_bbox, "plate": None, "confidence": 0.0, "engine": "cache"})
+                continue
+            
+            result = future.result(timeout=settings.OCR_RESULT_TIMEOUT)
+            plate_text, confidence, engine = result
+            if not self.detector_ref and not plate_text:
+                continue
+            if track is not None and crop_hash is not None:
+                self.recognition_cache.store(track.track_id, crop_hash, result, now)
+            detections.append({
+                "bbox": full_bbox,
+                "plate": plate_text,
+                "confidence": confidence,
+                "engine": engine
+            })
+        
+        return detections
+    
+    def _emit_events(self, events: list):
+        """Deliver finalized plate events"""
+        for event in events:
+            self.detected_plates += 1
+            self.last_detection = event["plate"]
+            self.last_detection_time = event["timestamp"]
+            
+            # Callback with detection result
+            if self.ocr_callback:
+                try:
+                    self.ocr_callback(event)
+                except Exception as e:
+                    print(f"[Pipeline B] Callback error: {e}")
+            
+            print(f"[Pipeline B] Detected: {event['plate']} (conf: {event['confidence']:.2f}, "
+                  f"engine: {event['engine']}, track: {event['track_id']}, readings: {event['readings']})")
     
     def set_ocr_engine(self, engine: str) -> bool:
         """Change OCR engine"""
-        return self.ocr_manager.set_engine(engine)
+        if engine == self.ocr_engine:
+            return True
+        
+        if not inference_scheduler.acquire_engine(engine):
+            print(f"[Pipeline B] Engine {engine} not available")
+            return False
+        
+        if self.engine_ref:
+            inference_scheduler.release_engine(self.engine_ref)
+        self.ocr_engine = engine
+        self.engine_ref = engine
+        return True
     
     def get_stats(self) -> Dict:
         """Get pipeline statistics"""
-        return {
+        stats = {
             "camera_id": self.camera_id,
             "pipeline": "B",
             "processed_frames": self.processed_frames,
             "detected_plates": self.detected_plates,
             "last_detection": self.last_detection,
-            "current_engine": self.ocr_manager.get_current_engine(),
+            "current_engine": self.ocr_engine,
+            "plate_detector": self.detector_ref is not None,
+            "tracker": self.tracker.get_stats(),
+            "skipped_ocr": self.skipped_ocr,
+            "avg_roi_ratio": round(self.avg_roi_ratio, 3),
+            "avg_frame_age_ms": round(self.avg_frame_age_ms, 1),
+            "avg_latency_ms": round(self.avg_latency_ms, 1),
+            "last_latency_ms": round(self.last_latency_ms, 1),
+            "recognition_cache": self.recognition_cache.get_stats(),
             "is_running": self.is_running
-        }
\ No newline at end of file
+        }
+        
+        if self.motion_detector:
+            stats["motion"] = self.motion_detector.get_stats()
+        
+        if self.motion_source:
+            stats["main_stream_active"] = self.main_stream_active
+            stats["main_stream_activations"] = self.main_stream_activations
+        
+        if self.ocr_engine in STATEFUL_ENGINES and self.engine_ref:
+            stats["engine_stats"] = inference_scheduler.get_engine_stats(self.ocr_engine, self.camera_id)
+        
+        return stats
\ No newline at end of file